@@ -0,0 +1,2 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks 
+# SPDX-License-Identifier: AGPL-3.0
\ No newline at end of file
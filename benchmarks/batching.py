@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Conversion throughput, in quads per second, with IFCLDClient adding each
+quad to a ConjunctiveGraph on its own (as it used to) against gathering
+them into batches for addN, into a ConjunctiveGraph and into a plain,
+triple-only Graph, for each store.
+
+    $ python3 -m benchmarks.batching [--repeat N] [file.ifc ...]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from rdflib import ConjunctiveGraph, Graph, URIRef
+
+import stores
+from conversion import TRIPLE_STORES
+from parsers.step.parser import IFCLDClient, parse_step
+from parsers.step.pool import parser_pool
+from parsers.step.visitors import FileVisitor
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+STORES = ("default", "compact")
+IDENTIFIER = URIRef("http://example.org/model#")
+
+
+class PerQuadClient(IFCLDClient):
+    """
+    Adds each quad to a ConjunctiveGraph as soon as it is made.
+    """
+    def add(self, subject, predicate, object_):
+        self.graph.add((subject, predicate, object_, self.graph.identifier))
+
+
+def conjunctive(store):
+    return ConjunctiveGraph(store=store, identifier=IDENTIFIER)
+
+
+def triples_only(store):
+    return Graph(store=TRIPLE_STORES.get(store, store), identifier=IDENTIFIER)
+
+
+MODES = {"per quad": (PerQuadClient, conjunctive),
+         "batched": (IFCLDClient, conjunctive),
+         "triples only": (IFCLDClient, triples_only)}
+
+
+def convert(data, client_class, graph):
+    client = client_class(graph)
+    with parser_pool.parser() as parser:
+        FileVisitor().visit(client, parse_step(parser, data))
+    return graph
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--repeat", type=int, default=3)
+    args.add_argument("files", nargs="*", default=[str(TEST_DIR / "01.ifc"), str(TEST_DIR / "duplex.ifc")])
+    args = args.parse_args(argv)
+
+    print("{name:16} {store:8} {mode:>13} {quads:>8} {s:>8} {rate:>10}".format(
+        name="file", store="store", mode="mode", quads="quads", s="s", rate="quads/s"))
+    for path in args.files:
+        data = Path(path).read_bytes()
+        for store in STORES:
+            for mode, (client_class, make_graph) in MODES.items():
+                elapsed = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    quads = len(convert(data, client_class, make_graph(store)))
+                    elapsed.append(time.perf_counter() - start)
+                print("{name:16} {store:8} {mode:>13} {quads:8d} {s:8.2f} {rate:10.0f}".format(
+                    name=Path(path).name, store=store, mode=mode, quads=quads, s=min(elapsed),
+                    rate=quads / min(elapsed)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
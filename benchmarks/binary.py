@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Size and load time of the binary RDF format (application/x-ifcld-rdf),
+with and without block compression, against N-Quads and Turtle.
+
+Each file is converted, serialized in each format, and loaded back into a
+graph: the loaded graph must hold the converted one's triples (blank nodes
+aside, and decimals compared by value, as rdflib normalizes those it parses
+from text). The time to write each format, and to load it, are reported.
+
+    $ python3 -m benchmarks.binary [file.ifc ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+from collections import Counter
+
+from rdflib import ConjunctiveGraph, URIRef, BNode, Literal, XSD
+
+import parsers
+import serializers
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+# name: (format, serializer arguments)
+FORMATS = {
+    "n-quads": ("application/n-quads", {}),
+    "turtle": ("text/turtle", {}),
+    "binary": ("application/x-ifcld-rdf", {"compress": False}),
+    "binary+zlib": ("application/x-ifcld-rdf", {}),
+}
+
+
+def parse(data, format):
+    graph = ConjunctiveGraph(identifier=URIRef("http://example.org/model#"))
+    graph.parse(data=data, format=format)
+    return graph
+
+
+def key(term):
+    if isinstance(term, BNode):
+        return None
+    if isinstance(term, Literal) and term.datatype == XSD.decimal:
+        return float(term.value), term.datatype
+    return term
+
+
+def masked(graph):
+    return Counter(tuple(key(term) for term in triple) for triple in graph)
+
+
+def main(*paths):
+    paths = paths or [TEST_DIR / "duplex.ifc"]
+    parse((TEST_DIR / "wall-standard-case.ifc").read_bytes(), "model/step")    # load the parser and schema
+    failures = 0
+    print("{name:16} {format:12} {status:>6} {mb:>8} {write:>8} {load:>8}".format(
+        name="file", format="format", status="parity", mb="MB", write="write s", load="load s"))
+    for path in paths:
+        graph = parse(Path(path).read_bytes(), "model/step")
+        expected = masked(graph)
+        for name, (format, args) in FORMATS.items():
+            start = time.perf_counter()
+            data = graph.serialize(format=format, encoding="utf-8", **args)
+            written = time.perf_counter()
+            loaded = parse(data, format)
+            load_time = time.perf_counter() - written
+            same = masked(loaded) == expected
+            failures += not same
+            print("{name:16} {format:12} {status:>6} {mb:8.2f} {:8.2f} {:8.2f}".format(
+                written - start, load_time, name=Path(path).name, format=name, status="ok" if same else "FAIL",
+                mb=len(data) / 1e6))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
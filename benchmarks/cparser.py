@@ -0,0 +1,100 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Parity and throughput of the C parser backend against SCL's PLY parser.
+
+Every file is parsed by both; the headers and entities (references, type
+names and parameters, typed parameters included) must be identical.
+Then each backend's throughput is reported in MB/s.
+
+    $ python3 -m parsers.step.cparser build
+    $ python3 -m benchmarks.cparser [file.ifc ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from parsers.step.SCL.Part21 import TypedParameter, SimpleEntity, ComplexEntity
+from parsers.step.incremental import IncrementalParser
+from parsers.step.cparser import CParser
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+
+
+def normalize(value):
+    if isinstance(value, TypedParameter):
+        return ("typed", value.type_name, normalize(value.params))
+    if isinstance(value, SimpleEntity):
+        return ("simple", value.ref, value.type_name, normalize(value.params))
+    if isinstance(value, ComplexEntity):
+        return ("complex", value.ref, normalize(value.params))
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    if isinstance(value, float):
+        return ("float", repr(value))
+    if isinstance(value, bool) or value is None:
+        return ("const", value)
+    if isinstance(value, int):
+        return ("int", value)
+    return value
+
+
+def flatten(file):
+    header = file.header
+    headers = [header.file_description, header.file_name, header.file_schema] + header.extra_headers
+    yield [(h.type_name, normalize(h.params)) for h in headers]
+    for section in file.sections:
+        yield "DATA"
+        for entity in section.entities:
+            yield normalize(entity)
+
+
+def check_parity(path, ply, c):
+    data = Path(path).read_bytes()
+    expected, actual = flatten(ply.parse(data)), flatten(c.parse(data))
+    for count, (e, a) in enumerate(zip(expected, actual)):
+        if e != a:
+            return "differs at item {count}:\n  ply: {e}\n  c:   {a}".format(count=count, e=e, a=a)
+    if next(expected, None) is not None or next(actual, None) is not None:
+        return "differs in length"
+    return None
+
+
+def throughput(parser, data, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for _ in flatten(parser.parse(data)):
+            pass
+        parser.reset()
+    elapsed = (time.perf_counter() - start) / iterations
+    return len(data) / elapsed / 1e6
+
+
+def main(*paths):
+    paths = paths or sorted(p for p in TEST_DIR.iterdir() if p.suffix in (".ifc", ".stp"))
+    ply, c = IncrementalParser(), CParser()
+    failures = 0
+    for path in paths:
+        problem = check_parity(path, ply, c)
+        ply.reset()
+        c.reset()
+        failures += problem is not None
+        print("{status:4}  {name}{problem}".format(status="FAIL" if problem else "ok",
+                                                   name=Path(path).name,
+                                                   problem="\n" + problem if problem else ""))
+
+    print()
+    print("{name:28} {size:>10} {ply:>10} {c:>10}".format(name="file", size="bytes", ply="ply MB/s", c="c MB/s"))
+    for path in paths:
+        data = Path(path).read_bytes()
+        iterations = max(1, int(2e6 // len(data)))
+        print("{name:28} {size:10d} {ply:10.2f} {c:10.2f}".format(name=Path(path).name, size=len(data),
+                                                                  ply=throughput(ply, data, iterations),
+                                                                  c=throughput(c, data, iterations)))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,230 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Parity and speed of compiled profile rules against pyshacl, each run on
+the whole model and narrowed to the profile's footprint, and of the
+native enricher for the profile, if there is one.
+
+A model is converted once, and a profile applied to a copy of it by each
+engine. The triples each engine adds must be isomorphic to pyshacl's;
+then the time each took is reported. The native enricher's time is what
+it spent on the entities handed to it, and adding its triples.
+
+Without --profile-dir, a BOT-style profile (spatial structure to BOT
+classes and relations, through triple and SPARQL rules) is generated
+from the model schema's attribute IRIs. It mirrors the native enricher's
+mapping, so the native enricher's parity with it only checks the two
+engines agree, not that the mapping is the published profile's. With
+--profile-dir, the profile is read from `index.json` and its rules file
+there, as IFCLD_PROFILE_DIR would be: pointed at the published BOT
+profile, the native enricher is checked against it, and the triples
+either adds that the other doesn't are reported.
+
+    $ python3 -m benchmarks.enrichment [--file FILE] [--profile-dir DIR]
+                                       [--profile URI] [--repeat N]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from rdflib import ConjunctiveGraph, URIRef, DCTERMS
+from rdflib.compare import isomorphic
+
+import parsers
+from conversion import get_ifc_version_uri
+from parsers.step.schema_store import schema_store
+from parsers.step.enrichers import BOT, ELEMENT_TYPES, ENRICHERS
+from profiles import Profile, ProfileRegistry, add_profile, parse_profile
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+DIFFERENCES = 10                    # triples listed, each way, when engines disagree
+
+BOT_PROFILE = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix bot: <https://w3id.org/bot#> .
+
+bot: sh:declare [ sh:prefix "bot" ; sh:namespace "https://w3id.org/bot#"^^xsd:anyURI ] .
+
+bot:SiteShape a sh:NodeShape ;
+    sh:targetClass ifc:ifcsite ;
+    sh:rule [ a sh:TripleRule ; sh:subject sh:this ; sh:predicate rdf:type ; sh:object bot:Site ] .
+
+bot:BuildingShape a sh:NodeShape ;
+    sh:targetClass ifc:ifcbuilding ;
+    sh:rule [ a sh:TripleRule ; sh:subject sh:this ; sh:predicate rdf:type ; sh:object bot:Building ] .
+
+bot:StoreyShape a sh:NodeShape ;
+    sh:targetClass ifc:ifcbuildingstorey ;
+    sh:rule [ a sh:TripleRule ; sh:subject sh:this ; sh:predicate rdf:type ; sh:object bot:Storey ] .
+
+bot:SpaceShape a sh:NodeShape ;
+    sh:targetClass ifc:ifcspace ;
+    sh:rule [ a sh:TripleRule ; sh:subject sh:this ; sh:predicate rdf:type ; sh:object bot:Space ] .
+
+bot:ElementShape a sh:NodeShape ;
+    {element_targets} ;
+    sh:rule [ a sh:TripleRule ; sh:subject sh:this ; sh:predicate rdf:type ; sh:object bot:Element ] .
+
+bot:DecompositionShape a sh:NodeShape ;
+    sh:order 1 ;
+    sh:targetClass bot:Site, bot:Building, bot:Storey, bot:Element ;
+    sh:rule [ a sh:SPARQLRule ; sh:prefixes bot: ; sh:construct \"\"\"
+        CONSTRUCT {{ $this ?relation ?part }}
+        WHERE {{ ?rel <{relating_object}> $this ; <{related_objects}> ?part .
+                 $this a ?whole_class . ?part a ?part_class .
+                 VALUES (?whole_class ?part_class ?relation) {{
+                     (bot:Site bot:Building bot:hasBuilding) (bot:Building bot:Storey bot:hasStorey)
+                     (bot:Storey bot:Space bot:hasSpace) (bot:Element bot:Element bot:hasSubElement) }} }}\"\"\" ] .
+
+bot:ContainmentShape a sh:NodeShape ;
+    sh:order 1 ;
+    sh:targetClass bot:Site, bot:Building, bot:Storey, bot:Space ;
+    sh:rule [ a sh:SPARQLRule ; sh:prefixes bot: ; sh:construct \"\"\"
+        CONSTRUCT {{ $this bot:containsElement ?element }}
+        WHERE {{ ?rel <{relating_structure}> $this ; <{related_elements}> ?element .
+                 ?element a bot:Element }}\"\"\" ] .
+
+bot:AdjacencyShape a sh:NodeShape ;
+    sh:order 1 ;
+    sh:targetClass bot:Space ;
+    sh:rule [ a sh:TripleRule ; sh:subject sh:this ; sh:predicate bot:adjacentElement ;
+              sh:object [ sh:path ( [ sh:inversePath <{relating_space}> ] <{related_building_element}> ) ] ] .
+"""
+
+
+def bot_profile(ifc_version):
+    """
+    The BOT-style profile for an IFC version, its relations' attributes
+    picked out of the schema's offset map by position.
+    """
+    ns = str(ifc_version)
+    offsets = schema_store.get(ns.rstrip("#").rsplit("/", 1)[-1], "offsets").data
+    return BOT_PROFILE.format(
+        ns=ns,
+        relating_object=offsets[ns + "ifcrelaggregates"][4],
+        related_objects=offsets[ns + "ifcrelaggregates"][5],
+        related_elements=offsets[ns + "ifcrelcontainedinspatialstructure"][4],
+        relating_structure=offsets[ns + "ifcrelcontainedinspatialstructure"][5],
+        relating_space=offsets[ns + "ifcrelspaceboundary"][4],
+        related_building_element=offsets[ns + "ifcrelspaceboundary"][5],
+        element_targets=" ;\n    ".join("sh:targetClass ifc:" + name.lower() for name in sorted(ELEMENT_TYPES))).encode()
+
+
+def convert(data, profiles=()):
+    graph = ConjunctiveGraph(identifier=URIRef("http://example.org/model#"))
+    graph.parse(data=data, format="model/step", profiles=profiles)
+    return graph
+
+
+def timed(enricher_class):
+    """
+    `enricher_class`, with the time each instance spends in it appended
+    to `elapsed` (converting the file around it is too noisy to tell it).
+    """
+    class Timed(enricher_class):
+        elapsed = []
+
+        def __init__(self):
+            super().__init__()
+            self.elapsed.append(0.0)
+
+        def entity(self, client, entity):
+            start = time.perf_counter()
+            super().entity(client, entity)
+            self.elapsed[-1] += time.perf_counter() - start
+
+        def end_file(self, client):
+            start = time.perf_counter()
+            super().end_file(client)
+            self.elapsed[-1] += time.perf_counter() - start
+    return Timed
+
+
+def copy(graph):
+    result = ConjunctiveGraph(identifier=graph.identifier)
+    result.addN((s, p, o, result.default_context) for s, p, o in graph)
+    return result
+
+
+def added(graph, apply):
+    g = copy(graph)
+    start = time.perf_counter()
+    apply(g)
+    elapsed = time.perf_counter() - start
+    return elapsed, g
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--file", default=str(TEST_DIR / "duplex.ifc"))
+    args.add_argument("--profile-dir")
+    args.add_argument("--profile", default=str(BOT))
+    args.add_argument("--repeat", type=int, default=3)
+    args = args.parse_args(argv)
+
+    data = Path(args.file).read_bytes()
+    graph = convert(data)
+    ifc_version = get_ifc_version_uri(graph)
+    if args.profile_dir:
+        profile = ProfileRegistry(directory=args.profile_dir).profile(args.profile, ifc_version)
+    else:
+        profile = Profile(parse_profile(bot_profile(ifc_version), ifc_version))
+    if profile.rules is None:
+        print("The profile's rules don't compile; pyshacl applies them.")
+        return 1
+
+    before = set(graph)
+    engines = {"pyshacl": lambda g: add_profile(g, profile.graph),
+               "compiled": lambda g: profile.rules.apply(g)}
+    if profile.footprint is not None:
+        pyshacl_profile = Profile(profile.graph)
+        pyshacl_profile.rules = None
+        engines["pyshacl-narrowed"] = lambda g: pyshacl_profile.apply(g, narrow=True)
+        engines["compiled-narrowed"] = lambda g: profile.apply(g, narrow=True)
+    timings, inferred = {}, {}
+    for name, apply in engines.items():
+        results = [added(graph, apply) for _ in range(args.repeat)]
+        timings[name] = min(elapsed for elapsed, _ in results)
+        inferred[name] = ConjunctiveGraph()
+        inferred[name].addN((s, p, o, inferred[name].default_context)
+                            for s, p, o in results[0][1] if (s, p, o) not in before)
+
+    print("{}: {} triples, {} added".format(Path(args.file).name, len(before), len(inferred["pyshacl"])))
+    if args.profile in ENRICHERS:
+        # applied natively, as the model is converted. Its blank nodes aren't the first
+        # conversion's, so pick out what it added by namespace
+        enricher = ENRICHERS[args.profile] = timed(ENRICHERS[args.profile])
+        try:
+            enriched = [convert(data, [args.profile]) for _ in range(args.repeat)][0]
+        finally:
+            ENRICHERS[args.profile] = enricher.__base__
+        inferred["native"] = ConjunctiveGraph()
+        inferred["native"].addN((s, p, o, inferred["native"].default_context) for s, p, o in enriched
+                                if (p.startswith(args.profile) or o.startswith(args.profile))
+                                and p != DCTERMS.conformsTo)
+        timings["native"] = min(enricher.elapsed)
+
+    if not args.profile_dir:
+        print("Profile: generated to mirror the native mapping (--profile-dir checks against a published one)")
+    for name in inferred:
+        if not isomorphic(inferred["pyshacl"], inferred[name]):
+            print("FAIL: {} added {} triples, pyshacl {}".format(name, len(inferred[name]), len(inferred["pyshacl"])))
+            for label, triples in (("only " + name, set(inferred[name]) - set(inferred["pyshacl"])),
+                                   ("only pyshacl", set(inferred["pyshacl"]) - set(inferred[name]))):
+                for triple in sorted(triples)[:DIFFERENCES]:
+                    print("  {}: {}".format(label, " ".join(term.n3() for term in triple)))
+                if len(triples) > DIFFERENCES:
+                    print("  {}: ... {} more".format(label, len(triples) - DIFFERENCES))
+            return 1
+    for name, elapsed in timings.items():
+        print("{:>18} {:8.3f} s {:6.1f} x".format(name, elapsed, timings["pyshacl"] / elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
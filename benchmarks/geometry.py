@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Triples, N-Triples size and conversion time with representations left
+out (the omit-geometry profile) or collapsed into literals (the
+compact-geometry profile) against the full conversion.
+
+Each file is converted all three ways: the entities converted with
+representations left out must have the same statements as in the full
+conversion, and the compact conversion's literals must hold the records
+of the entities left out, each once.
+
+    $ python3 -m benchmarks.geometry [file.ifc ...]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from collections import Counter
+
+from rdflib import URIRef, BNode, Literal, RDF
+
+import parsers
+from conversion import convert, make_graph
+from parsers.step.enrichers import GEOM, OmitGeometryEnricher, CompactGeometryEnricher
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+BASE_URI = URIRef("http://example.org/model#")
+MODES = {"full": (), "omit": (str(OmitGeometryEnricher.profile),),
+         "compact": (str(CompactGeometryEnricher.profile),)}
+
+
+def parse(data, profiles):
+    graph = make_graph("application/n-triples", BASE_URI)
+    graph.parse(data=data, format="model/step", profiles=profiles)
+    return graph
+
+
+def value(graph, node):
+    if isinstance(node, Literal):
+        return float(node.value) if isinstance(node.value, (int, float)) else node.value
+    if isinstance(node, BNode):
+        if (node, RDF.value, None) in graph:
+            return value(graph, graph.value(node, RDF.value))
+        items = []
+        while node is not None and node != RDF.nil and (node, RDF.first, None) in graph:
+            items.append(value(graph, graph.value(node, RDF.first)))
+            node = graph.value(node, RDF.rest)
+        return tuple(items)
+    return node
+
+
+def values(graph, omitted):
+    return Counter((s, p, value(graph, o)) for s, p, o in graph
+                   if isinstance(s, URIRef) and s != BASE_URI and s not in omitted)
+
+
+def check(data):
+    enricher = OmitGeometryEnricher()
+    omitted = {URIRef(ref, base=BASE_URI) for ref in enricher.skipped(None, data)}
+    if values(parse(data, MODES["full"]), omitted) != values(parse(data, MODES["omit"]), ()):
+        return False
+    records = Counter()
+    for text in parse(data, MODES["compact"]).objects(None, GEOM.step):
+        records.update(int(re.match(r"#(\d+)", record)[1]) for record in str(text).split("\n"))
+    return set(records) == enricher.omitted and set(records.values()) <= {1}
+
+
+def timed(data, profiles):
+    start = time.perf_counter()
+    content, _ = convert(data, "model/step", "application/n-triples", BASE_URI, profiles)
+    return content.count(b"\n"), len(content), time.perf_counter() - start
+
+
+def main(*paths):
+    paths = paths or [TEST_DIR / "01.ifc", TEST_DIR / "duplex.ifc"]
+    parse((TEST_DIR / "wall-standard-case.ifc").read_bytes(), ())    # load the parser and schema
+    failures = 0
+    print("{name:16} {status:>6} {mode:>8} {triples:>10} {size:>12} {seconds:>8}".format(
+        name="file", status="parity", mode="mode", triples="triples", size="nt bytes", seconds="s"))
+    for path in paths:
+        data = Path(path).read_bytes()
+        same = check(data)
+        failures += not same
+        for mode, profiles in MODES.items():
+            triples, size, seconds = timed(data, profiles)
+            print("{name:16} {status:>6} {mode:>8} {:10d} {:12d} {:8.2f}".format(
+                triples, size, seconds, name=Path(path).name, status="ok" if same else "FAIL", mode=mode))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
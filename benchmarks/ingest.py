@@ -0,0 +1,87 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Peak heap memory and time of taking in a model and converting it to
+N-Triples: read into bytes (as the request body was), spooled to a
+temporary file and memory-mapped, or mapped by reference from a shared
+directory. The model is test/duplex.ifc enlarged by repeating its
+entities (renumbered) `copies` times.
+
+The heap is that traced by tracemalloc (in a separate run), which mapped
+pages are not part of. Every way in must write the same statements.
+
+    $ python3 -m benchmarks.ingest [copies]
+"""
+
+import sys
+import time
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import parsers
+from parsers.step.streaming import LineStream
+from uploads import spool, shared_file
+from benchmarks.parallel import enlarge, statements
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+BASE_URI = "http://example.org/model#"
+FORMAT = "application/n-triples"
+SPOOL_SIZE = 1024 * 1024
+
+
+def read(path):
+    return path.read_bytes()
+
+
+def spooled(path):
+    with open(path, "rb") as f:
+        return spool(f, SPOOL_SIZE, path.parent)
+
+
+def shared(path):
+    return shared_file(path.name, path.parent)
+
+
+MODES = {"bytes": read, "spooled": spooled, "shared": shared}
+
+
+def peak(ingest, path):
+    tracemalloc.start()
+    try:
+        for _ in LineStream(ingest(path), BASE_URI, FORMAT):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def timed(ingest, path):
+    start = time.perf_counter()
+    text = "".join(LineStream(ingest(path), BASE_URI, FORMAT))
+    return text, time.perf_counter() - start
+
+
+def main(copies=4):
+    copies = int(copies)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "duplex.ifc"
+        path.write_bytes(enlarge((TEST_DIR / "duplex.ifc").read_bytes(), copies))
+        expected = None
+        failures = 0
+        print("duplex.ifc x{copies}: {size:.1f} MB".format(copies=copies, size=path.stat().st_size / 1024 / 1024))
+        print("{mode:>8} {status:>6} {peak:>10} {seconds:>8}".format(
+            mode="input", status="parity", peak="peak MB", seconds="s"))
+        for mode, ingest in MODES.items():
+            text, seconds = timed(ingest, path)
+            found = statements(text)
+            expected = expected or found
+            failures += found != expected
+            print("{mode:>8} {status:>6} {:10.1f} {:8.2f}".format(
+                peak(ingest, path) / 1024 / 1024, seconds, mode=mode, status="ok" if found == expected else "FAIL"))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,87 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Parity and speed of IFC-LD JSON-LD (application/json), streamed from STEP
+and serialized from a graph, against rdflib's JSON-LD serializer.
+
+Each file is converted into a graph, and into a JSON-LD stream: read back,
+the stream and the graph's serialization must hold the graph's triples
+(blank nodes aside, and decimals compared by value) and the graph's node's
+`ifcld:object` index of its entities. Times are of the whole conversion,
+parse included.
+
+    $ python3 -m benchmarks.jsonld [file.ifc ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+from collections import Counter
+
+from rdflib import Graph, URIRef, BNode, Literal, XSD
+
+import parsers
+import serializers
+from conversion import make_graph
+from parsers.step.streaming import LineStream
+from parsers.step.jsonld import IFCLD
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+BASE_URI = URIRef("http://example.org/model#")
+OBJECT = URIRef(IFCLD + "object")
+
+
+def parse(data):
+    graph = make_graph("application/json", BASE_URI)
+    graph.parse(data=data, format="model/step")
+    return graph
+
+
+def key(term):
+    if isinstance(term, BNode):
+        return None
+    if isinstance(term, Literal):
+        value = float(term.value) if term.datatype == XSD.decimal else term.value
+        return str(term) if value is None else value, term.datatype, term.language
+    return term
+
+
+def masked(graph, vocab):
+    # typed parameters' (relative) types read back relative to the schema
+    return Counter(tuple(key(URIRef(vocab + term) if isinstance(term, URIRef) and ":" not in term else term)
+                         for term in triple) for triple in graph if triple[1] != OBJECT)
+
+
+def timed(convert, data):
+    start = time.perf_counter()
+    output = convert(data)
+    return output, time.perf_counter() - start
+
+
+def main(*paths):
+    paths = paths or [TEST_DIR / "01.ifc", TEST_DIR / "duplex.ifc"]
+    parse((TEST_DIR / "wall-standard-case.ifc").read_bytes())     # load the parser and schema
+    failures = 0
+    print("{name:16} {triples:>8} {status:>6} {rdflib:>9} {graph:>9} {stream:>9} {kb:>9}".format(
+        name="file", triples="triples", status="parity", rdflib="json-ld s", graph="graph s", stream="stream s",
+        kb="KB"))
+    for path in paths:
+        data = Path(path).read_bytes()
+        graph = parse(data)
+        vocab = str(graph.value(BASE_URI, URIRef("http://purl.org/dc/terms/conformsTo")))
+        expected = masked(graph, vocab)
+        _, rdflib_time = timed(lambda data: parse(data).serialize(format="json-ld"), data)
+        output, graph_time = timed(lambda data: parse(data).serialize(format="application/json"), data)
+        streamed, stream_time = timed(lambda data: "".join(LineStream(data, BASE_URI, "application/json")), data)
+        same = all(masked(Graph().parse(data=text, format="json-ld"), vocab) == expected
+                   for text in (output, streamed))
+        failures += not same
+        print("{name:16} {triples:8d} {status:>6} {:9.2f} {:9.2f} {:9.2f} {kb:9.0f}".format(
+            rdflib_time, graph_time, stream_time, name=Path(path).name, triples=len(graph),
+            status="ok" if same else "FAIL", kb=len(streamed) / 1e3))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,82 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Triples and conversion time with numeric lists as array literals (the
+compact-lists profile) against rdf:Lists of value nodes.
+
+Each file is converted both ways: every entity's attributes must hold the
+same values (arrays decoded, numbers compared as floats).
+
+    $ python3 -m benchmarks.lists [file.ifc ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+from collections import Counter
+
+from rdflib import URIRef, BNode, Literal, RDF
+
+import parsers
+from conversion import convert, make_graph
+from parsers.step.arrays import TYPES, decode
+from parsers.step.enrichers import CompactListsEnricher
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+BASE_URI = URIRef("http://example.org/model#")
+PROFILE = str(CompactListsEnricher.profile)
+
+
+def parse(data, profiles):
+    graph = make_graph("application/n-triples", BASE_URI)
+    graph.parse(data=data, format="model/step", profiles=profiles)
+    return graph
+
+
+def value(graph, node):
+    if isinstance(node, Literal):
+        if node.datatype in TYPES:
+            return tuple(float(item) for item in decode(node))
+        return float(node.value) if isinstance(node.value, (int, float)) else node.value
+    if isinstance(node, BNode):
+        if (node, RDF.value, None) in graph:
+            return value(graph, graph.value(node, RDF.value))
+        items = []
+        while node is not None and node != RDF.nil and (node, RDF.first, None) in graph:
+            items.append(value(graph, graph.value(node, RDF.first)))
+            node = graph.value(node, RDF.rest)
+        return tuple(items)
+    return node
+
+
+def values(graph):
+    return Counter((s, p, value(graph, o)) for s, p, o in graph
+                   if isinstance(s, URIRef) and s != BASE_URI and p != RDF.type)
+
+
+def timed(data, profiles):
+    start = time.perf_counter()
+    content, _ = convert(data, "model/step", "application/n-triples", BASE_URI, profiles)
+    return content.count(b"\n"), time.perf_counter() - start
+
+
+def main(*paths):
+    paths = paths or [TEST_DIR / "01.ifc", TEST_DIR / "duplex.ifc"]
+    parse((TEST_DIR / "wall-standard-case.ifc").read_bytes(), ())    # load the parser and schema
+    failures = 0
+    print("{name:16} {status:>6} {lists:>10} {compact:>10} {lists_s:>8} {compact_s:>10}".format(
+        name="file", status="parity", lists="triples", compact="compact", lists_s="nt s", compact_s="compact s"))
+    for path in paths:
+        data = Path(path).read_bytes()
+        same = values(parse(data, ())) == values(parse(data, (PROFILE,)))
+        failures += not same
+        (triples, seconds), (compact_triples, compact_seconds) = timed(data, ()), timed(data, (PROFILE,))
+        print("{name:16} {status:>6} {:10d} {:10d} {:8.2f} {:10.2f}".format(
+            triples, compact_triples, seconds, compact_seconds, name=Path(path).name,
+            status="ok" if same else "FAIL"))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Load test a running service: requests/sec and latency percentiles for
+converting one model at increasing numbers of concurrent clients.
+
+    $ gunicorn service:app &
+    $ python3 -m benchmarks.load [--url URL] [--file FILE] [--accept TYPE]
+                                 [--requests N] [--clients 1,4,16]
+"""
+
+import sys
+import time
+import argparse
+import http.client
+from pathlib import Path
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+
+
+def client(url, data, headers, count):
+    """
+    Issue `count` requests over one keep-alive connection, returning each
+    one's latency (or None if it failed).
+    """
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=600)
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            connection.request("POST", parts.path, body=data, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            ok = False
+        latencies.append(time.perf_counter() - start if ok else None)
+    connection.close()
+    return latencies
+
+
+def run(url, data, headers, clients, requests):
+    per_client = max(1, requests // clients)
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: client(url, data, headers, per_client), range(clients)))
+        elapsed = time.perf_counter() - start
+    latencies = [latency for result in results for latency in result if latency is not None]
+    failures = sum(latency is None for result in results for latency in result)
+    return len(latencies) / elapsed, latencies, failures
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--url", default="http://localhost:5000/instances")
+    args.add_argument("--file", default=str(TEST_DIR / "wall-standard-case.ifc"))
+    args.add_argument("--accept", default="text/turtle")
+    args.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    args.add_argument("--clients", default="1,4,16", help="comma separated concurrency levels")
+    args = args.parse_args(argv)
+
+    data = Path(args.file).read_bytes()
+    headers = {"Content-Type": "model/step", "Accept": args.accept,
+               "Content-Location": "http://example.org/model#"}
+
+    # one request to load the service before anything is timed
+    client(args.url, data, headers, 1)
+
+    print("{:>8} {:>10} {:>10} {:>10} {:>10} {:>9}".format("clients", "req/s", "p50 ms", "p99 ms", "max ms", "failures"))
+    for clients in map(int, args.clients.split(",")):
+        rate, latencies, failures = run(args.url, data, headers, clients, args.requests)
+        if not latencies:
+            print("{:8d} {:>10} {:>10} {:>10} {:>10} {:9d}".format(clients, "-", "-", "-", "-", failures))
+            continue
+        print("{:8d} {:10.1f} {:10.1f} {:10.1f} {:10.1f} {:9d}".format(
+            clients, rate, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000,
+            max(latencies) * 1000, failures))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
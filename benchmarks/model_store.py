@@ -0,0 +1,79 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Serving a stored model in each format (from a disk model store: written
+straight from its quads, or its graph loaded and serialized) against
+converting it again.
+
+Each file is stored once: its graph, loaded back, must hold the same
+statements as the converted one (blank nodes aside), and the store's
+size is reported.
+
+    $ python3 -m benchmarks.model_store [file.ifc ...]
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+from collections import Counter
+
+from rdflib import URIRef, BNode, Literal
+
+import parsers
+from conversion import convert, parse_graph, serialize_graph
+from model_store import make_model_store, model_id, STREAMED_FORMATS
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+BASE_URI = URIRef("http://example.org/model#")
+FORMATS = ("text/turtle", "application/n-triples", "application/n-quads", "application/json")
+
+
+def term(node):
+    if isinstance(node, BNode):
+        return None
+    if isinstance(node, Literal):
+        return str(node), node.datatype, node.language
+    return node
+
+
+def statements(graph):
+    return Counter(tuple(map(term, triple)) for triple in graph)
+
+
+def main(*paths):
+    paths = paths or [TEST_DIR / "01.ifc", TEST_DIR / "duplex.ifc"]
+    convert((TEST_DIR / "wall-standard-case.ifc").read_bytes(), "model/step", "text/turtle", BASE_URI)
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_model_store("disk", 1024, 0, directory)
+        print("{name:16} {status:>6} {format:>22} {stored:>10} {convert_s:>10} {served_s:>10}".format(
+            name="file", status="parity", format="format", stored="stored", convert_s="convert s",
+            served_s="served s"))
+        for path in paths:
+            data = Path(path).read_bytes()
+            graph = parse_graph(data, "model/step", "text/turtle", BASE_URI)
+            key = model_id(data, "model/step", str(BASE_URI), ())
+            store.put(key, graph)
+            model = store.get(key)
+            same = statements(graph) == statements(store.load(model, "text/turtle"))
+            failures += not same
+            for output_format in FORMATS:
+                start = time.perf_counter()
+                convert(data, "model/step", output_format, BASE_URI)
+                convert_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                if output_format in STREAMED_FORMATS:
+                    "".join(store.stream(store.get(key), output_format))
+                else:
+                    serialize_graph(store.load(store.get(key), output_format), output_format)
+                served_seconds = time.perf_counter() - start
+                print("{name:16} {status:>6} {format:>22} {:10d} {:10.2f} {:10.2f}".format(
+                    len(model.content), convert_seconds, served_seconds, name=Path(path).name, format=output_format,
+                    status="ok" if same else "FAIL"))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
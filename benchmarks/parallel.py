@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Scaling of parallel N-Triples conversion over 1 to N worker processes,
+against the serial LineStream, on test/duplex.ifc enlarged by repeating
+its entities (renumbered) `copies` times.
+
+Every run must write the same statements as the serial one (the same
+lines, but for blank node labels, and as many blank nodes).
+
+    $ python3 -m benchmarks.parallel [copies] [max workers]
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import parsers
+from parsers.step.parallel import ParallelStream
+from parsers.step.streaming import LineStream
+from parsers.step.references import data_section
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+BASE_URI = "http://example.org/model#"
+FORMAT = "application/n-triples"
+BNODE = re.compile(r"_:\S+")
+
+
+def enlarge(data, copies):
+    """
+    `data` with the records of its data section `copies` times, each copy
+    referring to its own entities.
+    """
+    start = data_section(data) + len(b"DATA;")
+    end = data.rindex(b"ENDSEC;")
+    records = data[start:end]
+    offset = max(int(ref) for ref in re.findall(rb"#(\d+)", records)) + 1
+    copied = [re.sub(rb"#(\d+)", lambda match: b"#%d" % (int(match[1]) + i * offset), records)
+              for i in range(copies)]
+    return data[:start] + b"".join(copied) + data[end:]
+
+
+def statements(text):
+    lines = text.splitlines()
+    return sorted(line for line in lines if "_:" not in line), len(set(BNODE.findall(text)))
+
+
+def timed(stream):
+    start = time.perf_counter()
+    text = "".join(stream)
+    return text, time.perf_counter() - start
+
+
+def main(copies=8, max_workers=None):
+    copies, max_workers = int(copies), int(max_workers or os.cpu_count() or 1)
+    data = enlarge((TEST_DIR / "duplex.ifc").read_bytes(), copies)
+    serial, serial_seconds = timed(LineStream(data, BASE_URI, FORMAT))
+    expected = statements(serial)
+    failures = 0
+    print("duplex.ifc x{copies}: {size:.1f} MB, {lines} triples, serial {seconds:.2f} s ({cpus} CPUs)".format(
+        copies=copies, size=len(data) / 1024 / 1024, lines=serial.count("\n"), seconds=serial_seconds,
+        cpus=os.cpu_count()))
+    print("{workers:>8} {status:>6} {seconds:>8} {speedup:>8}".format(
+        workers="workers", status="parity", seconds="s", speedup="speedup"))
+    for workers in range(1, max_workers + 1):
+        text, seconds = timed(ParallelStream(data, BASE_URI, FORMAT, workers=workers))
+        same = statements(text) == expected
+        failures += not same
+        print("{:8d} {status:>6} {:8.2f} {:8.2f}".format(workers, seconds, serial_seconds / seconds,
+                                                          status="ok" if same else "FAIL"))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
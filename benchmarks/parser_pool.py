@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Per-request parser construction overhead, with and without the parser pool.
+
+Both sides parse with SCL's PLY parser, so only construction differs: the
+pool here is built with an SCLParser factory rather than the service's
+default backend (benchmarks/cparser.py compares the backends).
+
+    $ python3 -m benchmarks.parser_pool [file.ifc] [iterations]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from parsers.step.pool import ParserPool
+from parsers.step.SCL.Part21 import Parser as SCLParser
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+
+
+def per_request_fresh(data, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        SCLParser().parse(data)
+    return (time.perf_counter() - start) / iterations
+
+
+def per_request_pooled(data, iterations):
+    start = time.perf_counter()
+    pool = ParserPool(size=1, factory=SCLParser).warm()
+    warm = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with pool.parser() as parser:
+            parser.parse(data)
+    return warm, (time.perf_counter() - start) / iterations
+
+
+def main(path=TEST_DIR / "tiny.1.ifc", iterations=200):
+    data = Path(path).read_text()
+    fresh = per_request_fresh(data, iterations)
+    warm, pooled = per_request_pooled(data, iterations)
+    print("file:                    {}".format(Path(path).name))
+    print("iterations:              {}".format(iterations))
+    print("pool warm-up (once):     {:8.3f} ms".format(warm * 1000))
+    print("per request, fresh:      {:8.3f} ms".format(fresh * 1000))
+    print("per request, pooled:     {:8.3f} ms".format(pooled * 1000))
+    print("construction overhead:   {:8.3f} ms saved per request".format((fresh - pooled) * 1000))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *map(int, sys.argv[2:3]))
@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Conversion time of a model cut down to some entities (by GlobalId, and
+those they refer to) against the whole model.
+
+For each file, the first storey, space and wall are selected in turn: the
+selected entities must have the same statements as in the whole model.
+
+    $ python3 -m benchmarks.select [file.ifc ...]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from collections import Counter
+
+from rdflib import URIRef, BNode, Literal, RDF
+
+import parsers
+from conversion import convert, make_graph
+from parsers.step.references import ReferenceIndex, select
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+BASE_URI = URIRef("http://example.org/model#")
+TYPES = ("IFCBUILDINGSTOREY", "IFCSPACE", "IFCWALLSTANDARDCASE")
+
+
+def parse(data):
+    graph = make_graph("application/n-triples", BASE_URI)
+    graph.parse(data=data, format="model/step")
+    return graph
+
+
+def value(graph, node):
+    if isinstance(node, Literal):
+        return float(node.value) if isinstance(node.value, (int, float)) else node.value
+    if isinstance(node, BNode):
+        if (node, RDF.value, None) in graph:
+            return value(graph, graph.value(node, RDF.value))
+        items = []
+        while node is not None and node != RDF.nil and (node, RDF.first, None) in graph:
+            items.append(value(graph, graph.value(node, RDF.first)))
+            node = graph.value(node, RDF.rest)
+        return tuple(items)
+    return node
+
+
+def values(graph, subjects):
+    return Counter((s, p, value(graph, o)) for s, p, o in graph if s in subjects)
+
+
+def timed(data):
+    start = time.perf_counter()
+    content, _ = convert(data, "model/step", "application/n-triples", BASE_URI)
+    return content.count(b"\n"), time.perf_counter() - start
+
+
+def main(*paths):
+    paths = paths or [TEST_DIR / "01.ifc", TEST_DIR / "duplex.ifc"]
+    parse((TEST_DIR / "wall-standard-case.ifc").read_bytes())      # load the parser and schema
+    failures = 0
+    print("{name:16} {type:>20} {status:>6} {triples:>10} {selected:>10} {seconds:>8} {selected_s:>10}".format(
+        name="file", type="seed", status="parity", triples="triples", selected="selected", seconds="s",
+        selected_s="selected s"))
+    for path in paths:
+        data = Path(path).read_bytes()
+        whole = parse(data)
+        triples, seconds = timed(data)
+        for type_name in TYPES:
+            match = re.search(rb"#\d+\s*=\s*" + type_name.encode("ascii") + rb"\s*\(\s*'([^']*)'", data)
+            if match is None:
+                continue
+            start = time.perf_counter()
+            selected = select(data, [match[1].decode("ascii")])
+            selected_triples, _ = timed(selected)
+            selected_seconds = time.perf_counter() - start
+            subjects = {URIRef("#{id}".format(id=id_), base=BASE_URI) for id_ in ReferenceIndex(selected).types}
+            same = values(whole, subjects) == values(parse(selected), subjects)
+            failures += not same
+            print("{name:16} {type:>20} {status:>6} {:10d} {:10d} {:8.2f} {:10.2f}".format(
+                triples, selected_triples, seconds, selected_seconds, name=Path(path).name, type=type_name,
+                status="ok" if same else "FAIL"))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,85 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Memory and time of conversions into the compact store against rdflib's
+Memory store.
+
+Each file is parsed into a graph in each store: the graphs must hold the
+same triples (blank nodes aside). Then the memory each graph takes (as
+traced by tracemalloc, in a separate run), and the time it takes to parse
+and to serialize as Turtle and N-Triples, are reported.
+
+    $ python3 -m benchmarks.store [file.ifc ...]
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from collections import Counter
+
+from rdflib import ConjunctiveGraph, URIRef, BNode
+
+import parsers
+import stores
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+STORES = ("default", "compact")
+
+
+def parse(data, store):
+    graph = ConjunctiveGraph(store=store, identifier=URIRef("http://example.org/model#"))
+    graph.parse(data=data, format="model/step")
+    return graph
+
+
+def masked(graph):
+    return Counter(tuple(None if isinstance(term, BNode) else term for term in triple) for triple in graph)
+
+
+def footprint(data, store):
+    tracemalloc.start()
+    try:
+        graph = parse(data, store)
+        return tracemalloc.get_traced_memory()[0], len(graph)
+    finally:
+        tracemalloc.stop()
+
+
+def timings(data, store):
+    start = time.perf_counter()
+    graph = parse(data, store)
+    parsed = time.perf_counter()
+    graph.serialize(format="turtle")
+    turtle = time.perf_counter()
+    graph.serialize(format="nt")
+    return parsed - start, turtle - parsed, time.perf_counter() - turtle
+
+
+def main(*paths):
+    paths = paths or [TEST_DIR / "01.ifc", TEST_DIR / "duplex.ifc"]
+    parse((TEST_DIR / "wall-standard-case.ifc").read_bytes(), "default")    # load the parser and schema
+    failures = 0
+    for path in paths:
+        data = Path(path).read_bytes()
+        expected, actual = (masked(parse(data, store)) for store in STORES)
+        failures += expected != actual
+        print("{status:4}  {name}".format(status="FAIL" if expected != actual else "ok", name=Path(path).name))
+
+    print()
+    print("{name:16} {store:8} {triples:>8} {mb:>8} {b:>9} {parse:>8} {turtle:>8} {nt:>8}".format(
+        name="file", store="store", triples="triples", mb="MB", b="B/triple", parse="parse s", turtle="ttl s",
+        nt="nt s"))
+    for path in paths:
+        data = Path(path).read_bytes()
+        for store in STORES:
+            size, triples = footprint(data, store)
+            print("{name:16} {store:8} {triples:8d} {mb:8.1f} {b:9.0f} {:8.2f} {:8.2f} {:8.2f}".format(
+                *timings(data, store), name=Path(path).name, store=store, triples=triples, mb=size / 1e6,
+                b=size / triples))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Parity and speed of the one-pass Turtle writer (text/turtle) against
+rdflib's Turtle serializer (turtle).
+
+Each file is converted, written by both, and the one-pass writer's output
+read back: it must hold the same triples as the graph (blank nodes aside,
+and decimals compared by value, as Turtle doesn't keep their lexical form).
+
+    $ python3 -m benchmarks.turtle [file.ifc ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+from collections import Counter
+
+from rdflib import Graph, URIRef, BNode, Literal, XSD
+
+import parsers
+import serializers
+from conversion import make_graph
+
+TEST_DIR = Path(__file__).resolve().parent.parent / "test"
+SERIALIZERS = ("turtle", "text/turtle")
+
+
+def parse(data):
+    graph = make_graph("text/turtle", URIRef("http://example.org/model#"))
+    graph.parse(data=data, format="model/step")
+    return graph
+
+
+def key(term):
+    if isinstance(term, BNode):
+        return None
+    if isinstance(term, Literal):
+        value = float(term.value) if term.datatype == XSD.decimal else term.value
+        return str(term) if value is None else value, term.datatype, term.language
+    return term
+
+
+def masked(graph):
+    return Counter(tuple(key(term) for term in triple) for triple in graph)
+
+
+def main(*paths):
+    paths = paths or [TEST_DIR / "01.ifc", TEST_DIR / "duplex.ifc"]
+    parse((TEST_DIR / "wall-standard-case.ifc").read_bytes())     # load the parser and schema
+    failures = 0
+    print("{name:16} {triples:>8} {status:>6} {rdflib:>9} {ours:>9} {kb:>9}".format(
+        name="file", triples="triples", status="parity", rdflib="turtle s", ours="text/ttl s", kb="KB"))
+    for path in paths:
+        graph = parse(Path(path).read_bytes())
+        times = []
+        for format in SERIALIZERS:
+            start = time.perf_counter()
+            output = graph.serialize(format=format, encoding="utf-8")
+            times.append(time.perf_counter() - start)
+        same = masked(graph) == masked(Graph().parse(data=output, format="turtle"))
+        failures += not same
+        print("{name:16} {triples:8d} {status:>6} {:9.2f} {:9.2f} {kb:9.0f}".format(
+            *times, name=Path(path).name, triples=len(graph), status="ok" if same else "FAIL",
+            kb=len(output) / 1e3))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
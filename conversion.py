@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+import os
+
+from rdflib import ConjunctiveGraph, Graph, DCTERMS
+from rdflib.parser import InputSource
+
+import parsers
+import stores
+import serializers
+from parsers.step.streaming import LineStream, STREAMING_FORMATS
+from parsers.step.enrichers import native_profiles
+from profiles import enrich_graph
+
+STORE = os.environ.get("IFCLD_STORE", "default")
+# formats that name the graph their triples are in
+QUAD_FORMATS = ("application/n-quads", "application/trig", "application/trix")
+# stores to keep plain graphs in instead: those that don't track contexts
+TRIPLE_STORES = {"default": "SimpleMemory"}
+
+
+class ConversionError(Exception):
+    """
+    A conversion that failed, with the HTTP status it should be reported as.
+    """
+    def __init__(self, message, status=422):
+        super().__init__(message, status)
+        self.message = message
+        self.status = status
+
+    def __str__(self):
+        return self.message
+
+
+def get_ifc_version_uri(graph):
+    for value in graph.objects(predicate=DCTERMS.conformsTo):
+        if str(value).startswith("http://ifc-ld.org/schemas/"):
+            return value
+
+
+def is_streamable(input_format, output_format, acceptable_profiles):
+    """
+    Line-based output of a STEP model, enriched (if at all) only with
+    profiles applied as it is converted, needs no graph.
+    """
+    return input_format == "model/step" and output_format in STREAMING_FORMATS \
+        and len(native_profiles(acceptable_profiles or ())) == len(acceptable_profiles or ())
+
+
+def make_graph(output_format, base_uri, store=STORE, input_format="model/step"):
+    """
+    A graph to parse `input_format` into for `output_format`: a plain
+    Graph, which skips the bookkeeping of which context each triple is in,
+    for STEP input to a format that doesn't keep the graph's name, and a
+    ConjunctiveGraph otherwise (quad input needs a context-aware store,
+    whatever it is written as).
+    """
+    if output_format in QUAD_FORMATS or input_format != "model/step":
+        return ConjunctiveGraph(store=store, identifier=base_uri)
+    return Graph(store=TRIPLE_STORES.get(store, store), identifier=base_uri)
+
+
+def convert(data, input_format, output_format, base_uri, acceptable_profiles=None, store=STORE):
+    """
+    Parse `data`, enrich it with whichever of `acceptable_profiles` are
+    supported, and serialize it. Returns the serialized content and the
+    set of profiles (the IFC version included) it conforms to. The graph
+    is kept in `store`, an rdflib store plugin's name.
+    """
+    if is_streamable(input_format, output_format, acceptable_profiles):
+        try:
+            stream = LineStream(data, base_uri, output_format, acceptable_profiles or ())
+            return "".join(stream).encode("utf-8"), stream.content_profiles
+        except Exception:
+            raise ConversionError("Unable to parse input.")
+
+    g = parse_graph(data, input_format, output_format, base_uri, acceptable_profiles, store)
+    return serialize_graph(g, output_format, acceptable_profiles)
+
+
+def parse_graph(data, input_format, output_format, base_uri, acceptable_profiles=None, store=STORE):
+    """
+    Parse `data` into a graph for `output_format`, kept in `store`. Those
+    of `acceptable_profiles` applied natively are applied as STEP input
+    is converted.
+    """
+    g = make_graph(output_format, base_uri, store, input_format)
+
+    try:
+        if input_format == "model/step":
+            g.parse(**parse_input(data), format=input_format, profiles=acceptable_profiles or ())
+        else:
+            g.parse(**parse_input(data), format=input_format)
+    except Exception:
+        raise ConversionError("Unable to parse input.")
+    return g
+
+
+def parse_input(data):
+    """
+    Graph.parse arguments for `data`. rdflib takes only str and bytes as
+    `data`: a buffer (a memory-mapped upload, see uploads.py) is the byte
+    stream of an InputSource instead, which the STEP parser parses in place
+    and others read from.
+    """
+    if isinstance(data, (str, bytes)):
+        return {"data": data}
+    source = InputSource()
+    source.setByteStream(data)
+    return {"source": source}
+
+
+def serialize_graph(g, output_format, acceptable_profiles=None):
+    """
+    Enrich `g` with whichever of `acceptable_profiles` are supported (and
+    not applied yet), and serialize it. Returns the serialized content and
+    the set of profiles (the IFC version included) it conforms to.
+    """
+    ifc_version = get_ifc_version_uri(g)
+    content_profiles = set([ifc_version])
+    if acceptable_profiles:
+        content_profiles = content_profiles.union(enrich_graph(g, acceptable_profiles, ifc_version))
+
+    try:
+        return g.serialize(format=output_format, encoding="utf-8"), content_profiles
+    except Exception:
+        raise ConversionError("Serialization failure. This is likely a bug.", 500)
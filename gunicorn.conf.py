@@ -0,0 +1,49 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Production server configuration, read by gunicorn from the working directory:
+
+    $ gunicorn service:app
+
+The app is imported, and its input-independent state (schema artifacts,
+dispatch tables, parser tables, rdflib plugins) loaded, once in the master.
+Workers are forked from it and share that memory copy-on-write.
+
+Send the master HUP to gracefully replace its workers (without reloading
+preloaded code; restart the master for that), TTIN/TTOU to add or remove one.
+"""
+
+import os
+import gc
+
+bind = os.environ.get("IFCLD_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("IFCLD_WORKERS", os.cpu_count() or 1))
+threads = int(os.environ.get("IFCLD_THREADS", 4))
+worker_class = "gthread"
+
+# conversions of large models are slow; the job API is the way around this
+timeout = int(os.environ.get("IFCLD_TIMEOUT", 300))
+graceful_timeout = int(os.environ.get("IFCLD_GRACEFUL_TIMEOUT", 60))
+
+# recycle workers now and then, in case of slow leaks
+max_requests = int(os.environ.get("IFCLD_MAX_REQUESTS", 1000))
+max_requests_jitter = max_requests // 10
+
+preload_app = True
+accesslog = "-"
+
+
+def on_starting(server):
+    from service import preload
+    preload()
+    # keep the preloaded objects out of the collector, so that collections
+    # in the workers don't touch (and so copy) their pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # each worker's own pool of parallel conversion processes (a pool can't
+    # be shared by forked processes), started before it takes requests
+    from parsers.step.parallel import start_executor
+    start_executor()
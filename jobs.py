@@ -0,0 +1,404 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Asynchronous conversion jobs.
+
+Conversions submitted as jobs run in a pool of worker processes, so a few
+large models can't hold up the request threads (or the GIL) that serve
+small interactive ones. Each job runs under a time and an address space
+limit; queued jobs are cancelled before they start, running ones by
+signalling their worker. Finished results are kept for a while for the
+client to collect.
+
+Worker processes are started by a forkserver, a single-threaded process of
+its own, rather than forked from the server process: a server's request
+threads may hold locks (logging's, the parser pool's, the schema store's)
+that a forked child would inherit held and wait on forever.
+
+Job records and results live in a JobStore directory rather than in
+memory, so that any of the server's processes can answer for any job. A
+large upload is kept there too, until its worker maps it: a worker is sent
+the path of a file to convert (see uploads.FileInput), and the entities
+to select from it, rather than a copy of the model.
+"""
+
+import os
+import json
+import uuid
+import time
+import signal
+import logging
+import resource
+import tempfile
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+
+from conversion import convert, ConversionError
+from uploads import FileInput, read_input
+from parsers.step.references import select
+from parsers.step.errors import UnknownEntityError
+
+logger = logging.getLogger(__name__)
+
+JOB_DIR = os.environ.get("IFCLD_JOB_DIR", os.path.join(tempfile.gettempdir(), "ifcld-jobs"))
+JOB_WORKERS = int(os.environ.get("IFCLD_JOB_WORKERS", os.cpu_count() or 2))
+JOB_QUEUE_DEPTH = int(os.environ.get("IFCLD_JOB_QUEUE_DEPTH", 16))
+JOB_TIME_LIMIT = int(os.environ.get("IFCLD_JOB_TIME_LIMIT", 600))
+JOB_MEMORY_LIMIT = int(os.environ.get("IFCLD_JOB_MEMORY_LIMIT", 4096))
+JOB_RESULT_TTL = int(os.environ.get("IFCLD_JOB_RESULT_TTL", 3600))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, output_format, id=None, status=QUEUED, content_profiles=(), error=None,
+                 http_status=None, created=None, finished=None, owner=None, pid=None):
+        self.id = id if id else str(uuid.uuid4())
+        self.status = status
+        self.output_format = output_format
+        self.content_profiles = list(content_profiles)
+        self.error = error
+        self.http_status = http_status
+        self.created = created if created else time.time()
+        self.finished = finished
+        self.owner = owner              # the server process that accepted the job
+        self.pid = pid                  # the pool process running it
+
+    def describe(self):
+        description = {"id": self.id, "status": self.status}
+        if self.error:
+            description["error"] = self.error
+        return description
+
+
+class JobStore:
+    """
+    One JSON record per job, its result alongside, and a marker file for
+    each job that has been asked to stop. Records are replaced atomically.
+    """
+    def __init__(self, directory=JOB_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, job_id, suffix):
+        # ids come from URLs; only ever touch files named after a uuid
+        return self.directory / (str(uuid.UUID(job_id)) + suffix)
+
+    def _write(self, path, content):
+        tmp = path.with_name("{}.{}.tmp".format(path.name, os.getpid()))
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+
+    def save(self, job):
+        self._write(self._path(job.id, ".json"), json.dumps(vars(job)).encode("utf-8"))
+
+    def load(self, job_id):
+        try:
+            return Job(**json.loads(self._path(job_id, ".json").read_bytes()))
+        except (ValueError, OSError):
+            return None
+
+    def save_result(self, job_id, content):
+        self._write(self._path(job_id, ".result"), content)
+
+    def result(self, job_id):
+        return self._path(job_id, ".result").read_bytes()
+
+    def request_cancel(self, job_id):
+        self._path(job_id, ".cancel").touch()
+
+    def cancel_requested(self, job_id):
+        return self._path(job_id, ".cancel").exists()
+
+    def jobs(self):
+        for path in self.directory.glob("*.json"):
+            job = self.load(path.stem)
+            if job is not None:
+                yield job
+
+    def input_path(self, job_id):
+        return self._path(job_id, ".input")
+
+    def delete(self, job_id):
+        for suffix in (".json", ".result", ".cancel", ".input"):
+            try:
+                self._path(job_id, suffix).unlink()
+            except FileNotFoundError:
+                pass
+
+
+"""
+Worker process side. A worker runs one job at a time; `_current_job` is
+only set while it does, so a late cancellation signal can't break the
+worker's own loop. The conversion may catch (and rewrap) the exception a
+signal raises, so the interruption is also remembered in `_interrupted`.
+"""
+_store = None
+_current_job = None
+_interrupted = None
+
+
+def _interrupt(exception):
+    global _interrupted
+    _interrupted = exception
+    raise exception()
+
+
+def _on_cancel(signum, frame):
+    # the signal may be meant for a job this worker has since finished
+    if _current_job is not None and _store.cancel_requested(_current_job):
+        _interrupt(JobCancelled)
+
+
+def _on_alarm(signum, frame):
+    if _current_job is not None:
+        _interrupt(JobTimeout)
+
+
+def _init_worker(store_directory):
+    global _store
+    _store = JobStore(store_directory)
+    signal.signal(signal.SIGUSR1, _on_cancel)
+    signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _address_space():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        return 0
+
+
+def _limit_memory(memory_limit):
+    """
+    Allow the job `memory_limit` MB of address space on top of what the
+    worker already holds, which earlier jobs may have left it with.
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = _address_space() + memory_limit * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+    return soft
+
+
+def _caused_by(exception, type):
+    while exception is not None:
+        if isinstance(exception, type):
+            return True
+        exception = exception.__context__
+    return False
+
+
+def run_job(job_id, time_limit, memory_limit, data, seeds, *args):
+    """
+    Convert `data` (mapped first, if it is a FileInput), cut down to the
+    entities `seeds` if any, writing the result straight to the store
+    rather than sending it back through the pool. Returns the result's
+    content profiles.
+    """
+    global _current_job, _interrupted
+    job = _store.load(job_id)
+    job.status, job.pid = RUNNING, os.getpid()
+    _store.save(job)
+    _current_job, _interrupted = job_id, None
+    soft_memory_limit = None
+    try:
+        if _store.cancel_requested(job_id):
+            raise JobCancelled()
+        # mapped before the limit is set: the model's pages aren't the conversion's to count
+        data = read_input(data)
+        if memory_limit:
+            soft_memory_limit = _limit_memory(memory_limit)
+        if time_limit:
+            signal.alarm(time_limit)
+        if seeds:
+            try:
+                data = select(data, seeds)
+            except UnknownEntityError as e:
+                raise ConversionError(str(e), 422)
+        content, content_profiles = convert(data, *args)
+        _store.save_result(job_id, content)
+        return [str(profile) for profile in content_profiles if profile]
+    except BaseException as e:
+        if _interrupted is not None:
+            raise _interrupted() from None
+        if _caused_by(e, MemoryError):
+            # sent back without its (large) traceback, which may not fit either
+            raise MemoryError() from None
+        raise
+    finally:
+        signal.alarm(0)
+        _current_job = None
+        if soft_memory_limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (soft_memory_limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class JobManager:
+    """
+    Hands jobs to a ProcessPoolExecutor and keeps their records in a JobStore.
+
+    At most `queue_depth` jobs may be queued or running at once (across
+    every process sharing the store); beyond that submit() raises QueueFull
+    rather than letting the backlog (and the uploads it holds) grow without
+    bound.
+    """
+    def __init__(self, store=None, workers=JOB_WORKERS, queue_depth=JOB_QUEUE_DEPTH, time_limit=JOB_TIME_LIMIT,
+                 memory_limit=JOB_MEMORY_LIMIT, result_ttl=JOB_RESULT_TTL):
+        self.store = store if store else JobStore()
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.result_ttl = result_ttl
+        self.futures = {}
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver"),
+                                   initializer=_init_worker, initargs=(str(self.store.directory),))
+
+    def submit(self, data, input_format, output_format, base_uri, acceptable_profiles=None, seeds=None):
+        """
+        Queue the conversion of `data`: bytes, or a FileInput (a temporary
+        one is moved into the store, and removed if it isn't queued).
+        """
+        with self._lock:
+            if sum(1 for job in self._sweep() if job.status in ACTIVE) >= self.queue_depth:
+                if isinstance(data, FileInput) and data.temporary:
+                    os.unlink(data.path)
+                raise QueueFull()
+            job = Job(output_format, owner=os.getpid())
+            self.store.save(job)
+            if isinstance(data, FileInput) and data.temporary:
+                path = str(self.store.input_path(job.id))
+                os.replace(data.path, path)
+                data = data._replace(path=path)
+            args = (job.id, self.time_limit, self.memory_limit, data, seeds, input_format, output_format,
+                    base_uri, acceptable_profiles)
+            try:
+                future = self._executor.submit(run_job, *args)
+            except BrokenProcessPool:
+                self._executor = self._new_executor()
+                future = self._executor.submit(run_job, *args)
+            self.futures[job.id] = future
+        future.add_done_callback(lambda future: self._finished(job.id, future))
+        return job
+
+    def get(self, job_id):
+        job = self.store.load(job_id)
+        if job is not None and job.status in ACTIVE and not _alive(job.owner):
+            # the process that accepted it is gone, and so is anyone to finish it
+            job.status, job.error, job.http_status = FAILED, "Conversion worker terminated.", 500
+            job.finished = time.time()
+            self.store.save(job)
+        return job
+
+    def result(self, job_id):
+        return self.store.result(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. A queued job is dropped when it would have started
+        (at once, if it was submitted to this process); a running one is
+        interrupted and reported cancelled once its worker has stopped.
+        """
+        job = self.get(job_id)
+        if job is None or job.status not in ACTIVE:
+            return job
+        self.store.request_cancel(job_id)
+        future = self.futures.get(job_id)
+        if future is not None and future.cancel():
+            return job
+        job = self.store.load(job_id)
+        if job.status == RUNNING and job.pid:
+            try:
+                os.kill(job.pid, signal.SIGUSR1)
+            except ProcessLookupError:
+                pass
+        return job
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finished(self, job_id, future):
+        with self._lock:
+            self.futures.pop(job_id, None)
+        # left over if the job stopped before its worker mapped it
+        self.store.input_path(job_id).unlink(missing_ok=True)
+        job = self.store.load(job_id)
+        job.finished = time.time()
+        job.pid = None
+        job.status = FAILED
+        try:
+            job.content_profiles = future.result()
+            job.status = DONE
+        except (CancelledError, JobCancelled):
+            job.status = CANCELLED
+        except ConversionError as e:
+            job.error, job.http_status = e.message, e.status
+        except JobTimeout:
+            job.error, job.http_status = "Time limit of {}s exceeded.".format(self.time_limit), 500
+        except MemoryError:
+            job.error, job.http_status = "Memory limit of {}MB exceeded.".format(self.memory_limit), 500
+        except BrokenProcessPool:
+            # a worker died (e.g. killed by the OOM killer); submit() replaces the pool
+            job.error, job.http_status = "Conversion worker terminated.", 500
+        except Exception:
+            logger.exception("Job %s failed", job_id)
+            job.error, job.http_status = "Conversion failure. This is likely a bug.", 500
+        self.store.save(job)
+
+    def _sweep(self):
+        """
+        Every live job record, after deleting those that have expired.
+        """
+        deadline = time.time() - self.result_ttl
+        for job in self.store.jobs():
+            if job.finished and job.finished < deadline:
+                self.store.delete(job.id)
+            else:
+                yield job
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """
+    The process's JobManager, created on first use so that importing this
+    module (e.g. in a server's master process) doesn't start workers.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
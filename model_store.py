@@ -0,0 +1,166 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Converted models, kept so they can be served again in any format.
+
+A model is stored under an id derived from what it was converted from:
+a hash of the request body, its format, its base URI and the profiles
+applied as it was converted (the others are applied as it is served).
+The graph is kept in the binary RDF format (see parsers/binary.py), so it
+is loaded again without converting the model (or, for N-Triples, N-Quads
+and IFC-LD JSON-LD, written straight from its quads). Models are immutable, so
+an ETag of a model's id, format and profiles names one representation.
+"""
+
+import os
+import hashlib
+import logging
+import tempfile
+from io import BytesIO
+from collections import namedtuple
+
+from rdflib import URIRef, Literal, DCTERMS
+from rdflib.plugins.serializers.nt import _quoteLiteral
+
+from conversion import make_graph, STORE
+from result_cache import MemoryBackend, DiskBackend
+from parsers.binary import read_quads
+from parsers.step.streaming import CHUNK_SIZE
+from parsers.step.jsonld import JSONLDSink
+
+logger = logging.getLogger(__name__)
+
+MODEL_STORE = os.environ.get("IFCLD_MODEL_STORE", "disk")
+MODEL_STORE_SIZE = int(os.environ.get("IFCLD_MODEL_STORE_SIZE", 1024))
+MODEL_STORE_MEMORY = int(os.environ.get("IFCLD_MODEL_STORE_MEMORY", 64))
+MODEL_STORE_DIR = os.environ.get("IFCLD_MODEL_STORE_DIR", os.path.join(tempfile.gettempdir(), "ifcld-models"))
+MODEL_FORMAT = "application/x-ifcld-rdf"
+STREAMED_FORMATS = ("application/n-triples", "application/n-quads", "application/json")
+
+StoredModel = namedtuple("StoredModel", ["content", "content_profiles", "etag", "base_uri"])
+
+
+def model_id(data, input_format, base_uri, native_profiles):
+    """
+    The id of the model converted from `data`, with `base_uri` (or the
+    default, "") and `native_profiles` applied as it was converted.
+    """
+    parts = [hashlib.sha256(data).hexdigest(), input_format, base_uri or "", ",".join(sorted(set(native_profiles)))]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def model_etag(model, output_format, content_profiles):
+    """
+    The ETag of `model` served as `output_format`, conforming to
+    `content_profiles` (those its Content-Profile reports, not all that
+    were asked for).
+    """
+    parts = [model.etag, output_format, ",".join(sorted(set(str(profile) for profile in content_profiles)))]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class ModelStore:
+    """
+    Models in `backend`, and those most recently used in `memory` too
+    (a faster backend, if any).
+    """
+    def __init__(self, backend, memory=None):
+        self.backend = backend
+        self.memory = memory
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_id):
+        model = self.memory.get(model_id) if self.memory is not None else None
+        if model is None:
+            model = self.backend.get(model_id)
+            if model is not None and self.memory is not None:
+                self.memory.put(model_id, model)
+        if model is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return model
+
+    def put(self, model_id, graph):
+        """
+        Store `graph` as the model `model_id`. Returns the StoredModel.
+        """
+        content_profiles = sorted(str(profile) for profile in graph.objects(graph.identifier, DCTERMS.conformsTo))
+        model = StoredModel(graph.serialize(format=MODEL_FORMAT, encoding="utf-8"), content_profiles, model_id,
+                            str(graph.identifier))
+        for backend in (self.memory, self.backend):
+            if backend is not None:
+                try:
+                    backend.put(model_id, model)
+                except OSError as e:
+                    logger.warning("Unable to store model: {}".format(e))
+        return model
+
+    def load(self, model, output_format, store=STORE):
+        """
+        The graph of `model`, for `output_format`, kept in `store`.
+        """
+        graph = make_graph(output_format, URIRef(model.base_uri), store, MODEL_FORMAT)
+        graph.parse(data=model.content, format=MODEL_FORMAT)
+        return graph
+
+    def stream(self, model, output_format, chunk_size=CHUNK_SIZE):
+        """
+        `model` in one of STREAMED_FORMATS, written from its quads rather
+        than from a graph: N-Triples/N-Quads as they are read, in chunks of
+        roughly `chunk_size` characters; IFC-LD JSON-LD once all are.
+        """
+        if output_format == "application/json":
+            namespaces = {}
+            quads = [quad for block in read_quads(BytesIO(model.content), namespaces=namespaces) for quad in block]
+            sink = JSONLDSink(model.base_uri)
+            for prefix, namespace in namespaces.items():
+                sink.bind(prefix, namespace)
+            # in one batch, so that every blank node with one referrer is nested
+            sink.addN(quads)
+            yield sink.end()
+            return
+        named = output_format == "application/n-quads"
+        default = URIRef(model.base_uri).n3()
+        lines, size = [], 0
+        for quads in read_quads(BytesIO(model.content), nt_term):
+            for s, p, o, g in quads:
+                if named:
+                    # each in its own graph; the default graph is named by the model's base URI
+                    lines.append("%s %s %s %s .\n" % (s, p, o, g or default))
+                else:
+                    lines.append("%s %s %s .\n" % (s, p, o))
+                size += len(lines[-1])
+                if size >= chunk_size:
+                    yield "".join(lines)
+                    lines, size = [], 0
+        yield "".join(lines)
+
+
+def nt_term(term):
+    """
+    How `term` is written in N-Triples (and N-Quads).
+    """
+    return _quoteLiteral(term) if isinstance(term, Literal) else term.n3()
+
+
+def make_model_store(kind=MODEL_STORE, size=MODEL_STORE_SIZE, memory_size=MODEL_STORE_MEMORY,
+                     directory=MODEL_STORE_DIR):
+    """
+    A ModelStore with `kind` ("memory" or "disk") backend holding up to
+    `size` MB of models (a "disk" one with up to `memory_size` MB of them
+    in memory as well), or None if `kind` is empty or `size` is 0.
+    """
+    if not kind or not size:
+        return None
+    if kind == "memory":
+        return ModelStore(MemoryBackend(size * 1024 * 1024))
+    if kind == "disk":
+        memory = MemoryBackend(memory_size * 1024 * 1024) if memory_size else None
+        return ModelStore(DiskBackend(directory, size * 1024 * 1024, record=StoredModel), memory)
+    raise ValueError("Unknown model store backend {kind}".format(kind=kind))
+
+
+model_store = make_model_store()
@@ -19,3 +19,9 @@ register(
     "STEPParser",
 )
 
+register(
+    "application/x-ifcld-rdf",
+    Parser,
+    "parsers.binary",
+    "BinaryParser",
+)
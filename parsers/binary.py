@@ -0,0 +1,186 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+A compact binary RDF format (application/x-ifcld-rdf), and its reader.
+
+A file is a header (MAGIC, a version byte and a flags byte) followed by
+blocks, each a kind byte, its payload's length (a little-endian uint32)
+and its payload, zlib-compressed if the header's COMPRESSED flag is set:
+
+- NAMESPACES: lines of "prefix namespace", UTF-8.
+- TERMS: terms added to the dictionary, numbered on from those before
+  (from 1; 0 stands for no term). A uint32 count n, then n kind bytes
+  (IRI, BNODE, LITERAL, LANGUAGE_LITERAL), n uint32 extras (a literal's
+  datatype term, or its language tag's length, else 0), n uint32 lengths
+  (in characters) and the terms' text (a tag and then the literal's
+  lexical form, for a language-tagged literal), UTF-8.
+- QUADS: uint32 subject, predicate, object and graph terms, four per quad.
+  The graph is 0 for the default graph.
+
+Terms come in a TERMS block before the QUADS blocks that refer to them,
+so a file can be written, and read, a block at a time.
+"""
+
+# Standard Library
+import sys
+import zlib
+import struct
+from array import array
+
+# External Dependencies
+from rdflib import URIRef, BNode, Literal, Graph, ConjunctiveGraph
+from rdflib.parser import Parser, InputSource
+
+# Internal Dependencies
+from .step.errors import MalformedInputError
+
+MAGIC = b"IFCLDRDF"
+VERSION = 1
+COMPRESSED = 1                              # header flag
+NAMESPACES, TERMS, QUADS = b"N", b"T", b"Q"
+IRI, BNODE, LITERAL, LANGUAGE_LITERAL = b"U"[0], b"B"[0], b"L"[0], b"G"[0]
+HEADER = struct.Struct("<8sBB")
+BLOCK = struct.Struct("<cI")
+COUNT = struct.Struct("<I")
+
+
+def uint32s(data=b""):
+    """
+    A uint32 array of `data` (little-endian).
+    """
+    values = array("I" if array("I").itemsize == 4 else "L")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def to_bytes(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def read_blocks(stream):
+    """
+    The kind and payload of each block in `stream`, decompressed.
+    """
+    header = stream.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise MalformedInputError("Unable to parse input.")
+    magic, version, flags = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise MalformedInputError("Unable to parse input.")
+    while True:
+        block = stream.read(BLOCK.size)
+        if not block:
+            return
+        if len(block) != BLOCK.size:
+            raise MalformedInputError("Unable to parse input.")
+        kind, length = BLOCK.unpack(block)
+        payload = stream.read(length)
+        if len(payload) != length:
+            raise MalformedInputError("Unable to parse input.")
+        yield kind, zlib.decompress(payload) if flags & COMPRESSED else payload
+
+
+def read_terms(payload, terms, bnodes):
+    """
+    Add the terms of a TERMS block to `terms`, blank nodes made fresh
+    by label (in `bnodes`).
+    """
+    (count,) = COUNT.unpack_from(payload)
+    offset = COUNT.size
+    kinds = payload[offset:offset + count]
+    offset += count
+    extras = uint32s(payload[offset:offset + 4 * count])
+    offset += 4 * count
+    lengths = uint32s(payload[offset:offset + 4 * count])
+    offset += 4 * count
+    text = payload[offset:].decode("utf-8", "surrogatepass")
+    if len(kinds) != count or len(lengths) != count:
+        raise ValueError("truncated terms block")
+    start = 0
+    for kind, extra, length in zip(kinds, extras, lengths):
+        end = start + length
+        if kind == IRI:
+            terms.append(URIRef(text[start:end]))
+        elif kind == LITERAL:
+            # as written: not normalized, as rdflib does to parsed literals by default
+            terms.append(Literal(text[start:end], datatype=terms[extra] if extra else None, normalize=False))
+        elif kind == BNODE:
+            label = text[start:end]
+            bnode = bnodes.get(label)
+            if bnode is None:
+                bnode = bnodes[label] = BNode()
+            terms.append(bnode)
+        elif kind == LANGUAGE_LITERAL:
+            terms.append(Literal(text[start + extra:end], lang=text[start:start + extra]))
+        else:
+            raise ValueError("unknown term kind")
+        start = end
+
+
+def read_quads(stream, convert=None, namespaces=None):
+    """
+    The quads in `stream`, a list per block: (subject, predicate, object,
+    graph), the graph None for the default graph. If `convert` is given,
+    it is applied to each term (once), and the quads hold what it returns.
+    The namespaces bound go to `namespaces` (prefix: namespace), if given.
+    """
+    terms = [None]
+    bnodes = {}
+    converted = [None] if convert is not None else terms
+    try:
+        for kind, payload in read_blocks(stream):
+            if kind == TERMS:
+                start = len(terms)
+                read_terms(payload, terms, bnodes)
+                if convert is not None:
+                    converted.extend(map(convert, terms[start:]))
+            elif kind == QUADS:
+                ids = uint32s(payload)
+                yield [(converted[ids[i]], converted[ids[i + 1]], converted[ids[i + 2]], converted[ids[i + 3]])
+                       for i in range(0, len(ids) - 3, 4)]
+            elif kind == NAMESPACES and namespaces is not None:
+                for line in payload.decode("utf-8").splitlines():
+                    prefix, _, namespace = line.partition(" ")
+                    namespaces[prefix] = URIRef(namespace)
+    except (zlib.error, struct.error, IndexError, UnicodeDecodeError, ValueError):
+        raise MalformedInputError("Unable to parse input.")
+
+
+class BinaryParser(Parser):
+    def parse(self, source: InputSource, sink: Graph, **kwargs):
+        """
+        Quads in a named graph go to that graph of `sink`'s store if it is
+        context-aware, and to `sink` otherwise.
+        """
+        terms = [None]
+        bnodes = {}                         # label: BNode, fresh for this parse
+        graphs = {0: sink}
+        if sink.store.context_aware:
+            sink = ConjunctiveGraph(store=sink.store, identifier=sink.identifier)
+        try:
+            for kind, payload in read_blocks(source.getByteStream()):
+                if kind == TERMS:
+                    read_terms(payload, terms, bnodes)
+                elif kind == QUADS:
+                    sink.addN(self._quads(payload, terms, graphs, sink))
+                elif kind == NAMESPACES:
+                    for line in payload.decode("utf-8").splitlines():
+                        prefix, _, namespace = line.partition(" ")
+                        sink.bind(prefix, URIRef(namespace), override=False)
+        except (zlib.error, struct.error, IndexError, UnicodeDecodeError, ValueError):
+            raise MalformedInputError("Unable to parse input.")
+
+    def _quads(self, payload, terms, graphs, sink):
+        ids = uint32s(payload)
+        for i in range(0, len(ids) - 3, 4):
+            graph = graphs.get(ids[i + 3])
+            if graph is None:
+                identifier = terms[ids[i + 3]]
+                graph = graphs[ids[i + 3]] = sink.get_context(identifier) if sink.context_aware else sink
+            yield terms[ids[i]], terms[ids[i + 1]], terms[ids[i + 2]], graph
@@ -687,9 +687,8 @@ yy37:
 	if (yych <= '[') {
 		if (yych <= 0x001F) goto yy25;
 		if (yych <= 'Z') goto yy62;
-		goto yy25;
+		goto yy62;
 	} else {
-		if (yych == ']') goto yy25;
 		if (yych <= '~') goto yy62;
 		goto yy25;
 	}
@@ -815,10 +814,10 @@ yy62:
 		if (yych != '\'') goto yy61;
 	} else {
 		if (yych <= '\\') {
-			if (yych <= '[') goto yy57;
+			if (yych <= '[') goto yy61;
 			goto yy65;
 		} else {
-			if (yych <= ']') goto yy57;
+			if (yych <= ']') goto yy61;
 			if (yych <= '~') goto yy61;
 			goto yy57;
 		}
@@ -981,9 +980,8 @@ yy92:
 	if (yych <= '[') {
 		if (yych <= 0x001F) goto yy57;
 		if (yych <= 'Z') goto yy61;
-		goto yy57;
+		goto yy61;
 	} else {
-		if (yych == ']') goto yy57;
 		if (yych <= '~') goto yy61;
 		goto yy57;
 	}
@@ -3069,9 +3067,8 @@ yy485:
 	if (yych <= '[') {
 		if (yych <= 0x001F) goto yy473;
 		if (yych <= 'Z') goto yy506;
-		goto yy473;
+		goto yy506;
 	} else {
-		if (yych == ']') goto yy473;
 		if (yych <= '~') goto yy506;
 		goto yy473;
 	}
@@ -3176,10 +3173,10 @@ yy506:
 		if (yych != '\'') goto yy505;
 	} else {
 		if (yych <= '\\') {
-			if (yych <= '[') goto yy501;
+			if (yych <= '[') goto yy505;
 			goto yy509;
 		} else {
-			if (yych <= ']') goto yy501;
+			if (yych <= ']') goto yy505;
 			if (yych <= '~') goto yy505;
 			goto yy501;
 		}
@@ -3307,9 +3304,8 @@ yy528:
 	if (yych <= '[') {
 		if (yych <= 0x001F) goto yy501;
 		if (yych <= 'Z') goto yy505;
-		goto yy501;
+		goto yy505;
 	} else {
-		if (yych == ']') goto yy501;
 		if (yych <= '~') goto yy505;
 		goto yy501;
 	}
@@ -3767,9 +3763,8 @@ yya585:
 	if (yych <= '[') {
 		if (yych <= 0x001F) goto yya573;
 		if (yych <= 'Z') goto yya606;
-		goto yya573;
+		goto yya606;
 	} else {
-		if (yych == ']') goto yya573;
 		if (yych <= '~') goto yya606;
 		goto yya573;
 	}
@@ -3874,10 +3869,10 @@ yya606:
 		if (yych != '\'') goto yya605;
 	} else {
 		if (yych <= '\\') {
-			if (yych <= '[') goto yya601;
+			if (yych <= '[') goto yya605;
 			goto yya609;
 		} else {
-			if (yych <= ']') goto yya601;
+			if (yych <= ']') goto yya605;
 			if (yych <= '~') goto yya605;
 			goto yya601;
 		}
@@ -4005,9 +4000,8 @@ yya628:
 	if (yych <= '[') {
 		if (yych <= 0x001F) goto yya601;
 		if (yych <= 'Z') goto yya605;
-		goto yya601;
+		goto yya605;
 	} else {
-		if (yych == ']') goto yya601;
 		if (yych <= '~') goto yya605;
 		goto yya601;
 	}
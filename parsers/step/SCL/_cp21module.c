@@ -0,0 +1,390 @@
+/*
+ * SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+ * SPDX-License-Identifier: AGPL-3.0
+ *
+ * CPython binding for the re2c generated Part21 parser in _cPart21.c.
+ *
+ * _cp21.parse(data, callback, typed_parameter) parses a complete exchange
+ * file held in a bytes-like object and reports it through `callback`:
+ *
+ *   callback('H', type_name, params)          header entity
+ *   callback('D',)                            start of a DATA section
+ *   callback('S', ref, type_name, params)     simple entity instance
+ *   callback('C', ref, [(type_name, params)]) complex entity instance
+ *
+ * Parameters come out as the same Python values SCL.Part21.Parser builds:
+ * int, float, str (strings without their quotes, enumerations, references,
+ * '$' and '*'), lists, and `typed_parameter(type_name, param)` instances.
+ *
+ * The GIL is released while the parser lexes, and only held for callbacks.
+ * Errors in the input raise SyntaxError; exceptions raised by the callback
+ * abort the parse and propagate.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <setjmp.h>
+
+typedef struct Context_ Context;
+static _Thread_local Context *cp21_current = NULL;
+static void cp21_abort(int code);
+
+/*
+ * _cPart21.c treats every failure as fatal; unwind to parse() instead.
+ * Its diagnostics go to stderr, which in a service nobody reads; the
+ * failure is reported as a SyntaxError.
+ */
+#define exit(code) cp21_abort(code)
+#define fprintf(stream, ...) ((void)0)
+#define main _cPart21_main
+#include "_cPart21.c"
+#undef main
+#undef fprintf
+#undef exit
+
+struct Context_ {
+    PyObject *callback;
+    PyObject *typed_parameter;
+    PyThreadState *tstate;
+    int syntax_error;
+    int callback_error;
+    jmp_buf abort;
+};
+
+static void cp21_abort(int code)
+{
+    Context *ctx = cp21_current;
+    ctx->syntax_error = 1;
+    longjmp(ctx->abort, 1);
+}
+
+static void release_gil(Context *ctx) { ctx->tstate = PyEval_SaveThread(); }
+static void acquire_gil(Context *ctx) { PyEval_RestoreThread(ctx->tstate); }
+
+static const char *sym_text(P21Parser *p, Symbol *s)
+{
+    return (const char *)p->in->basemrk + s->offset;
+}
+
+static PyObject *build_keyword(P21Parser *p, Symbol *s)
+{
+    PyObject *kw = PyUnicode_DecodeUTF8(sym_text(p, s), s->n, "strict");
+    PyObject *upper;
+    if (!kw)
+        return NULL;
+    upper = PyObject_CallMethod(kw, "upper", NULL);
+    Py_DECREF(kw);
+    return upper;
+}
+
+static PyObject *build_variant(P21Parser *p, Symbol *s)
+{
+    const char *text = sym_text(p, s);
+    PyObject *str, *value;
+
+    switch (s->vtype) {
+    case V_STRING:
+        return PyUnicode_DecodeUTF8(text + 1, s->n - 2, "strict");
+    case V_REAL:
+        str = PyUnicode_DecodeUTF8(text, s->n, "strict");
+        if (!str)
+            return NULL;
+        value = PyFloat_FromString(str);
+        Py_DECREF(str);
+        return value;
+    case V_INTEGER:
+        str = PyUnicode_DecodeUTF8(text, s->n, "strict");
+        if (!str)
+            return NULL;
+        value = PyLong_FromUnicodeObject(str, 10);
+        Py_DECREF(str);
+        return value;
+    case V_BINARY:
+        str = PyUnicode_DecodeUTF8(text + 2, s->n - 3, "strict");
+        if (!str)
+            return NULL;
+        value = PyLong_FromUnicodeObject(str, 16);
+        Py_DECREF(str);
+        if (!value) {
+            PyErr_Clear();
+            Py_RETURN_NONE;
+        }
+        return value;
+    default: /* enumerations, references, '$' and '*' stay as written */
+        return PyUnicode_DecodeUTF8(text, s->n, "strict");
+    }
+}
+
+/* one parameter starting at items[*i]; leaves *i just past it */
+static PyObject *build_parameter(Context *ctx, P21Parser *p, Symbol *items, int *i, int end)
+{
+    Symbol *s = items + *i;
+    PyObject *value, *inner, *kw;
+
+    if (*i >= end)
+        goto err;
+
+    switch (s->token) {
+    case T_VARIANT:
+        ++*i;
+        return build_variant(p, s);
+
+    case T_KEYWORD: /* KEYWORD '(' parameter ')' */
+        if (*i + 1 >= end || items[*i + 1].token != '(')
+            goto err;
+        kw = build_keyword(p, s);
+        if (!kw)
+            return NULL;
+        *i += 2;
+        inner = build_parameter(ctx, p, items, i, end);
+        if (!inner) {
+            Py_DECREF(kw);
+            return NULL;
+        }
+        if (*i >= end || items[*i].token != ')') {
+            Py_DECREF(kw);
+            Py_DECREF(inner);
+            goto err;
+        }
+        ++*i;
+        value = PyObject_CallFunctionObjArgs(ctx->typed_parameter, kw, inner, NULL);
+        Py_DECREF(kw);
+        Py_DECREF(inner);
+        return value;
+
+    case '(': /* '(' [parameter (',' parameter)*] ')' */
+        value = PyList_New(0);
+        if (!value)
+            return NULL;
+        ++*i;
+        while (*i < end && items[*i].token != ')') {
+            inner = build_parameter(ctx, p, items, i, end);
+            if (!inner || PyList_Append(value, inner) < 0) {
+                Py_XDECREF(inner);
+                Py_DECREF(value);
+                return NULL;
+            }
+            Py_DECREF(inner);
+            if (*i < end && items[*i].token == ',')
+                ++*i;
+        }
+        if (*i >= end) {
+            Py_DECREF(value);
+            goto err;
+        }
+        ++*i;
+        return value;
+    }
+
+err:
+    PyErr_SetString(PyExc_SyntaxError, "malformed parameter list");
+    return NULL;
+}
+
+/* KEYWORD '(' ... ')' at items[*i] as a (type_name, params) tuple */
+static PyObject *build_record(Context *ctx, P21Parser *p, Symbol *items, int *i, int end)
+{
+    PyObject *kw, *params, *record;
+
+    if (*i + 1 >= end || items[*i].token != T_KEYWORD || items[*i + 1].token != '(') {
+        PyErr_SetString(PyExc_SyntaxError, "malformed record");
+        return NULL;
+    }
+    kw = build_keyword(p, items + *i);
+    if (!kw)
+        return NULL;
+    ++*i;
+    params = build_parameter(ctx, p, items, i, end);
+    if (!params) {
+        Py_DECREF(kw);
+        return NULL;
+    }
+    record = PyTuple_Pack(2, kw, params);
+    Py_DECREF(kw);
+    Py_DECREF(params);
+    return record;
+}
+
+static void report(Context *ctx, PyObject *args)
+{
+    PyObject *result;
+    if (args) {
+        result = PyObject_CallObject(ctx->callback, args);
+        Py_DECREF(args);
+        Py_XDECREF(result);
+        if (result)
+            return;
+    }
+    ctx->callback_error = 1;
+}
+
+static void finish(Context *ctx, P21Parser *p)
+{
+    p->hold = false;
+    if (ctx->callback_error) {
+        release_gil(ctx);
+        longjmp(ctx->abort, 1);
+    }
+    release_gil(ctx);
+}
+
+static void on_hold(P21Parser *p, int bsp, void *d)
+{
+    /* keep parameter symbols on the stack until the enclosing entity is reported */
+    p->hold = true;
+}
+
+static void on_header_entity(P21Parser *p, int bsp, void *d)
+{
+    Context *ctx = d;
+    Symbol *items = p->stack->items;
+    int i = bsp, end = p->stack->idx_top;
+    PyObject *record;
+
+    acquire_gil(ctx);
+    record = build_record(ctx, p, items, &i, end);
+    report(ctx, record ? Py_BuildValue("(sNN)", "H",
+                                       PySequence_GetItem(record, 0),
+                                       PySequence_GetItem(record, 1)) : NULL);
+    Py_XDECREF(record);
+    finish(ctx, p);
+}
+
+static void on_data_start(P21Parser *p, int bsp, void *d)
+{
+    Context *ctx = d;
+    acquire_gil(ctx);
+    report(ctx, Py_BuildValue("(s)", "D"));
+    finish(ctx, p);
+}
+
+static void on_simple_entity(P21Parser *p, int bsp, void *d)
+{
+    Context *ctx = d;
+    Symbol *items = p->stack->items;
+    int i = bsp + 2, end = p->stack->idx_top;
+    PyObject *ref, *record;
+
+    acquire_gil(ctx);
+    ref = PyUnicode_DecodeUTF8(sym_text(p, items + bsp), items[bsp].n, "strict");
+    record = ref ? build_record(ctx, p, items, &i, end) : NULL;
+    report(ctx, record ? Py_BuildValue("(sONN)", "S", ref,
+                                       PySequence_GetItem(record, 0),
+                                       PySequence_GetItem(record, 1)) : NULL);
+    Py_XDECREF(ref);
+    Py_XDECREF(record);
+    finish(ctx, p);
+}
+
+static void on_complex_entity(P21Parser *p, int bsp, void *d)
+{
+    Context *ctx = d;
+    Symbol *items = p->stack->items;
+    int i = bsp + 3, end = p->stack->idx_top;
+    PyObject *ref, *records, *record;
+
+    acquire_gil(ctx);
+    ref = PyUnicode_DecodeUTF8(sym_text(p, items + bsp), items[bsp].n, "strict");
+    records = ref ? PyList_New(0) : NULL;
+    while (records && i < end && items[i].token == T_KEYWORD) {
+        record = build_record(ctx, p, items, &i, end);
+        if (!record || PyList_Append(records, record) < 0) {
+            Py_XDECREF(record);
+            Py_CLEAR(records);
+            break;
+        }
+        Py_DECREF(record);
+    }
+    report(ctx, records ? Py_BuildValue("(sOO)", "C", ref, records) : NULL);
+    Py_XDECREF(ref);
+    Py_XDECREF(records);
+    finish(ctx, p);
+}
+
+static void on_error(P21Parser *p, int bsp, uint8_t cxt)
+{
+    Context *ctx = cp21_current;
+    ctx->syntax_error = 1;
+    longjmp(ctx->abort, 1);
+}
+
+static void free_parser(P21Parser *p)
+{
+    if (p->in) {
+        free(p->in->buf);
+        free(p->in);
+    }
+    if (p->stack) {
+        free(p->stack->items);
+        free(p->stack);
+    }
+}
+
+static PyObject *cp21_parse(PyObject *self, PyObject *args)
+{
+    Py_buffer data;
+    Context ctx = {0};
+    P21Parser p = {0};
+    P21ParserActions act = {
+        .userdata = &ctx,
+        .error_cb = on_error,
+        .header_entity_cb = on_header_entity,
+        .data_start_cb = on_data_start,
+        .simple_entity_instance_cb = on_simple_entity,
+        .complex_entity_instance_cb = on_complex_entity,
+        .parameter_list_cb = on_hold,
+        .parameter_cb = on_hold,
+        .simple_record_list_cb = on_hold,
+        .simple_record_cb = on_hold,
+    };
+    Context *outer = cp21_current;
+    FILE *file;
+
+    if (!PyArg_ParseTuple(args, "y*OO", &data, &ctx.callback, &ctx.typed_parameter))
+        return NULL;
+
+    file = fmemopen(data.buf, data.len ? data.len : 1, "rb");
+    if (!file) {
+        PyBuffer_Release(&data);
+        return PyErr_SetFromErrno(PyExc_OSError);
+    }
+
+    cp21_current = &ctx;
+    release_gil(&ctx);
+    if (!setjmp(ctx.abort)) {
+        p21_init(&p, file);
+        p21_parse(&p, &act);
+    }
+    acquire_gil(&ctx);
+    cp21_current = outer;
+
+    fclose(file);
+    free_parser(&p);
+    PyBuffer_Release(&data);
+
+    if (ctx.callback_error)
+        return NULL;
+    if (ctx.syntax_error || p.error) {
+        PyErr_SetString(PyExc_SyntaxError, "Unable to parse Part21 exchange structure");
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef cp21_methods[] = {
+    {"parse", cp21_parse, METH_VARARGS, "parse(data, callback, typed_parameter)"},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef cp21_module = {
+    PyModuleDef_HEAD_INIT, "_cp21", NULL, -1, cp21_methods
+};
+
+PyMODINIT_FUNC PyInit__cp21(void)
+{
+    debug = 0;
+    return PyModule_Create(&cp21_module);
+}
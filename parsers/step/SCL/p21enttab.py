@@ -0,0 +1,77 @@
+
+# p21enttab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = "entity_instanceBINARY DATA ENDSEC ENTITY_INSTANCE_NAME ENUMERATION HEADER_SEC INTEGER PART21_END PART21_START REAL STANDARD_KEYWORD STRING USER_DEFINED_KEYWORDexchange_file : check_p21_start_token header_section data_section_list check_p21_end_tokenextract_header : check_p21_start_token header_section DATAcheck_p21_start_token : PART21_STARTcheck_p21_end_token : PART21_ENDheader_section : HEADER_SEC header_entity header_entity header_entity ENDSECheader_section : HEADER_SEC header_entity header_entity header_entity header_entity_list ENDSECheader_entity : keyword '(' parameter_list ')' ';'check_entity_instance_name : ENTITY_INSTANCE_NAMEsimple_entity_instance : check_entity_instance_name '=' simple_record ';'entity_instance  : check_entity_instance_name '=' error ';'complex_entity_instance : check_entity_instance_name '=' subsuper_record ';'subsuper_record : '(' simple_record_list ')'data_section_list : data_sectiondata_section_list : data_section_list data_sectionheader_entity_list : header_entityheader_entity_list : header_entity_list header_entityparameter_list : parameterparameter_list : parameter_list ',' parameterkeyword : USER_DEFINED_KEYWORD\n                   | STANDARD_KEYWORDparameter : STRING\n                     | INTEGER\n                     | REAL\n                     | ENTITY_INSTANCE_NAME\n                     | ENUMERATION\n                     | BINARY\n                     | '*'\n                     | '$'\n                     | typed_parameter\n                     | list_parameterlist_parameter : '(' parameter_list ')'typed_parameter : keyword '(' parameter ')'parameter : '(' ')'data_start : DATA '(' parameter_list ')' ';'data_start : DATA '(' ')' ';'\n                      | DATA ';'data_section : data_start entity_instance_list ENDSECentity_instance_list : entity_instanceentity_instance_list : entity_instance_list entity_instanceentity_instance_list : emptyentity_instance : simple_entity_instance\n                           | complex_entity_instancesimple_record : keyword '(' ')'simple_record : keyword '(' parameter_list ')'simple_record_list : simple_recordsimple_record_list : simple_record_list simple_recordempty :"
+    
+_lr_action_items = {'ENTITY_INSTANCE_NAME':([0,17,21,37,41,],[5,28,28,28,28,]),'$end':([1,3,4,14,15,16,],[0,-41,-42,-10,-9,-11,]),'=':([2,5,],[6,-8,]),'error':([6,],[7,]),'(':([6,10,12,13,17,20,21,37,41,],[11,17,-19,-20,21,37,21,21,21,]),'USER_DEFINED_KEYWORD':([6,11,17,18,19,21,22,36,37,40,41,],[12,12,12,12,-45,12,-43,-46,12,-44,12,]),'STANDARD_KEYWORD':([6,11,17,18,19,21,22,36,37,40,41,],[13,13,13,13,-45,13,-43,-46,13,-44,13,]),';':([7,8,9,22,35,40,],[14,15,16,-43,-12,-44,]),')':([17,18,19,21,22,23,24,25,26,27,28,29,30,31,32,33,34,36,38,39,40,42,43,44,45,],[22,35,-45,38,-43,40,-17,-21,-22,-23,-24,-25,-26,-27,-28,-29,-30,-46,-33,43,-44,45,-31,-18,-32,]),'STRING':([17,21,37,41,],[25,25,25,25,]),'INTEGER':([17,21,37,41,],[26,26,26,26,]),'REAL':([17,21,37,41,],[27,27,27,27,]),'ENUMERATION':([17,21,37,41,],[29,29,29,29,]),'BINARY':([17,21,37,41,],[30,30,30,30,]),'*':([17,21,37,41,],[31,31,31,31,]),'$':([17,21,37,41,],[32,32,32,32,]),',':([23,24,25,26,27,28,29,30,31,32,33,34,38,39,43,44,45,],[41,-17,-21,-22,-23,-24,-25,-26,-27,-28,-29,-30,-33,41,-31,-18,-32,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'entity_instance':([0,],[1,]),'check_entity_instance_name':([0,],[2,]),'simple_entity_instance':([0,],[3,]),'complex_entity_instance':([0,],[4,]),'simple_record':([6,11,18,],[8,19,36,]),'subsuper_record':([6,],[9,]),'keyword':([6,11,17,18,21,37,41,],[10,10,20,10,20,20,20,]),'simple_record_list':([11,],[18,]),'parameter_list':([17,21,],[23,39,]),'parameter':([17,21,37,41,],[24,24,42,44,]),'typed_parameter':([17,21,37,41,],[33,33,33,33,]),'list_parameter':([17,21,37,41,],[34,34,34,34,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> entity_instance","S'",1,None,None,None),
+  ('exchange_file -> check_p21_start_token header_section data_section_list check_p21_end_token','exchange_file',4,'p_exchange_file','Part21.py',278),
+  ('extract_header -> check_p21_start_token header_section DATA','extract_header',3,'p_extract_header','Part21.py',282),
+  ('check_p21_start_token -> PART21_START','check_p21_start_token',1,'p_check_start_token','Part21.py',288),
+  ('check_p21_end_token -> PART21_END','check_p21_end_token',1,'p_check_end_token','Part21.py',293),
+  ('header_section -> HEADER_SEC header_entity header_entity header_entity ENDSEC','header_section',5,'p_header_section','Part21.py',299),
+  ('header_section -> HEADER_SEC header_entity header_entity header_entity header_entity_list ENDSEC','header_section',6,'p_header_section_with_entity_list','Part21.py',303),
+  ('header_entity -> keyword ( parameter_list ) ;','header_entity',5,'p_header_entity','Part21.py',308),
+  ('check_entity_instance_name -> ENTITY_INSTANCE_NAME','check_entity_instance_name',1,'p_check_entity_instance_name','Part21.py',312),
+  ('simple_entity_instance -> check_entity_instance_name = simple_record ;','simple_entity_instance',4,'p_simple_entity_instance','Part21.py',321),
+  ('entity_instance -> check_entity_instance_name = error ;','entity_instance',4,'p_entity_instance_error','Part21.py',325),
+  ('complex_entity_instance -> check_entity_instance_name = subsuper_record ;','complex_entity_instance',4,'p_complex_entity_instance','Part21.py',329),
+  ('subsuper_record -> ( simple_record_list )','subsuper_record',3,'p_subsuper_record','Part21.py',333),
+  ('data_section_list -> data_section','data_section_list',1,'p_data_section_list_init','Part21.py',337),
+  ('data_section_list -> data_section_list data_section','data_section_list',2,'p_data_section_list','Part21.py',341),
+  ('header_entity_list -> header_entity','header_entity_list',1,'p_header_entity_list_init','Part21.py',346),
+  ('header_entity_list -> header_entity_list header_entity','header_entity_list',2,'p_header_entity_list','Part21.py',350),
+  ('parameter_list -> parameter','parameter_list',1,'p_parameter_list_init','Part21.py',355),
+  ('parameter_list -> parameter_list , parameter','parameter_list',3,'p_parameter_list','Part21.py',359),
+  ('keyword -> USER_DEFINED_KEYWORD','keyword',1,'p_keyword','Part21.py',364),
+  ('keyword -> STANDARD_KEYWORD','keyword',1,'p_keyword','Part21.py',365),
+  ('parameter -> STRING','parameter',1,'p_parameter_simple','Part21.py',369),
+  ('parameter -> INTEGER','parameter',1,'p_parameter_simple','Part21.py',370),
+  ('parameter -> REAL','parameter',1,'p_parameter_simple','Part21.py',371),
+  ('parameter -> ENTITY_INSTANCE_NAME','parameter',1,'p_parameter_simple','Part21.py',372),
+  ('parameter -> ENUMERATION','parameter',1,'p_parameter_simple','Part21.py',373),
+  ('parameter -> BINARY','parameter',1,'p_parameter_simple','Part21.py',374),
+  ('parameter -> *','parameter',1,'p_parameter_simple','Part21.py',375),
+  ('parameter -> $','parameter',1,'p_parameter_simple','Part21.py',376),
+  ('parameter -> typed_parameter','parameter',1,'p_parameter_simple','Part21.py',377),
+  ('parameter -> list_parameter','parameter',1,'p_parameter_simple','Part21.py',378),
+  ('list_parameter -> ( parameter_list )','list_parameter',3,'p_list_parameter','Part21.py',382),
+  ('typed_parameter -> keyword ( parameter )','typed_parameter',4,'p_typed_parameter','Part21.py',386),
+  ('parameter -> ( )','parameter',2,'p_parameter_empty_list','Part21.py',390),
+  ('data_start -> DATA ( parameter_list ) ;','data_start',5,'p_data_start','Part21.py',394),
+  ('data_start -> DATA ( ) ;','data_start',4,'p_data_start_empty','Part21.py',398),
+  ('data_start -> DATA ;','data_start',2,'p_data_start_empty','Part21.py',399),
+  ('data_section -> data_start entity_instance_list ENDSEC','data_section',3,'p_data_section','Part21.py',403),
+  ('entity_instance_list -> entity_instance','entity_instance_list',1,'p_entity_instance_list_init','Part21.py',407),
+  ('entity_instance_list -> entity_instance_list entity_instance','entity_instance_list',2,'p_entity_instance_list','Part21.py',411),
+  ('entity_instance_list -> empty','entity_instance_list',1,'p_entity_instance_list_empty','Part21.py',416),
+  ('entity_instance -> simple_entity_instance','entity_instance',1,'p_entity_instance','Part21.py',420),
+  ('entity_instance -> complex_entity_instance','entity_instance',1,'p_entity_instance','Part21.py',421),
+  ('simple_record -> keyword ( )','simple_record',3,'p_simple_record_empty','Part21.py',426),
+  ('simple_record -> keyword ( parameter_list )','simple_record',4,'p_simple_record_with_params','Part21.py',430),
+  ('simple_record_list -> simple_record','simple_record_list',1,'p_simple_record_list_init','Part21.py',434),
+  ('simple_record_list -> simple_record_list simple_record','simple_record_list',2,'p_simple_record_list','Part21.py',438),
+  ('empty -> <empty>','empty',0,'p_empty','Part21.py',443),
+]
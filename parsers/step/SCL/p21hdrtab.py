@@ -0,0 +1,77 @@
+
+# p21hdrtab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = "extract_headerBINARY DATA ENDSEC ENTITY_INSTANCE_NAME ENUMERATION HEADER_SEC INTEGER PART21_END PART21_START REAL STANDARD_KEYWORD STRING USER_DEFINED_KEYWORDexchange_file : check_p21_start_token header_section data_section_list check_p21_end_tokenextract_header : check_p21_start_token header_section DATAcheck_p21_start_token : PART21_STARTcheck_p21_end_token : PART21_ENDheader_section : HEADER_SEC header_entity header_entity header_entity ENDSECheader_section : HEADER_SEC header_entity header_entity header_entity header_entity_list ENDSECheader_entity : keyword '(' parameter_list ')' ';'check_entity_instance_name : ENTITY_INSTANCE_NAMEsimple_entity_instance : check_entity_instance_name '=' simple_record ';'entity_instance  : check_entity_instance_name '=' error ';'complex_entity_instance : check_entity_instance_name '=' subsuper_record ';'subsuper_record : '(' simple_record_list ')'data_section_list : data_sectiondata_section_list : data_section_list data_sectionheader_entity_list : header_entityheader_entity_list : header_entity_list header_entityparameter_list : parameterparameter_list : parameter_list ',' parameterkeyword : USER_DEFINED_KEYWORD\n                   | STANDARD_KEYWORDparameter : STRING\n                     | INTEGER\n                     | REAL\n                     | ENTITY_INSTANCE_NAME\n                     | ENUMERATION\n                     | BINARY\n                     | '*'\n                     | '$'\n                     | typed_parameter\n                     | list_parameterlist_parameter : '(' parameter_list ')'typed_parameter : keyword '(' parameter ')'parameter : '(' ')'data_start : DATA '(' parameter_list ')' ';'data_start : DATA '(' ')' ';'\n                      | DATA ';'data_section : data_start entity_instance_list ENDSECentity_instance_list : entity_instanceentity_instance_list : entity_instance_list entity_instanceentity_instance_list : emptyentity_instance : simple_entity_instance\n                           | complex_entity_instancesimple_record : keyword '(' ')'simple_record : keyword '(' parameter_list ')'simple_record_list : simple_recordsimple_record_list : simple_record_list simple_recordempty :"
+    
+_lr_action_items = {'PART21_START':([0,],[3,]),'$end':([1,6,],[0,-2,]),'HEADER_SEC':([2,3,],[5,-3,]),'DATA':([4,29,37,],[6,-5,-6,]),'USER_DEFINED_KEYWORD':([5,7,11,12,13,15,28,30,31,35,36,40,],[9,9,9,9,9,9,-15,9,9,9,-16,-7,]),'STANDARD_KEYWORD':([5,7,11,12,13,15,28,30,31,35,36,40,],[10,10,10,10,10,10,-15,10,10,10,-16,-7,]),'(':([8,9,10,12,14,15,31,35,],[12,-19,-20,15,31,15,15,15,]),'STRING':([12,15,31,35,],[18,18,18,18,]),'INTEGER':([12,15,31,35,],[19,19,19,19,]),'REAL':([12,15,31,35,],[20,20,20,20,]),'ENTITY_INSTANCE_NAME':([12,15,31,35,],[21,21,21,21,]),'ENUMERATION':([12,15,31,35,],[22,22,22,22,]),'BINARY':([12,15,31,35,],[23,23,23,23,]),'*':([12,15,31,35,],[24,24,24,24,]),'$':([12,15,31,35,],[25,25,25,25,]),'ENDSEC':([13,28,30,36,40,],[29,-15,37,-16,-7,]),')':([15,16,17,18,19,20,21,22,23,24,25,26,27,32,33,38,39,41,42,],[32,34,-17,-21,-22,-23,-24,-25,-26,-27,-28,-29,-30,-33,39,42,-31,-18,-32,]),',':([16,17,18,19,20,21,22,23,24,25,26,27,32,33,39,41,42,],[35,-17,-21,-22,-23,-24,-25,-26,-27,-28,-29,-30,-33,35,-31,-18,-32,]),';':([34,],[40,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'extract_header':([0,],[1,]),'check_p21_start_token':([0,],[2,]),'header_section':([2,],[4,]),'header_entity':([5,7,11,13,30,],[7,11,13,28,36,]),'keyword':([5,7,11,12,13,15,30,31,35,],[8,8,8,14,8,14,8,14,14,]),'parameter_list':([12,15,],[16,33,]),'parameter':([12,15,31,35,],[17,17,38,41,]),'typed_parameter':([12,15,31,35,],[26,26,26,26,]),'list_parameter':([12,15,31,35,],[27,27,27,27,]),'header_entity_list':([13,],[30,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> extract_header","S'",1,None,None,None),
+  ('exchange_file -> check_p21_start_token header_section data_section_list check_p21_end_token','exchange_file',4,'p_exchange_file','Part21.py',278),
+  ('extract_header -> check_p21_start_token header_section DATA','extract_header',3,'p_extract_header','Part21.py',282),
+  ('check_p21_start_token -> PART21_START','check_p21_start_token',1,'p_check_start_token','Part21.py',288),
+  ('check_p21_end_token -> PART21_END','check_p21_end_token',1,'p_check_end_token','Part21.py',293),
+  ('header_section -> HEADER_SEC header_entity header_entity header_entity ENDSEC','header_section',5,'p_header_section','Part21.py',299),
+  ('header_section -> HEADER_SEC header_entity header_entity header_entity header_entity_list ENDSEC','header_section',6,'p_header_section_with_entity_list','Part21.py',303),
+  ('header_entity -> keyword ( parameter_list ) ;','header_entity',5,'p_header_entity','Part21.py',308),
+  ('check_entity_instance_name -> ENTITY_INSTANCE_NAME','check_entity_instance_name',1,'p_check_entity_instance_name','Part21.py',312),
+  ('simple_entity_instance -> check_entity_instance_name = simple_record ;','simple_entity_instance',4,'p_simple_entity_instance','Part21.py',321),
+  ('entity_instance -> check_entity_instance_name = error ;','entity_instance',4,'p_entity_instance_error','Part21.py',325),
+  ('complex_entity_instance -> check_entity_instance_name = subsuper_record ;','complex_entity_instance',4,'p_complex_entity_instance','Part21.py',329),
+  ('subsuper_record -> ( simple_record_list )','subsuper_record',3,'p_subsuper_record','Part21.py',333),
+  ('data_section_list -> data_section','data_section_list',1,'p_data_section_list_init','Part21.py',337),
+  ('data_section_list -> data_section_list data_section','data_section_list',2,'p_data_section_list','Part21.py',341),
+  ('header_entity_list -> header_entity','header_entity_list',1,'p_header_entity_list_init','Part21.py',346),
+  ('header_entity_list -> header_entity_list header_entity','header_entity_list',2,'p_header_entity_list','Part21.py',350),
+  ('parameter_list -> parameter','parameter_list',1,'p_parameter_list_init','Part21.py',355),
+  ('parameter_list -> parameter_list , parameter','parameter_list',3,'p_parameter_list','Part21.py',359),
+  ('keyword -> USER_DEFINED_KEYWORD','keyword',1,'p_keyword','Part21.py',364),
+  ('keyword -> STANDARD_KEYWORD','keyword',1,'p_keyword','Part21.py',365),
+  ('parameter -> STRING','parameter',1,'p_parameter_simple','Part21.py',369),
+  ('parameter -> INTEGER','parameter',1,'p_parameter_simple','Part21.py',370),
+  ('parameter -> REAL','parameter',1,'p_parameter_simple','Part21.py',371),
+  ('parameter -> ENTITY_INSTANCE_NAME','parameter',1,'p_parameter_simple','Part21.py',372),
+  ('parameter -> ENUMERATION','parameter',1,'p_parameter_simple','Part21.py',373),
+  ('parameter -> BINARY','parameter',1,'p_parameter_simple','Part21.py',374),
+  ('parameter -> *','parameter',1,'p_parameter_simple','Part21.py',375),
+  ('parameter -> $','parameter',1,'p_parameter_simple','Part21.py',376),
+  ('parameter -> typed_parameter','parameter',1,'p_parameter_simple','Part21.py',377),
+  ('parameter -> list_parameter','parameter',1,'p_parameter_simple','Part21.py',378),
+  ('list_parameter -> ( parameter_list )','list_parameter',3,'p_list_parameter','Part21.py',382),
+  ('typed_parameter -> keyword ( parameter )','typed_parameter',4,'p_typed_parameter','Part21.py',386),
+  ('parameter -> ( )','parameter',2,'p_parameter_empty_list','Part21.py',390),
+  ('data_start -> DATA ( parameter_list ) ;','data_start',5,'p_data_start','Part21.py',394),
+  ('data_start -> DATA ( ) ;','data_start',4,'p_data_start_empty','Part21.py',398),
+  ('data_start -> DATA ;','data_start',2,'p_data_start_empty','Part21.py',399),
+  ('data_section -> data_start entity_instance_list ENDSEC','data_section',3,'p_data_section','Part21.py',403),
+  ('entity_instance_list -> entity_instance','entity_instance_list',1,'p_entity_instance_list_init','Part21.py',407),
+  ('entity_instance_list -> entity_instance_list entity_instance','entity_instance_list',2,'p_entity_instance_list','Part21.py',411),
+  ('entity_instance_list -> empty','entity_instance_list',1,'p_entity_instance_list_empty','Part21.py',416),
+  ('entity_instance -> simple_entity_instance','entity_instance',1,'p_entity_instance','Part21.py',420),
+  ('entity_instance -> complex_entity_instance','entity_instance',1,'p_entity_instance','Part21.py',421),
+  ('simple_record -> keyword ( )','simple_record',3,'p_simple_record_empty','Part21.py',426),
+  ('simple_record -> keyword ( parameter_list )','simple_record',4,'p_simple_record_with_params','Part21.py',430),
+  ('simple_record_list -> simple_record','simple_record_list',1,'p_simple_record_list_init','Part21.py',434),
+  ('simple_record_list -> simple_record_list simple_record','simple_record_list',2,'p_simple_record_list','Part21.py',438),
+  ('empty -> <empty>','empty',0,'p_empty','Part21.py',443),
+]
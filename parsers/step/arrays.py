@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Lists of numbers as single literals.
+
+A list whose items are all integers is an `arr:int64` literal, one whose
+items are all numbers (some of them reals) an `arr:float64` literal. The
+lexical form is the base64 of the values, packed little-endian, 8 bytes
+each. The values are packed in one go, by NumPy if it is installed, by
+the array module otherwise.
+"""
+
+# Standard Library
+import sys
+import base64
+from array import array
+
+# External Dependencies
+from rdflib import Literal, Namespace
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ARR = Namespace("http://ifc-ld.org/arrays#")
+INT64, FLOAT64 = ARR.int64, ARR.float64
+# datatype: (array typecode, NumPy dtype)
+TYPES = {INT64: ("q", "<i8"), FLOAT64: ("d", "<f8")}
+INT64_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def encode(items):
+    """
+    The literal for the list `items`, or None if it isn't a (non-empty)
+    list of numbers.
+    """
+    if not items:
+        return None
+    types = set(map(type, items))
+    if types == {int}:
+        if min(items) < INT64_RANGE[0] or max(items) > INT64_RANGE[1]:
+            return None
+        datatype = INT64
+    elif types <= {int, float}:
+        datatype = FLOAT64
+    else:
+        return None
+    typecode, dtype = TYPES[datatype]
+    if numpy is not None:
+        data = numpy.asarray(items, dtype=dtype).tobytes()
+    else:
+        values = array(typecode, items)
+        if sys.byteorder == "big":
+            values.byteswap()
+        data = values.tobytes()
+    return Literal(base64.b64encode(data).decode("ascii"), datatype=datatype)
+
+
+def decode(literal):
+    """
+    The values of an array literal: a NumPy array if NumPy is installed,
+    an array.array otherwise.
+    """
+    typecode, dtype = TYPES[literal.datatype]
+    data = base64.b64decode(str(literal))
+    if numpy is not None:
+        return numpy.frombuffer(data, dtype=dtype)
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
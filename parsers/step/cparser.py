@@ -0,0 +1,203 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+STEP Part21 parsing with the re2c generated C parser (SCL/_cPart21.c).
+
+SCL/_cp21module.c binds that parser to Python; it lexes and parses
+without the GIL, building the same header, entity and parameter values
+SCL's PLY parser does. CParser runs it on a producer thread, feeding a
+bounded queue, so the P21File it returns can be pulled through lazily
+exactly like IncrementalParser's.
+
+The extension is compiled with
+
+    $ python3 -m parsers.step.cparser build
+
+and needs a C compiler, the Python headers and sqlite3 (which the
+vendored parser links against). Without it, the pool falls back to
+IncrementalParser.
+"""
+
+# Standard Library
+import sys
+import sysconfig
+import threading
+import subprocess
+from pathlib import Path
+from queue import Queue, Full
+
+# Internal Dependencies
+from .SCL.Part21 import (P21File, P21Header, HeaderEntity, Section,
+                         SimpleEntity, ComplexEntity, TypedParameter)
+
+SCL_DIR = Path(__file__).resolve().parent / "SCL"
+BATCH_SIZE = 512
+QUEUE_DEPTH = 4
+
+try:
+    from .SCL import _cp21
+except ImportError:
+    _cp21 = None
+
+
+class _Cancelled(Exception):
+    pass
+
+
+_DATA = object()
+_END = object()
+
+
+class CParser:
+    """
+    A drop-in for IncrementalParser backed by the C parser.
+    """
+    def __init__(self, batch_size=BATCH_SIZE, queue_depth=QUEUE_DEPTH):
+        if _cp21 is None:
+            raise ImportError("The C parser extension is not built (python3 -m parsers.step.cparser build)")
+        self.batch_size = batch_size
+        self.queue_depth = queue_depth
+        self._producer = None
+        self._cancelled = None
+
+    def reset(self):
+        """
+        Stop any producer left running by a file that wasn't read to the end.
+        """
+        if self._producer is not None:
+            self._cancelled.set()
+            self._producer.join()
+        self._producer = None
+        self._cancelled = None
+
+    def parse(self, p21_data):
+        """
+        Returns a P21File whose header is parsed, and whose sections (and
+        each section's entities) are generators that parse on demand.
+        """
+        self.reset()
+        if isinstance(p21_data, str):
+            p21_data = p21_data.encode("utf-8")
+        queue = Queue(maxsize=self.queue_depth)
+        self._cancelled = cancelled = threading.Event()
+        self._producer = threading.Thread(target=self._produce, args=(p21_data, queue, cancelled), daemon=True)
+        self._producer.start()
+
+        items = self._items(queue)
+        headers = []
+        for item in items:
+            if item is _DATA:
+                break
+            if item is _END:
+                raise SyntaxError("Unable to parse the exchange file header")
+            headers.append(item)
+        if len(headers) < 3:
+            raise SyntaxError("Unable to parse the exchange file header")
+        header = P21Header(*headers[:3])
+        header.extra_headers.extend(headers[3:])
+        file = P21File(header, [])
+        file.sections = self._sections(items)
+        return file
+
+    def _produce(self, p21_data, queue, cancelled):
+        batch = []
+        refs = set()
+
+        def put(item):
+            while True:
+                if cancelled.is_set():
+                    raise _Cancelled()
+                try:
+                    return queue.put(item, timeout=0.1)
+                except Full:
+                    pass
+
+        def check(ref):
+            if ref in refs:
+                raise SyntaxError("Duplicate entity instance name {ref}".format(ref=ref))
+            refs.add(ref)
+            return ref
+
+        def callback(kind, *args):
+            if kind == 'S':
+                ref, type_name, params = args
+                item = SimpleEntity(check(ref), type_name, params)
+            elif kind == 'C':
+                ref, records = args
+                item = ComplexEntity(check(ref), [SimpleEntity(None, *record) for record in records])
+            elif kind == 'D':
+                item = _DATA
+            else:
+                item = HeaderEntity(*args)
+            batch.append(item)
+            if len(batch) >= self.batch_size or kind == 'D':
+                put(batch[:])
+                batch.clear()
+
+        try:
+            _cp21.parse(p21_data, callback, TypedParameter)
+            batch.append(_END)
+            put(batch)
+        except _Cancelled:
+            pass
+        except UnicodeDecodeError as e:
+            try:
+                put(SyntaxError("Input is not UTF-8: {e}".format(e=e)))
+            except _Cancelled:
+                pass
+        except Exception as e:
+            try:
+                put(e)
+            except _Cancelled:
+                pass
+
+    def _items(self, queue):
+        while True:
+            batch = queue.get()
+            if isinstance(batch, Exception):
+                raise batch
+            yield from batch
+            if batch and batch[-1] is _END:
+                return
+
+    def _sections(self, items):
+        # the DATA marker opening the first section was consumed with the header
+        end = []
+        while True:
+            section = Section(self._entities(items, end))
+            yield section
+            for _ in section.entities:
+                pass
+            if end[-1] is _END:
+                return
+
+    def _entities(self, items, end):
+        for item in items:
+            if item is _DATA or item is _END:
+                end.append(item)
+                return
+            yield item
+
+
+def build(output_dir=SCL_DIR):
+    """
+    Compile SCL/_cp21module.c into an extension module next to it.
+    """
+    target = Path(output_dir) / ("_cp21" + sysconfig.get_config_var("EXT_SUFFIX"))
+    cc = (sysconfig.get_config_var("CC") or "cc").split()
+    command = cc + [
+        "-O2", "-DNDEBUG", "-fPIC", "-shared", "-w",
+        "-I" + sysconfig.get_paths()["include"],
+        str(SCL_DIR / "_cp21module.c"),
+        "-lsqlite3",
+        "-o", str(target),
+    ]
+    subprocess.run(command, check=True)
+    return target
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["build"]:
+        sys.exit("usage: python3 -m parsers.step.cparser build")
+    print(build())
@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Per-schema attribute dispatch tables.
+
+The offset map and ordered-attribute set come to us as JSON keyed by
+URI strings. Converting an entity only ever needs "what is the predicate
+at offset i of this STEP type, is it ordered, is it the GlobalId", so we
+answer that once per schema and keep the answer.
+"""
+
+# Standard Library
+import threading
+from collections import namedtuple
+
+# External Dependencies
+from rdflib import URIRef
+
+# Internal Dependencies
+from .schema_store import schema_store
+
+Attribute = namedtuple("Attribute", ["predicate", "is_ordered", "is_globalid"])
+EntityDispatch = namedtuple("EntityDispatch", ["type", "attributes"])
+
+
+def compile_dispatch_table(offset_map, ordered_attribute_set):
+    """
+    Map each upper-case STEP type name to its rdf:type URIRef and a
+    tuple of Attributes indexed by parameter offset. Attributes (and
+    their URIRefs) are shared between all the entities that inherit them.
+    """
+    ordered = set(ordered_attribute_set)
+    attributes = {}
+    table = {}
+    for type_uri, attribute_uris in offset_map.items():
+        type_name = type_uri.rsplit("#", 1)[-1].upper()
+        for attribute_uri in attribute_uris:
+            if attribute_uri not in attributes:
+                attributes[attribute_uri] = Attribute(URIRef(attribute_uri),
+                                                      attribute_uri in ordered,
+                                                      attribute_uri.endswith("globalid"))
+        table[type_name] = EntityDispatch(URIRef(type_uri),
+                                          tuple(attributes[uri] for uri in attribute_uris))
+    return table
+
+
+_tables = {}
+_lock = threading.Lock()
+
+def get_dispatch_table(schema_name):
+    """
+    Compiled once per schema, and again only if the schema store has
+    swapped in new artifacts since.
+    """
+    offsets = schema_store.get(schema_name, "offsets").data
+    ordered = schema_store.get(schema_name, "ordered").data
+    with _lock:
+        compiled = _tables.get(schema_name)
+        if compiled is None or compiled[0] is not offsets or compiled[1] is not ordered:
+            compiled = (offsets, ordered, compile_dispatch_table(offsets, ordered))
+            _tables[schema_name] = compiled
+        return compiled[2]
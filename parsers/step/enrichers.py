@@ -0,0 +1,248 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Profiles applied natively, while a STEP file is converted.
+
+An enricher is handed each entity as the IFCLDClient converts it, and
+adds its own triples at the end of the file (relationships may refer
+to entities further on). The graph is then recorded as conforming to
+the enricher's profile (`dcterms:conformsTo`), which is how
+profiles.enrich_graph knows it has nothing left to do for it.
+
+An enricher with a make_list method may instead (or as well) change how
+the entity's lists are converted: the IFCLDClient hands it each list
+first, and makes the usual rdf:List only if it returns None.
+
+An enricher with a skipped method may leave entities out: the
+IFCLDClient hands it the STEP text before the first entity, and doesn't
+convert the entities whose references it returns.
+"""
+
+# External Dependencies
+from rdflib import URIRef, Literal, Namespace, RDF, XSD, DCTERMS
+
+# Internal Dependencies
+from .arrays import ARR, encode
+from .references import ReferenceIndex
+
+BOT = Namespace("https://w3id.org/bot#")
+GEOM = Namespace("http://ifc-ld.org/geometry#")
+
+SITE, BUILDING, STOREY, SPACE, ELEMENT = BOT.Site, BOT.Building, BOT.Storey, BOT.Space, BOT.Element
+ZONES = (SITE, BUILDING, STOREY, SPACE)
+
+# Subtypes of IfcElement across IFC2x3 to IFC4x2, but features (openings,
+# projections and such) and virtual elements, which aren't building parts.
+# IFC2x3's IfcElectricalElement, IfcEquipmentElement and
+# IfcElectricDistributionPoint were folded into the distribution elements
+# by IFC4.
+ELEMENT_TYPES = frozenset("""
+    IFCBEAM IFCBEAMSTANDARDCASE IFCBUILDINGELEMENTCOMPONENT IFCBUILDINGELEMENTPART IFCBUILDINGELEMENTPROXY
+    IFCCHIMNEY IFCCIVILELEMENT IFCCOLUMN IFCCOLUMNSTANDARDCASE IFCCOVERING IFCCURTAINWALL IFCDOOR
+    IFCDOORSTANDARDCASE IFCFOOTING IFCMEMBER IFCMEMBERSTANDARDCASE IFCPILE IFCPLATE IFCPLATESTANDARDCASE
+    IFCRAILING IFCRAMP IFCRAMPFLIGHT IFCROOF IFCSHADINGDEVICE IFCSLAB IFCSLABELEMENTEDCASE IFCSLABSTANDARDCASE
+    IFCSTAIR IFCSTAIRFLIGHT IFCWALL IFCWALLELEMENTEDCASE IFCWALLSTANDARDCASE IFCWINDOW IFCWINDOWSTANDARDCASE
+    IFCFURNISHINGELEMENT IFCFURNITURE IFCSYSTEMFURNITUREELEMENT IFCELEMENTASSEMBLY IFCTRANSPORTELEMENT
+    IFCGEOGRAPHICELEMENT IFCDISCRETEACCESSORY IFCFASTENER IFCMECHANICALFASTENER IFCREINFORCINGBAR
+    IFCREINFORCINGMESH IFCTENDON IFCTENDONANCHOR IFCVIBRATIONISOLATOR IFCDISTRIBUTIONELEMENT
+    IFCDISTRIBUTIONCONTROLELEMENT IFCDISTRIBUTIONFLOWELEMENT IFCDISTRIBUTIONCHAMBERELEMENT IFCFLOWCONTROLLER
+    IFCFLOWFITTING IFCFLOWMOVINGDEVICE IFCFLOWSEGMENT IFCFLOWSTORAGEDEVICE IFCFLOWTERMINAL IFCFLOWTREATMENTDEVICE
+    IFCENERGYCONVERSIONDEVICE IFCACTUATOR IFCAIRTERMINAL IFCAIRTERMINALBOX IFCAIRTOAIRHEATRECOVERY IFCALARM
+    IFCAUDIOVISUALAPPLIANCE IFCBOILER IFCBURNER IFCCABLECARRIERFITTING IFCCABLECARRIERSEGMENT IFCCABLEFITTING
+    IFCCABLESEGMENT IFCCHILLER IFCCOIL IFCCOMMUNICATIONSAPPLIANCE IFCCOMPRESSOR IFCCONDENSER IFCCONTROLLER
+    IFCCOOLEDBEAM IFCCOOLINGTOWER IFCDAMPER IFCDUCTFITTING IFCDUCTSEGMENT IFCDUCTSILENCER IFCELECTRICAPPLIANCE
+    IFCELECTRICDISTRIBUTIONBOARD IFCELECTRICFLOWSTORAGEDEVICE IFCELECTRICGENERATOR IFCELECTRICMOTOR
+    IFCELECTRICTIMECONTROL IFCENGINE IFCEVAPORATIVECOOLER IFCEVAPORATOR IFCFAN IFCFILTER
+    IFCFIRESUPPRESSIONTERMINAL IFCFLOWINSTRUMENT IFCFLOWMETER IFCHEATEXCHANGER IFCHUMIDIFIER IFCINTERCEPTOR
+    IFCJUNCTIONBOX IFCLAMP IFCLIGHTFIXTURE IFCMEDICALDEVICE IFCMOTORCONNECTION IFCOUTLET IFCPIPEFITTING
+    IFCPIPESEGMENT IFCPROTECTIVEDEVICE IFCPROTECTIVEDEVICETRIPPINGUNIT IFCPUMP IFCSANITARYTERMINAL IFCSENSOR
+    IFCSOLARDEVICE IFCSPACEHEATER IFCSTACKTERMINAL IFCSWITCHINGDEVICE IFCTANK IFCTRANSFORMER IFCTUBEBUNDLE
+    IFCUNITARYCONTROLELEMENT IFCUNITARYEQUIPMENT IFCVALVE IFCWASTETERMINAL IFCELECTRICALELEMENT
+    IFCEQUIPMENTELEMENT IFCELECTRICDISTRIBUTIONPOINT
+""".split())
+
+BOT_CLASSES = dict({"IFCSITE": SITE, "IFCBUILDING": BUILDING, "IFCBUILDINGSTOREY": STOREY, "IFCSPACE": SPACE},
+                   **{type_name: ELEMENT for type_name in ELEMENT_TYPES})
+
+# relationship type: (offset of the relating entity, offset of the related ones)
+AGGREGATES = {"IFCRELAGGREGATES": (4, 5)}
+CONTAINMENT = {"IFCRELCONTAINEDINSPATIALSTRUCTURE": (5, 4)}
+BOUNDARIES = {"IFCRELSPACEBOUNDARY": (4, 5), "IFCRELSPACEBOUNDARY1STLEVEL": (4, 5),
+              "IFCRELSPACEBOUNDARY2NDLEVEL": (4, 5)}
+
+# (relating class, related class): relation, for aggregation
+DECOMPOSITION = {(SITE, BUILDING): BOT.hasBuilding, (BUILDING, STOREY): BOT.hasStorey,
+                 (STOREY, SPACE): BOT.hasSpace, (ELEMENT, ELEMENT): BOT.hasSubElement}
+
+
+# Entities a product's, a type's or a material's shape is represented by,
+# and those styling or layering the items of representations, or giving
+# the geometry of connections: what refers to them is a representation
+# attribute.
+REPRESENTATION_TYPES = frozenset("""
+    IFCPRODUCTDEFINITIONSHAPE IFCPRODUCTREPRESENTATION IFCMATERIALDEFINITIONREPRESENTATION IFCREPRESENTATIONMAP
+    IFCSHAPEASPECT IFCSHAPEREPRESENTATION IFCSTYLEDREPRESENTATION IFCTOPOLOGYREPRESENTATION IFCSTYLEDITEM
+    IFCANNOTATIONOCCURRENCE IFCANNOTATIONCURVEOCCURRENCE IFCANNOTATIONFILLAREAOCCURRENCE
+    IFCANNOTATIONSURFACEOCCURRENCE IFCANNOTATIONSYMBOLOCCURRENCE IFCANNOTATIONTEXTOCCURRENCE IFCDIMENSIONCURVE
+    IFCPROJECTIONCURVE IFCTERMINATORSYMBOL IFCDIMENSIONCURVETERMINATOR IFCPRESENTATIONLAYERASSIGNMENT
+    IFCPRESENTATIONLAYERWITHSTYLE IFCCONNECTIONCURVEGEOMETRY IFCCONNECTIONPOINTGEOMETRY
+    IFCCONNECTIONPOINTECCENTRICITY IFCCONNECTIONSURFACEGEOMETRY IFCCONNECTIONVOLUMEGEOMETRY
+""".split())
+
+
+def _refs(param):
+    params = param if isinstance(param, list) else [param]
+    return [p for p in params if isinstance(p, str) and p.startswith("#")]
+
+
+class BOTEnricher:
+    """
+    The Building Topology Ontology view of IFC's spatial structure:
+    sites, buildings, storeys, spaces and elements, their decomposition,
+    which zones contain which elements, and which elements bound spaces.
+    """
+    profile = URIRef(str(BOT))
+    prefix = "bot"
+
+    def __init__(self):
+        self.classes = {}
+        self.relations = []         # (relationship kind, relating ref, related refs)
+
+    def entity(self, client, entity):
+        type_name = entity.type_name
+        bot_class = BOT_CLASSES.get(type_name)
+        if bot_class is not None:
+            self.classes[entity.ref] = bot_class
+            return
+        for kind in (AGGREGATES, CONTAINMENT, BOUNDARIES):
+            offsets = kind.get(type_name)
+            if offsets is not None and len(entity.params) > max(offsets):
+                relating = _refs(entity.params[offsets[0]])
+                if relating:
+                    self.relations.append((kind, relating[0], _refs(entity.params[offsets[1]])))
+                return
+
+    def end_file(self, client):
+        base_uri = client.base_uri
+
+        def uri(ref):
+            return URIRef(ref, base=base_uri)
+
+        for ref, bot_class in self.classes.items():
+            client.add(uri(ref), RDF.type, bot_class)
+        for kind, relating, related in self.relations:
+            relating_class = self.classes.get(relating)
+            for ref in related:
+                related_class = self.classes.get(ref)
+                if kind is AGGREGATES:
+                    relation = DECOMPOSITION.get((relating_class, related_class))
+                elif kind is CONTAINMENT:
+                    relation = BOT.containsElement if relating_class in ZONES and related_class == ELEMENT else None
+                else:
+                    relation = BOT.adjacentElement if relating_class == SPACE and related_class == ELEMENT else None
+                if relation is not None:
+                    client.add(uri(relating), relation, uri(ref))
+        client.add(client.graph.identifier, DCTERMS.conformsTo, self.profile)
+        client.graph.bind(self.prefix, BOT)
+
+
+class CompactListsEnricher:
+    """
+    Lists of numbers (coordinates, indices and such) as one array literal
+    each (see arrays.py), rather than as rdf:Lists of value nodes.
+    """
+    profile = URIRef("http://ifc-ld.org/profiles/compact-lists")
+    prefix = "arr"
+
+    def entity(self, client, entity):
+        pass
+
+    def make_list(self, client, items):
+        return encode(items)
+
+    def end_file(self, client):
+        client.add(client.graph.identifier, DCTERMS.conformsTo, self.profile)
+        client.graph.bind(self.prefix, ARR)
+
+
+class OmitGeometryEnricher:
+    """
+    Leaves out representations: the entities reachable from the rest
+    only through representation attributes (the shapes of products,
+    styled items and such, and their geometry; see REPRESENTATION_TYPES).
+    The attributes still refer to the entities they did.
+    """
+    profile = URIRef("http://ifc-ld.org/profiles/omit-geometry")
+    prefix = "geom"
+
+    def __init__(self):
+        self.index = None
+        self.omitted = set()
+
+    def entity(self, client, entity):
+        pass
+
+    def skipped(self, client, data):
+        """
+        The entities that nothing but representations refer to (and
+        those they refer to): everything but what the other entities
+        lead to without going through a representation.
+        """
+        self.index = index = ReferenceIndex(data)
+        representations = index.of_types(REPRESENTATION_TYPES)
+        others = index.types.keys() - index.reachable(representations)
+        self.omitted = index.types.keys() - index.reachable(others, stop=representations)
+        return {"#{id}".format(id=id_) for id_ in self.omitted}
+
+    def end_file(self, client):
+        client.add(client.graph.identifier, DCTERMS.conformsTo, self.profile)
+        client.graph.bind(self.prefix, GEOM)
+
+
+class CompactGeometryEnricher(OmitGeometryEnricher):
+    """
+    Collapses representations into literals: each entity left out (see
+    OmitGeometryEnricher) that a converted one refers to, or that nothing
+    refers to, is only typed, and given a `geom:step` literal of the STEP
+    records of it and the entities left out that it leads to (each
+    written with the first that does).
+    """
+    profile = URIRef("http://ifc-ld.org/profiles/compact-geometry")
+
+    def end_file(self, client):
+        index, omitted = self.index, self.omitted
+        referred, referred_by_converted = set(), set()
+        for id_, references in index.references.items():
+            referred.update(references)
+            if id_ not in omitted:
+                referred_by_converted.update(references)
+        roots = {id_ for id_ in omitted if id_ in referred_by_converted or id_ not in referred}
+        written = set()
+        for root in sorted(roots):
+            records = []
+            todo = [root]
+            while todo:
+                id_ = todo.pop()
+                if id_ in written or id_ not in omitted or id_ != root and id_ in roots:
+                    continue
+                written.add(id_)
+                records.append(index.text(id_))
+                todo.extend(reversed(index.references[id_]))
+            subject = URIRef("#{id}".format(id=root), base=client.base_uri)
+            if index.types[root]:
+                client.add(subject, RDF.type, client.entity_type(index.types[root]))
+            client.add(subject, GEOM.step, Literal("\n".join(records), datatype=XSD.string))
+        super().end_file(client)
+
+
+ENRICHERS = {str(BOT): BOTEnricher, str(CompactListsEnricher.profile): CompactListsEnricher,
+             str(OmitGeometryEnricher.profile): OmitGeometryEnricher,
+             str(CompactGeometryEnricher.profile): CompactGeometryEnricher}
+
+
+def native_profiles(profiles):
+    """
+    Those of `profiles` that an enricher applies.
+    """
+    return [profile for profile in profiles if profile in ENRICHERS]
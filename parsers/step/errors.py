@@ -5,4 +5,7 @@ class MalformedInputError(ValueError):
     pass
 
 class ImpossibleConditionError(ValueError):
-    pass
\ No newline at end of file
+    pass
+
+class UnknownEntityError(ValueError):
+    pass
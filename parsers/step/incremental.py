@@ -0,0 +1,138 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Incremental (pull) parsing of STEP Part21 exchange files.
+
+SCL's Parser reduces the whole exchange file to one P21File, holding
+every entity, before any of it can be converted. Here the same grammar
+is driven one statement at a time: the header is parsed up front (with
+SCL's `extract_header` start symbol), then each DATA section's entities
+are parsed (with `entity_instance` as the start symbol) only as the
+caller asks for them.
+"""
+
+# Internal Dependencies
+from .SCL.Part21 import Lexer, Parser, Section
+
+
+class TokenStream:
+    """
+    A single lookahead over the shared lexer, handing out windows of it
+    that PLY can parse as if each were a complete input.
+    """
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self._peeked = None
+
+    def peek(self):
+        if self._peeked is None:
+            self._peeked = self.lexer.token()
+        return self._peeked
+
+    def next(self):
+        tok = self.peek()
+        self._peeked = None
+        return tok
+
+    def until(self, type):
+        return _Window(self, lambda tok, depth: tok.type == type)
+
+    def statement(self):
+        return _Window(self, lambda tok, depth: tok.type == ';' and depth == 0)
+
+
+class _Window:
+    """
+    Tokens up to and including the first one `is_last` accepts, then EOF.
+    """
+    def __init__(self, stream, is_last):
+        self.stream = stream
+        self.is_last = is_last
+        self.depth = 0
+        self.done = False
+
+    def input(self, s):
+        # extract_header clears its input once it has seen DATA
+        self.done = True
+
+    def token(self):
+        if self.done:
+            return None
+        tok = self.stream.next()
+        if tok is None:
+            self.done = True
+            return None
+        if tok.type == '(':
+            self.depth += 1
+        elif tok.type == ')':
+            self.depth -= 1
+        self.done = self.is_last(tok, self.depth)
+        return tok
+
+
+class IncrementalParser:
+    def __init__(self, lexer=None):
+        self.lexer = lexer if lexer else Lexer()
+        self.header_parser = Parser(lexer=self.lexer, start='extract_header')
+        self.entity_parser = Parser(lexer=self.lexer, start='entity_instance', tabmodule='p21enttab')
+
+    def reset(self):
+        """
+        Return a used parser to the state of a freshly built one.
+        SCL's own reset() forgets the seen entity names, but leaves the
+        lexer holding the last input (and its running length), so we clear
+        those too. This also drops our reference to the input text.
+        """
+        self.header_parser.reset()
+        self.entity_parser.reset()
+        self.lexer.reset()
+        self.lexer.input('')
+        self.lexer.input_length = 0
+
+    def parse(self, p21_data):
+        """
+        Returns a P21File whose header is parsed, and whose sections (and
+        each section's entities) are generators that parse on demand.
+        Sections must be consumed in order; a section left unfinished is
+        skipped through when the next one is asked for.
+        """
+        if not isinstance(p21_data, str):
+            # PLY lexes text: bytes and buffers (memory-mapped files) are decoded whole
+            p21_data = str(p21_data, "utf-8")
+        self.lexer.reset()
+        self.lexer.input(p21_data)
+        tokens = TokenStream(self.lexer)
+        file = self.header_parser.parser.parse(lexer=tokens.until('DATA'))
+        if file is None:
+            raise SyntaxError("Unable to parse the exchange file header")
+        file.sections = self._sections(tokens)
+        return file
+
+    def _sections(self, tokens):
+        while True:
+            # the DATA keyword has already been consumed; skip its parameters
+            for _ in iter(tokens.statement().token, None):
+                pass
+            section = Section(self._entities(tokens))
+            yield section
+            for _ in section.entities:
+                pass
+            tok = tokens.next()
+            if tok is not None and tok.type == 'PART21_END':
+                return
+            if tok is None or tok.type != 'DATA':
+                raise SyntaxError("Expected DATA or END-ISO-10303-21, found {tok}".format(tok=tok))
+
+    def _entities(self, tokens):
+        while True:
+            tok = tokens.peek()
+            if tok is None:
+                raise SyntaxError("Unexpected end of input in DATA section")
+            if tok.type == 'ENDSEC':
+                tokens.next()
+                return
+            entity = self.entity_parser.parser.parse(lexer=tokens.statement())
+            if entity is None:
+                raise SyntaxError("Unable to parse entity instance at line {lineno}".format(lineno=tok.lineno))
+            yield entity
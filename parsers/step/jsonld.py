@@ -0,0 +1,290 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+IFC-LD JSON-LD, written as quads come in rather than from a graph.
+
+The document is a node for the graph (its header statements) whose
+`objects` index holds a node per entity, keyed by its GlobalId (or its
+STEP reference, for entities without one):
+
+    {"@context": {...}, "@id": "http://example.org/model#", "conformsTo": ...,
+     "objects": {
+    "2O2Fr$t4X7Zf8NOew3FLOH": {"@id": "http://example.org/model#19", "@type": "ifcwall", ...},
+    ...}}
+
+Value nodes and lists (blank nodes with one referrer) are nested where
+they are referred to. The `@context` is worked out once per schema.
+Statements about an entity once it has been written (those an enricher
+adds at the end of the file, say) go in `@included`.
+
+The index is the one statement the document holds that other formats
+don't: the graph's node refers to each entity by `ifcld:object`.
+
+This is an adaptation of test/wall-fragment.json, not its shape. Only
+the `objects` index is borrowed. The fragment's `Package` node, its
+`slots` index of attribute nodes (each with `meta` provenance, `slotof`,
+`who` and `when`, and its value under `contents`) and its
+buildingsmart.org vocabulary aren't produced. The entities' nodes hold
+the same statements as every other format, in the schema's vocabulary,
+so the document is the converted graph, framed.
+"""
+
+# Standard Library
+import json
+from functools import lru_cache
+
+# External Dependencies
+from rdflib import URIRef, BNode, Literal, RDF, RDFS, XSD, DCTERMS, PROV
+
+IFCLD = "http://ifc-ld.org#"
+IFCLD_ID = "http://ifc-ld.org/ids#"
+PREFIXES = {"rdf": str(RDF), "rdfs": str(RDFS), "xsd": str(XSD), "dcterms": str(DCTERMS), "prov": str(PROV)}
+
+# (predicate, datatype of its literals or "@id" for IRIs): term
+TERMS = {
+    (RDF.value, None): "value",
+    (RDF.value, XSD.string): "string",
+    (RDF.value, XSD.decimal): "decimal",
+    (DCTERMS.conformsTo, "@id"): "conformsTo",
+    (DCTERMS.subject, "@id"): "subject",
+    (PROV.generatedAtTime, XSD.dateTime): "generatedAtTime",
+    (PROV.wasAttributedTo, XSD.string): "wasAttributedTo",
+}
+RESERVED = set(TERMS.values()) | set(PREFIXES) | {"objects"}
+
+
+@lru_cache(maxsize=None)
+def get_context(vocab):
+    """
+    The `@context` of documents of the schema `vocab` (the namespace of
+    its types and attributes, or None), as JSON text.
+    """
+    context = {"@version": 1.1}
+    if vocab:
+        context["@vocab"] = vocab
+    context.update(PREFIXES)
+    context["objects"] = {"@id": IFCLD + "object", "@container": "@index"}
+    for (predicate, datatype), term in TERMS.items():
+        context[term] = {"@id": str(predicate)}
+        if datatype is not None:
+            context[term]["@type"] = str(datatype)
+    return json.dumps(context, separators=(",", ":"))
+
+
+class JSONLDSink:
+    """
+    Stands in for the Graph an IFCLDClient writes to. Each batch of quads
+    handed to addN is written as the nodes of its subjects (a batch has
+    to hold the statements about any blank node it refers to just once)
+    until drain() hands the text over; `size` is its length so far.
+    end() closes the document.
+    """
+    def __init__(self, identifier):
+        self.identifier = URIRef(identifier)
+        self.vocab = None
+        self.chunks = []
+        self.size = 0
+        self.graph_node = None              # the graph's node, until the document is opened
+        self.opened = False
+        self.written = set()                # subjects in the objects index
+        self.keys = set()
+        self.included = []
+        self.names = {}                     # URIRef: how it is written as a key or type
+
+    def bind(self, prefix, namespace, *args, **kwargs):
+        if prefix == "ifc":
+            self.vocab = str(namespace)
+
+    def addN(self, quads):
+        subjects = {}                       # subject: [predicate, object, ...]
+        references = {}                     # blank node: times it is an object
+        for s, p, o, _ in quads:
+            po = subjects.get(s)
+            if po is None:
+                po = subjects[s] = []
+            po.append(p)
+            po.append(o)
+            if isinstance(o, BNode):
+                references[o] = references.get(o, 0) + 1
+        batch = _Batch(self, subjects, references)
+        heading = not self.opened and self.identifier in subjects
+        if heading:
+            self.graph_node = batch.node(self.identifier, labelled=True)
+        for subject in subjects:
+            if heading and subject == self.identifier or batch.inline(subject):
+                continue
+            self.write(subject, batch.node(subject, labelled=True))
+        # blank nodes only referred to by each other
+        for subject in subjects:
+            if isinstance(subject, BNode) and subject not in batch.done:
+                self.write(subject, batch.node(subject, labelled=True))
+
+    def write(self, subject, node):
+        if not self.opened:
+            self.open()
+        if subject in self.written or subject == self.identifier:
+            self.included.append(node)
+            return
+        self.written.add(subject)
+        key = self.key(subject, node)
+        self.append("{sep}\n{key}:{node}".format(sep="," if len(self.written) > 1 else "", key=json.dumps(key),
+                                                 node=json.dumps(node, separators=(",", ":"))))
+
+    def key(self, subject, node):
+        """
+        An entity's GlobalId, or if it has none (or that's taken), its
+        STEP reference or its IRI.
+        """
+        for candidate in (node.get("subject"), "#" + subject.rpartition("#")[2] if "#" in subject else None):
+            if isinstance(candidate, str) and candidate.startswith(IFCLD_ID):
+                candidate = candidate[len(IFCLD_ID):]
+            if isinstance(candidate, str) and candidate not in self.keys:
+                self.keys.add(candidate)
+                return candidate
+        key = subject if isinstance(subject, URIRef) else "_:" + subject
+        self.keys.add(key)
+        return key
+
+    def open(self):
+        self.opened = True
+        graph_node = json.dumps(self.graph_node or {"@id": str(self.identifier)}, separators=(",", ":"))
+        self.append('{{"@context":{context},{graph},"objects":{{'.format(context=get_context(self.vocab),
+                                                                    graph=graph_node[1:-1]))
+
+    def append(self, text):
+        self.chunks.append(text)
+        self.size += len(text)
+
+    def drain(self):
+        if not self.opened:
+            self.open()
+        text = "".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return text
+
+    def end(self):
+        text = self.drain() + "\n}"
+        if self.included:
+            text += ',\n"@included":' + json.dumps(self.included, separators=(",", ":"))
+        return text + "}\n"
+
+    def name(self, uri):
+        """
+        How `uri` is written as a key or type: relative to the schema's
+        vocabulary, as a compact IRI, or in full.
+        """
+        name = self.names.get(uri)
+        if name is None:
+            name = str(uri)
+            for prefix, namespace in ((None, self.vocab), *PREFIXES.items()):
+                if namespace and name.startswith(namespace) and len(name) > len(namespace):
+                    local = name[len(namespace):]
+                    if prefix is None and ":" not in local and not local.startswith("@") and local not in RESERVED:
+                        name = local
+                        break
+                    if prefix is not None and not local.startswith("/"):
+                        name = prefix + ":" + local
+                        break
+            self.names[uri] = name
+        return name
+
+
+class _Batch:
+    """
+    The nodes of a batch of quads' subjects, with blank nodes that have
+    one referrer nested.
+    """
+    def __init__(self, sink, subjects, references):
+        self.sink = sink
+        self.subjects = subjects
+        self.references = references
+        self.done = set()
+
+    def inline(self, node):
+        return isinstance(node, BNode) and self.references.get(node) == 1
+
+    def node(self, subject, labelled=False):
+        self.done.add(subject)
+        node = {"@id": str(subject) if isinstance(subject, URIRef) else "_:" + subject} if labelled else {}
+        types = []
+        po = self.subjects.get(subject, ())
+        for i in range(0, len(po), 2):
+            predicate, object_ = po[i], po[i + 1]
+            if predicate == RDF.type and not isinstance(object_, Literal):
+                types.append(self.sink.name(object_) if isinstance(object_, URIRef) else "_:" + object_)
+                continue
+            key, value = self.statement(predicate, object_)
+            values = node.get(key)
+            if values is None:
+                node[key] = value
+            elif isinstance(values, list):
+                values.append(value)
+            else:
+                node[key] = [values, value]
+        if types:
+            node["@type"] = types[0] if len(types) == 1 else types
+        return node
+
+    def statement(self, predicate, object_):
+        if isinstance(object_, Literal):
+            term = TERMS.get((predicate, object_.datatype))
+            if term is not None:
+                return term, str(object_)
+            term = TERMS.get((predicate, None))
+            return term or self.sink.name(predicate), literal(object_)
+        if isinstance(object_, URIRef):
+            term = TERMS.get((predicate, "@id"))
+            if term is not None:
+                return term, str(object_)
+            return self.sink.name(predicate), {"@id": str(object_)}
+        return self.sink.name(predicate), self.value(object_)
+
+    def value(self, node):
+        if isinstance(node, Literal):
+            return literal(node)
+        if isinstance(node, URIRef):
+            return {"@id": str(node)}
+        if not self.inline(node) or node in self.done:
+            return {"@id": "_:" + node}
+        items = self.collection(node)
+        if items is not None:
+            return {"@list": [self.value(item) for item in items]}
+        return self.node(node)
+
+    def collection(self, node):
+        """
+        The items of the rdf:List starting at `node`, if its every cell is
+        a blank node with one referrer and nothing but an rdf:first and an
+        rdf:rest.
+        """
+        items, cells = [], []
+        while node != RDF.nil:
+            if not self.inline(node) or node in self.done:
+                return None
+            po = self.subjects.get(node, ())
+            if len(po) != 4 or {po[0], po[2]} != {RDF.first, RDF.rest}:
+                return None
+            first, rest = (po[1], po[3]) if po[0] == RDF.first else (po[3], po[1])
+            items.append(first)
+            cells.append(node)
+            node = rest
+        self.done.update(cells)
+        return items
+
+
+def literal(node):
+    """
+    A literal as JSON: integers and booleans as JSON numbers and booleans,
+    anything else as a value object.
+    """
+    if node.language:
+        return {"@value": str(node), "@language": node.language}
+    if node.datatype == XSD.integer and isinstance(node.value, int) and str(node) == str(node.value):
+        return node.value
+    if node.datatype == XSD.boolean and isinstance(node.value, bool) and str(node) in ("true", "false"):
+        return node.value
+    if node.datatype is None:
+        return str(node)
+    return {"@value": str(node), "@type": str(node.datatype)}
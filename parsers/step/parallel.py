@@ -0,0 +1,151 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Converting one STEP file to N-Triples/N-Quads on several processes.
+
+The data section is split between records (found as references.py finds
+them, so a `;` in a string or comment is no boundary) into runs of about
+the same size. Each run, behind the file's header, is a STEP file of its
+own, which a worker process converts as a LineStream does. Each worker
+labels its blank nodes with a prefix of its run's own, so they can't
+collide, and the results are written out in the file's order.
+
+Profiles aren't applied: enrichers see one run of the file, not all of it.
+
+The worker processes are started by a forkserver, a single-threaded process
+of its own, rather than forked from a (threaded) server process, whose
+other threads may hold locks a forked child would wait on forever. A
+server starts them with start_executor() before it takes requests.
+"""
+
+# Standard Library
+import os
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Internal Dependencies
+from .streaming import LineStream
+from .references import RECORD, data_section
+
+PARALLEL_WORKERS = int(os.environ.get("IFCLD_PARALLEL_WORKERS", os.cpu_count() or 1))
+PARALLEL_MIN_SIZE = int(os.environ.get("IFCLD_PARALLEL_MIN_SIZE", 16))
+PARALLEL_FORMATS = ("application/n-triples", "application/n-quads")
+RUNS_PER_WORKER = 4                 # runs a file is split into, per worker, to even out their loads
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(workers):
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = _executors[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+        return executor
+
+
+def _ready():
+    pass
+
+
+def start_executor(workers=PARALLEL_WORKERS):
+    """
+    Create the pool of `workers` processes, if there is more than one, and
+    start them loading the converter, so that no request waits on that.
+    """
+    if workers > 1:
+        executor = get_executor(workers)
+        for _ in range(workers):
+            executor.submit(_ready)
+
+
+def is_parallel(data, format, profiles, workers=PARALLEL_WORKERS, min_size=PARALLEL_MIN_SIZE):
+    """
+    Whether a STEP file `data` is worth converting to `format` in parallel:
+    it is at least `min_size` MB, there's more than one worker, and no
+    profiles to apply.
+    """
+    return workers > 1 and format in PARALLEL_FORMATS and not profiles and len(data) >= min_size * 1024 * 1024
+
+
+def split(data, runs):
+    """
+    The header of the STEP text `data` (up to its data section), and the
+    (start, end) of up to `runs` runs of its records.
+    """
+    start = data_section(data)
+    matches = RECORD.finditer(data, start)
+    first = next(matches, None)
+    if first is None:
+        return data[:start], []
+    begin, end = first.span()
+    size = max(1, (len(data) - begin) // runs)
+    spans = []
+    for match in matches:
+        if match.start() - begin >= size:
+            spans.append((begin, end))
+            begin = end
+        end = match.end()
+    spans.append((begin, end))
+    return data[:start], spans
+
+
+def convert_run(document, base_uri, format, bnode_prefix):
+    """
+    The N-Triples/N-Quads of the entities of the STEP file `document` (but
+    its header's statements).
+    """
+    chunks = iter(LineStream(document, base_uri, format, bnode_prefix=bnode_prefix))
+    next(chunks)
+    return "".join(chunks)
+
+
+class ParallelStream:
+    """
+    An iterable of N-Triples/N-Quads text for a STEP document, like a
+    LineStream's, its entities converted by `workers` processes.
+
+    The header is parsed, and the schema resolved, on construction, so
+    malformed headers fail before a response is committed to (malformed
+    entities fail as their run's text is reached). Up to two runs per
+    worker are converted ahead of the one being written.
+    """
+    def __init__(self, data, base_uri, format, workers=PARALLEL_WORKERS, runs=None):
+        if format not in PARALLEL_FORMATS:
+            raise ValueError("{format} can't be converted in parallel".format(format=format))
+        self.data = data
+        self.base_uri = base_uri
+        self.format = format
+        self.workers = workers
+        self.header, self.spans = split(data, runs or workers * RUNS_PER_WORKER)
+        header = LineStream(self.header + b"DATA;\nENDSEC;\nEND-ISO-10303-21;\n", base_uri, format)
+        self._head = "".join(header)
+        self.ifc_version = header.ifc_version
+        self.content_profiles = header.content_profiles
+
+    def __iter__(self):
+        executor = get_executor(self.workers)
+        pending = deque()
+        runs = iter(enumerate(self.spans))
+        try:
+            yield self._head
+            while True:
+                while len(pending) < 2 * self.workers:
+                    run = next(runs, None)
+                    if run is None:
+                        break
+                    i, (start, end) = run
+                    document = b"".join([self.header, b"DATA;\n", self.data[start:end],
+                                         b"\nENDSEC;\nEND-ISO-10303-21;\n"])
+                    pending.append(executor.submit(convert_run, document, self.base_uri, self.format,
+                                                   "r{i}b".format(i=i)))
+                if not pending:
+                    return
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -2,15 +2,16 @@
 # SPDX-License-Identifier: AGPL-3.0
 
 # Standard Library
+import os
+import mmap
+import logging
 from pathlib import Path
 from urllib.parse import quote as urlquote
 
 # External Depedencies
-from rdflib.graph import Collection
 from rdflib.parser import Parser, InputSource
 from dateutil import parser as dtparser
-from rdflib import (ConjunctiveGraph, 
-                    Graph, 
+from rdflib import (Graph, 
                     URIRef, 
                     BNode, 
                     Literal, 
@@ -24,12 +25,19 @@ from rdflib import (ConjunctiveGraph,
 
 
 # Internal Dependencies
-from .utils import Client, get_offset_map, get_ordered_attribute_set
+from .utils import Client
+from .dispatch import get_dispatch_table
 from .visitors import FileVisitor
 from .errors import MalformedInputError, ImpossibleConditionError
-from .SCL.Part21 import Parser as SCLParser, TypedParameter
+from .pool import parser_pool
+from .enrichers import ENRICHERS, native_profiles
+from .SCL.Part21 import TypedParameter, LexError
 
 IFCLD_ID = Namespace("http://ifc-ld.org/ids#")
+BATCH_SIZE = int(os.environ.get("IFCLD_BATCH_SIZE", 4096))               # quads gathered before adding them
+TERMINALS_SIZE = int(os.environ.get("IFCLD_TERMINALS_SIZE", 256 * 1024))  # terms kept for repeated terminals
+
+logger = logging.getLogger(__name__)
 
 def is_enum(param):
     return isinstance(param, str) and param.startswith('.') and param.endswith('.')
@@ -68,6 +76,25 @@ def is_typed_parameter(param):
     return isinstance(param, TypedParameter)
 
 def make_terminal(client, param):
+    """
+    The term for a terminal parameter (or reference). The client keeps
+    those it has made, by parameter and its type (1, 1.0 and "1" being
+    different terms), so a value that is repeated is made once.
+    """
+    # -0.0 == 0.0, but they are written differently
+    key = (param.__class__, param) if param != 0 or param.__class__ is not float else (float, str(param))
+    term = client.terminals.get(key)
+    client.terminal_lookups += 1
+    if term is None:
+        term = _make_terminal(client, param)
+        if len(client.terminals) < TERMINALS_SIZE:
+            client.terminals[key] = term
+    else:
+        client.terminal_hits += 1
+    return term
+
+
+def _make_terminal(client, param):
     assert is_terminal(param)
     if is_ref(param):
         return URIRef(param, base=client.base_uri)
@@ -91,32 +118,39 @@ def make_terminal(client, param):
 
 
 def make_list(client, lst):
-    head = BNode()
-    coll = Collection(client.graph, head)
-    for item in lst:
-        coll.append(make_object(client, item))
+    """
+    The rdf:List rdflib's Collection would build of `lst` (an empty one
+    is a bare blank node), added node by node rather than by walking the
+    list to its end for every item; unless one of the client's enrichers
+    converts the list itself.
+    """
+    for enricher in client.list_enrichers:
+        term = enricher.make_list(client, lst)
+        if term is not None:
+            return term
+    head = node = client.bnode()
+    for i, item in enumerate(lst):
+        if i:
+            rest = client.bnode()
+            client.add(node, RDF.rest, rest)
+            node = rest
+        client.add(node, RDF.first, make_object(client, item))
+    if lst:
+        client.add(node, RDF.rest, RDF.nil)
     return head
 
 
 def make_structured_value(client, param):
-    head = BNode()
-
-    client.graph.add((head, 
-                      RDF.value, 
-                      make_terminal(client, param), 
-                      client.graph.identifier))
-    
+    head = client.bnode()
+    client.add(head, RDF.value, make_terminal(client, param))
     if is_typed_parameter(param):
-        client.graph.add((head, 
-                          RDF.type, 
-                          URIRef(param.type_name.lower()), 
-                          client.graph.identifier))
+        client.add(head, RDF.type, URIRef(param.type_name.lower()))
     return head
 
 
 def make_object(client, param):
     if is_ref(param):
-        return URIRef(param, base=client.base_uri)
+        return make_terminal(client, param)
     elif is_terminal(param):
         return make_structured_value(client, param)
     elif is_collection(param):
@@ -134,14 +168,33 @@ def make_object(client, param):
 
 
 class IFCLDClient(Client):
-    def __init__(self, graph):
+    """
+    Converts the entities of a STEP file into `graph`. Quads are gathered
+    and added to the graph with addN once there are `batch_size` of them
+    (between entities) and at the end of the file, so `graph` is only
+    complete once the file has been visited.
+    """
+    def __init__(self, graph, enrichers=(), batch_size=BATCH_SIZE, data=None, bnode_prefix=None):
         self.graph = graph
+        self.enrichers = enrichers              # natively applied profiles, see enrichers.py
+        self.list_enrichers = [enricher for enricher in enrichers if hasattr(enricher, "make_list")]
+        self.batch_size = batch_size
+        self.data = data                        # the STEP text, for enrichers that skip entities
+        self.skipped = set()                    # references of entities not converted
+        self.skipping = False
+        self.bnode_prefix = bnode_prefix        # labels blank nodes prefix + n, rather than at random
+        self.bnodes = 0
+        self.quads = []
         self.current_entity = None
         self.current_parameter = None        
         self.vocab_uri = None
         self.base_uri = None
-        self.offset_map = None                  # maps parameter offsets to field names - derived from schema
-        self.ordered_attribute_set = None       # identifies which parameters are ordered - derived from schema
+        self.dispatch_table = None              # maps STEP types to their rdf:type and attributes - derived from schema
+        self.current_subject = None
+        self.current_attributes = None
+        self.terminals = {}                     # (type, terminal parameter): term, see make_terminal
+        self.terminal_lookups = 0
+        self.terminal_hits = 0
 
     def begin_file(self, file, offset):
         self.base_uri = self.graph.identifier
@@ -150,75 +203,108 @@ class IFCLDClient(Client):
         self._add_authorship_provenance(file)
         self._add_schema_metadata(file)
         self._apply_std_context(file)
+        for enricher in self.enrichers:
+            if hasattr(enricher, "skipped"):
+                self.skipped |= enricher.skipped(self, self.data)
 
     def begin_entity(self, entity, offset):
+        if entity.ref in self.skipped:
+            self.skipping = True
+            return
         self.current_entity = entity
-        self.current_entity_type_uri = str(URIRef("#"+entity.type_name.lower(), base=self.vocab_uri))
-        self.graph.add((URIRef(entity.ref, base=self.base_uri), 
-                        RDF.type, 
-                        URIRef(self.current_entity_type_uri), 
-                        self.graph.identifier))
+        self.current_subject = make_terminal(self, entity.ref)
+        dispatch = self.dispatch_table.get(entity.type_name)
+        self.current_attributes = dispatch.attributes if dispatch else None
+        self.add(self.current_subject, RDF.type, dispatch.type if dispatch else self.entity_type(entity.type_name))
+        for enricher in self.enrichers:
+            enricher.entity(self, entity)
+
+    def end_file(self, file, offset):
+        for enricher in self.enrichers:
+            enricher.end_file(self)
+        self.flush()
+        logger.info("%d of %d terminals were repeats (%.0f%%), %d terms kept", self.terminal_hits,
+                    self.terminal_lookups, 100 * self.terminal_hits / (self.terminal_lookups or 1),
+                    len(self.terminals))
 
     def end_entity(self, entity, offset):
+        self.skipping = False
         self.current_entity = None
-        self.current_entity_type_uri = None
+        self.current_subject = None
+        self.current_attributes = None
+        if len(self.quads) >= self.batch_size:
+            self.flush()
+
+    def add(self, subject, predicate, object_):
+        self.quads.append((subject, predicate, object_, self.graph))
+
+    def bnode(self):
+        """
+        A new blank node.
+        """
+        if self.bnode_prefix is None:
+            return BNode()
+        self.bnodes += 1
+        return BNode(self.bnode_prefix + str(self.bnodes))
+
+    def flush(self):
+        """
+        Add the quads gathered so far to the graph.
+        """
+        if self.quads:
+            self.graph.addN(self.quads)
+            self.quads = []
     
     def begin_parameter(self, param, offset):
-        if is_null(param) or is_derivable(param):
+        if self.skipping or is_null(param) or is_derivable(param):
             return
         
-        if self.current_entity_type_uri not in self.offset_map:
-            raise Exception("Entity type {uri} not found in offset map".format(uri=self.current_entity_type_uri))
+        if self.current_attributes is None:
+            raise Exception("Entity type {uri} not found in offset map".format(
+                uri=URIRef("#"+self.current_entity.type_name.lower(), base=self.vocab_uri)))
         
-        property_uri = self.offset_map[self.current_entity_type_uri][offset]
-        property = URIRef(property_uri)
+        attribute = self.current_attributes[offset]
         
-        if is_collection(param) and str(property) not in self.ordered_attribute_set: # sets
+        if is_collection(param) and not attribute.is_ordered: # sets
             for item in param:
-                self.graph.add((URIRef(self.current_entity.ref, base=self.base_uri), 
-                        property, make_object(self, item), self.graph.identifier))
+                self.add(self.current_subject, attribute.predicate, make_object(self, item))
         else:
-            self.graph.add((URIRef(self.current_entity.ref, base=self.base_uri),     # lists and everything else
-                        property, make_object(self, param), self.graph.identifier))
+            self.add(self.current_subject, attribute.predicate, make_object(self, param))   # lists and everything else
 
-        if property_uri.endswith("globalid"):
+        if attribute.is_globalid:
             """
             To every IFC instance with a GlobalID attribute, we ascribe
             a DCTERMS.subject, whose value is a URI built from the GlobalId string.
             This lets consumers collate properties of persistent objects by querying against
             this URI. 
             """
-            self.graph.add((URIRef(self.current_entity.ref, base=self.base_uri),
-                        DCTERMS.subject, 
-                        URIRef(IFCLD_ID + param),
-                        self.graph.identifier))
+            self.add(self.current_subject, DCTERMS.subject, URIRef(IFCLD_ID + param))
+
 
+    def entity_type(self, type_name):
+        """
+        The rdf:type of entities of the STEP type `type_name`.
+        """
+        dispatch = self.dispatch_table.get(type_name)
+        return dispatch.type if dispatch else URIRef("#"+type_name.lower(), base=self.vocab_uri)
 
     def _add_time_provenance(self, file):
         datetime = file.header.file_name.params[1]
         if datetime:
-            self.graph.add((self.graph.identifier, 
-                            PROV.generatedAtTime, 
-                            Literal(dtparser.parse(datetime).isoformat(), datatype=XSD.dateTime), 
-                            self.graph.identifier))
+            self.add(self.graph.identifier,
+                     PROV.generatedAtTime,
+                     Literal(dtparser.parse(datetime).isoformat(), datatype=XSD.dateTime))
             
     def _add_authorship_provenance(self, file):
         authors = file.header.file_name.params[3]
         for author in authors:
-            self.graph.add((self.graph.identifier, 
-                            PROV.wasAttributedTo, 
-                            Literal(author, datatype=XSD.string), 
-                            self.graph.identifier))
+            self.add(self.graph.identifier, PROV.wasAttributedTo, Literal(author, datatype=XSD.string))
 
     def _add_schema_metadata(self, file):
         schema_name = file.header.file_schema.params[0][0].lower()
         self.vocab_uri = "http://ifc-ld.org/schemas/{ifc_schema}".format(ifc_schema=schema_name)
-        self.offset_map = get_offset_map(schema_name)
-        self.ordered_attribute_set = get_ordered_attribute_set(schema_name)
-        self.graph.add((self.graph.identifier, 
-                            DCTERMS.conformsTo, 
-                            URIRef(self.vocab_uri+"#"),
-                            self.graph.identifier))
+        self.dispatch_table = get_dispatch_table(schema_name)
+        self.add(self.graph.identifier, DCTERMS.conformsTo, URIRef(self.vocab_uri+"#"))
 
     def _apply_std_context(self, file):
         self.graph.bind("rdf", RDF)
@@ -227,21 +313,39 @@ class IFCLDClient(Client):
         self.graph.bind("ifc", Namespace(self.vocab_uri+"#"))
 
 class STEPParser(Parser):
-    def parse(self, source : InputSource, sink : Graph, **kwargs):
-        # NOTE: ConjunctiveGraphs parse() into a Graph sink, 
-        # so have to patch that before continuing.
-        if not sink.context_aware:
-            sink = ConjunctiveGraph(store=sink.store, identifier=sink.identifier)
-        step_ast = self._step_parse(source)
-        client = IFCLDClient(sink)
-        FileVisitor().visit(client, step_ast)
-        
-    def _step_parse(self, source):
-        parser = SCLParser()
-        try:
-            stream = source.getByteStream()
-            return parser.parse(stream.read().decode("utf-8"))
-        except:
-            raise MalformedInputError("Unable to parse input.")
-
-
+    def parse(self, source : InputSource, sink : Graph, profiles=(), **kwargs):
+        """
+        Those of `profiles` with an enricher are applied as the file is
+        converted.
+        """
+        data = read_source(source)
+        client = IFCLDClient(sink, [ENRICHERS[profile]() for profile in native_profiles(profiles)], data=data)
+        with parser_pool.parser() as parser:
+            step_file = parse_step(parser, data)
+            try:
+                FileVisitor().visit(client, step_file)
+            except (LexError, SyntaxError):
+                raise MalformedInputError("Unable to parse input.")
+
+
+def read_source(source):
+    """
+    The STEP text of `source`: its byte stream itself if that is a
+    memory-mapped file (see uploads.py), so it is parsed in place, or what
+    is read from it.
+    """
+    stream = source.getByteStream()
+    return stream if isinstance(stream, mmap.mmap) else stream.read()
+
+
+def parse_step(parser, data):
+    """
+    Parse the header of the STEP text `data`: bytes, or a buffer such as a
+    memory-mapped file, which the C parser reads in place. Entities are
+    parsed as the returned file is visited, so `parser` has to stay
+    checked out (and `data` open) until then.
+    """
+    try:
+        return parser.parse(data)
+    except:
+        raise MalformedInputError("Unable to parse input.")
@@ -0,0 +1,82 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+# Standard Library
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+
+# Internal Dependencies
+from .incremental import IncrementalParser
+from .cparser import CParser, _cp21
+
+logger = logging.getLogger(__name__)
+
+
+def default_factory(backend=None):
+    """
+    The C parser when its extension is built (or `backend` is "c"),
+    otherwise SCL's PLY grammar driven incrementally.
+    """
+    backend = backend if backend else os.environ.get("IFCLD_STEP_BACKEND")
+    if backend == "c" or (backend != "ply" and _cp21 is not None):
+        return CParser
+    return IncrementalParser
+
+
+class ParserPool:
+    """
+    A process-wide, thread-safe pool of pre-built STEP parsers.
+
+    Building a parser runs PLY's lex.lex and yacc.yacc, which compile the
+    token rules and load (or regenerate) the LALR tables on disk. Neither
+    depends on the input, so we pay that once and hand out reset parsers.
+    When every pooled parser is busy a new one is built rather than making
+    the request wait; at most `size` idle parsers are kept.
+    """
+    def __init__(self, size=4, factory=None):
+        self.size = size
+        self.factory = factory if factory else default_factory()
+        self._idle = LifoQueue()
+        self._lock = threading.Lock()
+        self.built = 0
+
+    def warm(self, count=None):
+        count = self.size if count is None else count
+        while self._idle.qsize() < count:
+            self._idle.put(self._build())
+        return self
+
+    @contextmanager
+    def parser(self):
+        parser = self._checkout()
+        try:
+            yield parser
+        finally:
+            self._checkin(parser)
+
+    def _build(self):
+        with self._lock:
+            self.built += 1
+        return self.factory()
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            logger.debug("Parser pool exhausted, building a new parser")
+            return self._build()
+
+    def _checkin(self, parser):
+        parser.reset()
+        if self._idle.qsize() < self.size:
+            self._idle.put(parser)
+
+
+"""
+Built (and warmed) once at import, so that the first request
+doesn't pay for table construction either.
+"""
+parser_pool = ParserPool(size=int(os.environ.get("IFCLD_PARSER_POOL_SIZE", 4))).warm()
@@ -0,0 +1,113 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Which entities of a STEP file refer to which, from one scan of its text.
+
+The scan picks out each `#n = TYPE(...);` record of the data section
+(skipping over strings and comments, which may hold `;` and `#n`), and
+then the references in its parameters. Entities are numbered by their
+STEP id; a record's span is where it is in the text.
+
+select() uses it to cut a file down to some entities and those they
+refer to, before it is converted.
+"""
+
+# Standard Library
+import re
+
+# Internal Dependencies
+from .errors import UnknownEntityError
+
+# `#n = TYPE(...);`, with `;` in strings and comments taken as part of the record
+RECORD = re.compile(rb"#(\d+)\s*=\s*([A-Za-z0-9_]*)([^';/]*(?:(?:'[^']*')+[^';/]*|/\*.*?\*/[^';/]*|/[^';/]*)*);",
+                    re.S)
+REFERENCE = re.compile(rb"#(\d+)")
+STRING_OR_COMMENT = re.compile(rb"(?:'[^']*')+|/\*.*?\*/", re.S)
+STEP_ID = re.compile(r"#(\d+)$")
+
+
+class ReferenceIndex:
+    """
+    For each entity of the STEP text `data` (bytes): its type (upper
+    case, empty for complex entities), the ids of the entities it refers
+    to, and the (start, end) of its record in `data`.
+    """
+    def __init__(self, data):
+        self.data = data
+        self.types = {}
+        self.references = {}
+        self.spans = {}
+        for match in RECORD.finditer(data, data_section(data)):
+            id_ = int(match[1])
+            params = match[3]
+            if b"'" in params or b"/*" in params:
+                params = STRING_OR_COMMENT.sub(b"", params)
+            self.types[id_] = match[2].upper().decode("ascii")
+            self.references[id_] = [int(ref) for ref in REFERENCE.findall(params)]
+            self.spans[id_] = match.span()
+
+    def of_types(self, type_names):
+        """
+        The ids of the entities of any of `type_names`.
+        """
+        return {id_ for id_, type_name in self.types.items() if type_name in type_names}
+
+    def reachable(self, ids, stop=()):
+        """
+        The ids of the entities `ids` and those they refer to, directly
+        or not, short of the entities `stop`.
+        """
+        references = self.references
+        seen = set(ids)
+        todo = list(seen)
+        while todo:
+            for ref in references.get(todo.pop(), ()):
+                if ref not in seen and ref not in stop:
+                    seen.add(ref)
+                    todo.append(ref)
+        return seen
+
+    def text(self, id_):
+        """
+        The record of the entity `id_`, as it is in the file.
+        """
+        start, end = self.spans[id_]
+        return self.data[start:end].decode("utf-8", "replace")
+
+
+def data_section(data):
+    """
+    Where the data section of the STEP text `data` starts (or 0).
+    """
+    start = data.find(b"DATA;")
+    return start if start >= 0 else 0
+
+
+def select(data, seeds):
+    """
+    The STEP text `data` cut down to the entities `seeds` (GlobalIds, or
+    STEP ids like "#12") and those they refer to, directly or not: its
+    header, and their records as they were, in their order.
+    """
+    ids, global_ids = set(), set()
+    for seed in seeds:
+        match = STEP_ID.match(seed)
+        if match:
+            ids.add(int(match[1]))
+        else:
+            global_ids.add(seed)
+    start = data_section(data)
+    if global_ids:
+        pattern = rb"#(\d+)\s*=\s*[A-Za-z0-9_]*\s*\(\s*'(" + \
+            b"|".join(re.escape(global_id.encode("ascii", "replace")) for global_id in global_ids) + rb")'"
+        for match in re.compile(pattern).finditer(data, start):
+            ids.add(int(match[1]))
+            global_ids.discard(match[2].decode("ascii"))
+    index = ReferenceIndex(data)
+    missing = sorted(global_ids) + ["#{id}".format(id=id_) for id_ in sorted(ids - index.spans.keys())]
+    if missing:
+        raise UnknownEntityError("No entity {seeds} in the input.".format(seeds=", ".join(missing)))
+    spans = sorted(index.spans[id_] for id_ in index.reachable(ids))
+    return b"".join([data[:start], b"DATA;\n", *(data[begin:end] + b"\n" for begin, end in spans),
+                     b"ENDSEC;\nEND-ISO-10303-21;\n"])
@@ -0,0 +1,179 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Local store for the per-schema artifacts the STEP parser needs on
+every conversion: the offset map (`{schema}.offsets.json`) and the set
+of ordered attributes (`{schema}.ordered.json`).
+
+Artifacts are read from a bundled directory on disk, kept in an
+in-memory LRU, and revalidated against the artifact server (by ETag)
+once their TTL runs out. Inside the TTL a lookup does no I/O at all.
+Refresh the bundled copies with
+
+    $ python3 -m parsers.step.schema_store sync
+"""
+
+# Standard Library
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from collections import namedtuple
+from urllib import request
+from urllib.error import HTTPError, URLError
+
+# External Dependencies
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_NAMES = ("ifc2x3", "ifc4", "ifc4x1", "ifc4x2")
+ARTIFACT_KINDS = ("offsets", "ordered")
+
+BUNDLE_DIR = Path(__file__).resolve().parent / "schemas"
+DEFAULT_BASE_URL = "http://ifc-ld.org/schemas/"
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_TIMEOUT = 10
+MANIFEST = "manifest.json"
+
+Artifact = namedtuple("Artifact", ["data", "etag", "checked_at"])
+
+
+def artifact_name(schema_name, kind):
+    return "{schema_name}.{kind}.json".format(schema_name=schema_name, kind=kind)
+
+
+class SchemaStore:
+    """
+    `directory` holds the on-disk copies (and a manifest of their ETags).
+    `base_url` is where artifacts are fetched and revalidated from; any
+    server laid out like ifc-ld.org/schemas will do. An empty base_url
+    keeps the store entirely offline. A fetch taking longer than
+    `timeout` seconds fails (and a revalidation keeps the cached copy).
+    """
+    def __init__(self, directory=BUNDLE_DIR, base_url=DEFAULT_BASE_URL, ttl=DEFAULT_TTL, maxsize=16,
+                 timeout=DEFAULT_TIMEOUT):
+        self.directory = Path(directory)
+        self.base_url = base_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()             # guards the cache and _locks, never held over I/O
+        self._locks = {}                          # artifact name: lock held while it is fetched
+        self._manifest_lock = threading.Lock()
+
+    def get(self, schema_name, kind):
+        """
+        An artifact, fetched or revalidated first if need be. Only threads
+        waiting on the same artifact wait on the network: one that is being
+        revalidated is served from its cached copy meanwhile.
+        """
+        name = artifact_name(schema_name, kind)
+        with self._lock:
+            artifact = self._cache.get(name)
+            lock = self._locks.setdefault(name, threading.Lock())
+        if artifact is not None and time.monotonic() - artifact.checked_at <= self.ttl:
+            return artifact
+        if artifact is not None and not lock.acquire(blocking=False):
+            return artifact                 # another thread is revalidating it
+        if artifact is None:
+            lock.acquire()
+        try:
+            with self._lock:
+                artifact = self._cache.get(name)
+            if artifact is None:
+                artifact = self._load(name) or self._fetch(name)
+            elif time.monotonic() - artifact.checked_at > self.ttl:
+                artifact = self._revalidate(name, artifact)
+            with self._lock:
+                self._cache[name] = artifact
+            return artifact
+        finally:
+            lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def sync(self, schema_names=SCHEMA_NAMES):
+        """
+        Fetch (or revalidate) every artifact into the on-disk directory.
+        """
+        for schema_name in schema_names:
+            for kind in ARTIFACT_KINDS:
+                name = artifact_name(schema_name, kind)
+                artifact = self._load(name)
+                artifact = self._revalidate(name, artifact) if artifact else self._fetch(name)
+                with self._lock:
+                    self._cache[name] = artifact
+
+    def _load(self, name):
+        path = self.directory / name
+        if not path.is_file():
+            return None
+        with open(path, "rb") as f:
+            data = json.load(f)
+        return Artifact(data, self._read_manifest().get(name), time.monotonic())
+
+    def _fetch(self, name, etag=None):
+        if not self.base_url:
+            raise LookupError("Schema artifact {name} not found in {dir} and no base URL is configured".format(
+                name=name, dir=self.directory))
+        req = request.Request(self.base_url + name)
+        if etag:
+            req.add_header("If-None-Match", etag)
+        with request.urlopen(req, timeout=self.timeout) as response:
+            content = response.read()
+            etag = response.headers.get("ETag")
+        self._store(name, content, etag)
+        return Artifact(json.loads(content), etag, time.monotonic())
+
+    def _revalidate(self, name, artifact):
+        if not self.base_url:
+            return artifact._replace(checked_at=time.monotonic())
+        try:
+            return self._fetch(name, artifact.etag)
+        except HTTPError as e:
+            if e.code != 304:
+                logger.warning("Revalidating %s failed (%s), keeping the cached copy", name, e)
+        except (URLError, TimeoutError) as e:      # a read timing out isn't wrapped in a URLError
+            logger.warning("Revalidating %s failed (%s), keeping the cached copy", name, e)
+        return artifact._replace(checked_at=time.monotonic())
+
+    def _store(self, name, content, etag):
+        """
+        Persist a freshly fetched artifact, so a restart doesn't need the
+        network. A read-only bundle directory is fine; we just skip this.
+        """
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / name).write_bytes(content)
+            with self._manifest_lock:
+                manifest = self._read_manifest()
+                manifest[name] = etag
+                (self.directory / MANIFEST).write_text(json.dumps(manifest, indent=4, sort_keys=True))
+        except OSError as e:
+            logger.info("Not persisting %s to %s: %s", name, self.directory, e)
+
+    def _read_manifest(self):
+        try:
+            return json.loads((self.directory / MANIFEST).read_text())
+        except (OSError, ValueError):
+            return {}
+
+
+schema_store = SchemaStore(directory=os.environ.get("IFCLD_SCHEMA_DIR", BUNDLE_DIR),
+                           base_url=os.environ.get("IFCLD_SCHEMA_BASE_URL", DEFAULT_BASE_URL),
+                           ttl=int(os.environ.get("IFCLD_SCHEMA_TTL", DEFAULT_TTL)),
+                           timeout=float(os.environ.get("IFCLD_SCHEMA_TIMEOUT", DEFAULT_TIMEOUT)))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["sync"]:
+        sys.exit("usage: python3 -m parsers.step.schema_store sync")
+    logging.basicConfig(level=logging.INFO)
+    schema_store.sync()
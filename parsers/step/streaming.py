@@ -0,0 +1,132 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Streaming STEP to N-Triples/N-Quads (and IFC-LD JSON-LD) conversion.
+
+Line-based formats don't need the whole graph to be serialized, so
+instead of parsing into an rdflib Graph and serializing that, we run
+IFCLDClient against a sink that turns the quads it is handed into lines
+straight away, and write those out a chunk at a time. IFC-LD JSON-LD
+(see jsonld.py) is written a node per entity the same way.
+"""
+
+# Standard Library
+from contextlib import ExitStack
+
+# External Dependencies
+from rdflib import URIRef
+from rdflib.plugins.serializers.nt import _nt_row
+from rdflib.plugins.serializers.nquads import _nq_row
+
+# Internal Dependencies
+from .parser import IFCLDClient, parse_step
+from .enrichers import ENRICHERS, native_profiles
+from .jsonld import JSONLDSink
+from .pool import parser_pool
+from .visitors import FileVisitor
+from .errors import MalformedInputError
+from .SCL.Part21 import LexError
+
+STREAMING_FORMATS = ("application/n-triples", "application/n-quads", "application/json")
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 128                # quads a client gathers: a few batches fill a chunk
+
+
+class LineSink:
+    """
+    Stands in for the Graph an IFCLDClient writes to. Quads are turned
+    into lines (each kept once) as they are added, until drain() hands
+    those over; `size` is their length so far.
+    """
+    def __init__(self, identifier, format):
+        self.identifier = URIRef(identifier)
+        self.format = format
+        self.lines = {}
+        self.size = 0
+
+    def addN(self, quads):
+        lines = self.lines
+        size = 0
+        for s, p, o, _ in quads:
+            if self.format == "application/n-quads":
+                line = _nq_row((s, p, o), self.identifier)
+            else:
+                line = _nt_row((s, p, o))
+            if line not in lines:
+                lines[line] = None
+                size += len(line)
+        self.size += size
+
+    def bind(self, prefix, namespace, *args, **kwargs):
+        pass
+
+    def drain(self):
+        lines = "".join(self.lines)
+        self.lines = {}
+        self.size = 0
+        return lines
+
+    def end(self):
+        return self.drain()
+
+
+class LineStream:
+    """
+    An iterable of N-Triples/N-Quads (or JSON-LD) text chunks for a STEP
+    document.
+
+    The header is parsed, and conversion started (which resolves the
+    schema), on construction, so a malformed header fails before a
+    response is committed to. The header's triples are yielded on their
+    own so the first byte goes out immediately; entities are then parsed,
+    converted and written in chunks of roughly `chunk_size` characters.
+
+    A malformed entity is only found as the stream reaches it, and raises
+    MalformedInputError from the iteration, after the chunks before it.
+    Its response can't be made a 422 by then: a server sending the
+    response chunked (gunicorn does) drops the connection without the
+    final chunk, so clients see an incomplete transfer, not a short body.
+
+    Those of `profiles` with an enricher are applied along the way; their
+    triples come last. `content_profiles` are those and the IFC version.
+    Blank nodes are labelled `bnode_prefix` and a number, if it is given.
+
+    The stream holds a pooled parser until it is exhausted or closed.
+    """
+    def __init__(self, data, base_uri, format, profiles=(), chunk_size=CHUNK_SIZE, bnode_prefix=None):
+        if format not in STREAMING_FORMATS:
+            raise ValueError("{format} is not a streamable format".format(format=format))
+        self.chunk_size = chunk_size
+        self.sink = JSONLDSink(base_uri) if format == "application/json" else LineSink(base_uri, format)
+        profiles = native_profiles(profiles)
+        self.client = IFCLDClient(self.sink, [ENRICHERS[profile]() for profile in profiles],
+                                  batch_size=BATCH_SIZE, data=data, bnode_prefix=bnode_prefix)
+        self._resources = ExitStack()
+        try:
+            parser = self._resources.enter_context(parser_pool.parser())
+            self._steps = FileVisitor().iter_visit(self.client, parse_step(parser, data))
+            next(self._steps)
+        except:
+            self.close()
+            raise
+        self.ifc_version = URIRef(self.client.vocab_uri + "#")
+        self.content_profiles = set([self.ifc_version]).union(profiles)
+
+    def __iter__(self):
+        try:
+            self.client.flush()
+            yield self.sink.drain()
+            for _ in self._steps:
+                if self.sink.size >= self.chunk_size:
+                    yield self.sink.drain()
+            rest = self.sink.end()
+            if rest:
+                yield rest
+        except (LexError, SyntaxError):
+            raise MalformedInputError("Unable to parse input.")
+        finally:
+            self.close()
+
+    def close(self):
+        self._resources.close()
@@ -3,7 +3,8 @@
 
 from urllib import request
 from rdflib import Graph
-import json
+
+from .schema_store import schema_store
 
 class Client:
 
@@ -38,13 +39,11 @@ def get_schema_graph(schema_name):
 
 
 def get_offset_map(schema_name):
-    with request.urlopen("http://ifc-ld.org/schemas/{schema_name}.offsets.json".format(schema_name=schema_name)) as response:
-        return json.loads(response.read())
+    return schema_store.get(schema_name, "offsets").data
     
 
 def get_ordered_attribute_set(schema_name):
-    with request.urlopen("http://ifc-ld.org/schemas/{schema_name}.ordered.json".format(schema_name=schema_name)) as response:
-        return json.loads(response.read())
+    return schema_store.get(schema_name, "ordered").data
 
 def inline_document_loader(doc, options={}):
     return {"contentType": "application/json",
@@ -12,18 +12,33 @@ class IVisitor(object):
 
 class FileVisitor(IVisitor):
     def visit(self, client, file):
+        for _ in self.iter_visit(client, file):
+            pass
+
+    def iter_visit(self, client, file):
+        """
+        Like visit(), but yields once the file has begun and after every
+        entity, so callers can drain what the client produced so far.
+        """
         client.begin_file(file, 0)
+        yield file
         for i, section in enumerate(file.sections):
-            SectionVisitor().visit(client, section, i)
+            yield from SectionVisitor().iter_visit(client, section, i)
         client.end_file(file, 0)
+        yield file
 
 
 class SectionVisitor(IVisitor):
     def visit(self, client, section, offset):
+        for _ in self.iter_visit(client, section, offset):
+            pass
+
+    def iter_visit(self, client, section, offset):
         client.begin_section(section, offset)
         for i, entity in enumerate(section.entities):
             if hasattr(entity, 'type_name'):
                SimpleEntityVisitor().visit(client,  entity, i)  
+               yield entity
             else:
                 raise Exception("A complex STEP entity with no distinct type name was found. No logic built to support this condition. Please raise an issue on Github, along with your example, if you believe this case should be addressed")
         client.end_section(section, offset)
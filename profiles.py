@@ -1,42 +1,250 @@
-# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks 
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
 # SPDX-License-Identifier: AGPL-3.0
 
-from urllib import request
+"""
+SHACL profiles, and the registry they are looked up in.
+
+The profile index and each profile's rules (parsed once per IFC version)
+are kept in memory and refreshed once their TTL runs out, so enriching a
+graph does no network I/O or Turtle parsing. Rules are compiled into
+native transforms (see shacl_rules) where they can be, and run by pyshacl
+otherwise. A local directory can stand
+in for the profile server: an `index.json` there replaces the published
+index, and a rules file named like the last segment of a profile's URL
+replaces the published rules.
+"""
+
+import os
 import json
+import time
+import logging
+import threading
+from pathlib import Path
+from urllib import request
+from urllib.parse import urlsplit
 
+from cachetools import LRUCache
 from pyshacl import Validator
-from rdflib import Graph, Namespace
+from rdflib import ConjunctiveGraph, Graph, Namespace, URIRef, OWL, RDF, RDFS, DCTERMS
+
+from shacl_rules import compile_rules, footprint, UnsupportedRules
+
+logger = logging.getLogger(__name__)
+
+PROFILE_INDEX_URL = os.environ.get("IFCLD_PROFILE_INDEX_URL", "http://ifc-ld.org/profiles/index.json")
+PROFILE_DIR = os.environ.get("IFCLD_PROFILE_DIR")
+PROFILE_TTL = int(os.environ.get("IFCLD_PROFILE_TTL", 24 * 60 * 60))
+PROFILE_TIMEOUT = float(os.environ.get("IFCLD_PROFILE_TIMEOUT", 10))
+INDEX = "index.json"
+
 
 def add_profile(graph, rule_graph):
-    v = Validator(graph, shacl_graph=rule_graph, 
+    v = Validator(graph, shacl_graph=rule_graph,
                   options={"advanced": True, "inplace": True})
     v.run()
-    
+
+
+def parse_profile(data, ifc_version_uri):
+    # we need to append specific ifc version prefix (the alternative to one module per ifc version)
+    data = "@prefix ifc: <{}> .\n".format(ifc_version_uri).encode() + data
+    graph = Graph().parse(data=data, format="turtle")
+    # pyshacl adds these to every shapes graph; adding them up front keeps
+    # a graph shared between requests from being written to by them
+    graph.add((OWL.Class, RDFS.subClassOf, RDFS.Class))
+    graph.add((OWL.DatatypeProperty, RDFS.subClassOf, RDF.Property))
+    return graph
+
+
+class Profile:
+    """
+    A profile's rule graph, with its rules compiled if they can be, and
+    the footprint of its shapes if it can be bounded.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        try:
+            self.rules = compile_rules(graph)
+        except UnsupportedRules as e:
+            logger.info("Applying profile rules with pyshacl: %s", e)
+            self.rules = None
+        self.footprint = footprint(graph)
+
+    def apply(self, graph, narrow=None):
+        """
+        Apply the profile's rules to `graph`. Narrowed, they run on a
+        scratch graph of just the part of each context they can read
+        (extracted again, and the rules rerun, while what they infer leads
+        further), and what they infer is merged back. By default only pyshacl runs are
+        narrowed: compiled rules find their focus nodes through the type
+        index already, so copying their footprint out only costs time.
+        """
+        if narrow is None:
+            narrow = self.rules is None
+        if not narrow or self.footprint is None:
+            return self._apply(graph)
+        for context in list(graph.contexts()) if isinstance(graph, ConjunctiveGraph) else [graph]:
+            seeds = self.footprint.focus_nodes(context)
+            while True:
+                scratch = self.footprint.extract(context, seeds)
+                extracted = set(scratch)
+                self._apply(scratch)
+                inferred = [triple for triple in scratch if triple not in extracted]
+                # chained rules: what they inferred may lead out of the scratch graph
+                reached = self.footprint.reached(scratch, inferred)
+                if reached <= seeds:
+                    break
+                seeds |= reached
+            context.addN((s, p, o, context) for s, p, o in inferred)
+
+    def _apply(self, graph):
+        if self.rules is None:
+            add_profile(graph, self.graph)
+        else:
+            self.rules.apply(graph)
+
+
+class ProfileRegistry:
+    """
+    The profile index, and each (profile, IFC version)'s Profile.
+
+    Entries older than `ttl` seconds are reloaded on their next lookup; if
+    that fails, the stale copy is kept (and retried after another TTL).
+    Only lookups of the entry being loaded wait on it: one being reloaded
+    is served from its stale copy meanwhile. Fetches taking longer than
+    `timeout` seconds fail. `hits` and `misses` count lookups answered
+    from memory and those that had to load; each load logs them.
+    """
+    def __init__(self, index_url=PROFILE_INDEX_URL, directory=PROFILE_DIR, ttl=PROFILE_TTL, maxsize=64,
+                 timeout=PROFILE_TIMEOUT):
+        self.index_url = index_url
+        self.directory = Path(directory) if directory else None
+        self.ttl = ttl
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._index = {}
+        self._profiles = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()             # guards the entries, _locks and counts, never held over I/O
+        self._locks = {}                          # key: lock held while its entry is loaded
+
+    def supported_profiles(self):
+        return self._get(self._index, INDEX, self._load_index)
+
+    def profile(self, profile_uri, ifc_version_uri):
+        """
+        A profile in the index, for an IFC version. Shared by every caller;
+        don't modify its graph.
+        """
+        details = self.supported_profiles()[profile_uri]
+        return self._get(self._profiles, (profile_uri, str(ifc_version_uri)),
+                         lambda: Profile(parse_profile(self._read(details["url"]), ifc_version_uri)))
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "profiles": len(self._profiles)}
+
+    def clear(self):
+        with self._lock:
+            self._index.clear()
+            self._profiles.clear()
+
+    def _get(self, entries, key, load):
+        """
+        The value of `key` in `entries`, (re)loaded by `load` first if it
+        is missing or expired.
+        """
+        with self._lock:
+            entry = entries.get(key)
+            lock = self._locks.setdefault(key, threading.Lock())
+        if entry is not None and not self._expired(entry):
+            return self._hit(entry)
+        if entry is not None and not lock.acquire(blocking=False):
+            return self._hit(entry)         # another thread is reloading it
+        if entry is None:
+            lock.acquire()
+        try:
+            with self._lock:
+                entry = entries.get(key)
+            if entry is not None and not self._expired(entry):
+                return self._hit(entry)     # loaded while we waited
+            entry = self._load(key, entry, load)
+            with self._lock:
+                entries[key] = entry
+            logger.info("Loaded profile data %s; registry: %s", key, self.stats())
+            return entry[0]
+        finally:
+            lock.release()
+
+    def _expired(self, entry):
+        return time.monotonic() - entry[1] > self.ttl
+
+    def _hit(self, entry):
+        with self._lock:
+            self.hits += 1
+        return entry[0]
+
+    def _load(self, key, entry, load):
+        """
+        A freshly loaded (value, loaded_at) pair for `key`, or, if loading
+        fails, the stale `entry` again.
+        """
+        with self._lock:
+            self.misses += 1
+        now = time.monotonic()
+        try:
+            return (load(), now)
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning("Reloading profile data %s failed (%s), keeping the cached copy", key, e)
+            return (entry[0], now)
+
+    def _load_index(self):
+        return json.loads(self._read(self.index_url, INDEX))
+
+    def _read(self, url, name=None):
+        if self.directory is not None:
+            path = self.directory / (name or Path(urlsplit(url).path).name)
+            if path.is_file():
+                return path.read_bytes()
+        with request.urlopen(url, timeout=self.timeout) as response:
+            return response.read()
+
+
+profile_registry = ProfileRegistry()
+
 
 def get_supported_profiles():
-    with request.urlopen("http://ifc-ld.org/profiles/index.json") as response:
-        return json.loads(response.read())
+    return profile_registry.supported_profiles()
 
 
-def get_profile_graph(profile_location_uri, ifc_version_uri):
-    with request.urlopen(profile_location_uri) as response:
-        data = response.read()
-        # we need to append specific ifc version prefix (the alternative to one module per ifc version)
-        data = "@prefix ifc: <{}> .\n".format(ifc_version_uri).encode() + data
-        return Graph().parse(data=data)
-    
+def get_profile(profile_uri, ifc_version_uri):
+    return profile_registry.profile(profile_uri, ifc_version_uri)
+
 
 def enrich_graph(graph, accept_profiles, ifc_version):
     added_profiles = set([])
+    remaining_profiles = []
     for profile_uri in accept_profiles:
+        if (graph.identifier, DCTERMS.conformsTo, URIRef(profile_uri)) in graph:
+            added_profiles.add(profile_uri)     # applied as the graph was parsed
+        else:
+            remaining_profiles.append(profile_uri)
+    if not remaining_profiles:
+        return added_profiles
+
+    try:
         supported_profiles = get_supported_profiles()
+    except Exception as e:
+        logger.warning("Unable to load the profile index: %s", e)
+        return added_profiles
+    for profile_uri in remaining_profiles:
         if profile_uri in supported_profiles:
-            try: 
+            try:
                 profile_details = supported_profiles[profile_uri]
-                profile_graph = get_profile_graph(profile_details["url"], ifc_version)
-                add_profile(graph, profile_graph)
+                get_profile(profile_uri, ifc_version).apply(graph)
                 graph.bind(profile_details["prefix"], profile_uri)
                 added_profiles.add(profile_uri)
             except:
                 continue
-    return added_profiles
\ No newline at end of file
+    return added_profiles
@@ -0,0 +1,194 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Content-addressed cache of conversion results.
+
+A result is keyed by a hash of the request body and of everything the
+conversion was negotiated with: the input and output formats, the set of
+acceptable profiles and the base URI. Its ETag is the hash of the result
+itself, so it only ever names those exact bytes.
+"""
+
+import os
+import json
+import hashlib
+import time
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from collections import namedtuple
+
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE = os.environ.get("IFCLD_RESULT_CACHE", "memory")
+RESULT_CACHE_SIZE = int(os.environ.get("IFCLD_RESULT_CACHE_SIZE", 256))
+RESULT_CACHE_DIR = os.environ.get("IFCLD_RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ifcld-results"))
+
+CachedResult = namedtuple("CachedResult", ["content", "content_profiles", "etag"])
+
+EVICT_TO = 0.9                  # of a disk cache's max size, what eviction brings it down to
+RESCAN_INTERVAL = 60            # seconds after which a disk cache's size is read from the directory again
+
+
+def cache_key(data, input_format, output_format, acceptable_profiles, base_uri):
+    parts = [hashlib.sha256(data).hexdigest(), input_format, output_format,
+             ",".join(sorted(set(acceptable_profiles))), base_uri]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """
+    An LRU of results, bounded by the total size of their content.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._cache = LRUCache(maxsize=max_size, getsizeof=lambda result: len(result.content))
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def put(self, key, result):
+        with self._lock:
+            try:
+                self._cache[key] = result
+            except ValueError:
+                pass    # larger than the whole cache
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+class DiskBackend:
+    """
+    One file per result, shared by every process pointed at `directory`.
+    A hit refreshes the file's modification time; when the directory grows
+    past `max_size`, the least recently used files are removed, down to
+    EVICT_TO of it. Results are `record`s: namedtuples of their `content`
+    and JSON-able fields.
+
+    The directory's size is kept as a running total of what this process
+    writes, so a put doesn't list the directory: that's only done to
+    evict, and every RESCAN_INTERVAL seconds, to count in what other
+    processes wrote and removed since.
+    """
+    def __init__(self, directory, max_size, record=CachedResult):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.record = record
+        self._size = None
+        self._scanned_at = None
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        path = self.directory / key
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                content = f.read()
+            os.utime(path)
+            return self.record(content=content, **header)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def put(self, key, result):
+        if len(result.content) > self.max_size:
+            return
+        header = json.dumps({field: getattr(result, field) for field in result._fields if field != "content"})
+        header = header.encode("utf-8") + b"\n"
+        path = self.directory / key
+        tmp = self.directory / "{}.{}.tmp".format(key, os.getpid())
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(result.content)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp, path)
+        with self._lock:
+            if self._size is not None:
+                self._size += len(header) + len(result.content) - replaced
+            if self._size is None or self._size > self.max_size or \
+                    time.monotonic() - self._scanned_at > RESCAN_INTERVAL:
+                self._evict()
+
+    def clear(self):
+        for path in self.directory.iterdir():
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._size = None
+
+    def _evict(self):
+        """
+        Read the directory's size, and if it is over `max_size`, remove the
+        least recently used files until it is down to EVICT_TO of that.
+        """
+        entries = []
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        size = sum(entry[1] for entry in entries)
+        if size > self.max_size:
+            for _, entry_size, path in sorted(entries):
+                if size <= self.max_size * EVICT_TO:
+                    break
+                path.unlink(missing_ok=True)
+                size -= entry_size
+        self._size = size
+        self._scanned_at = time.monotonic()
+
+
+class ResultCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entry_size(self):
+        return self.backend.max_size
+
+    def get(self, key):
+        result = self.backend.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key, content, content_profiles):
+        result = CachedResult(content, sorted(str(profile) for profile in content_profiles if profile),
+                              hashlib.sha256(content).hexdigest())
+        try:
+            self.backend.put(key, result)
+        except OSError as e:
+            logger.warning("Unable to cache result: {}".format(e))
+        return result
+
+
+def make_result_cache(kind=RESULT_CACHE, size=RESULT_CACHE_SIZE, directory=RESULT_CACHE_DIR):
+    """
+    A ResultCache with `kind` ("memory" or "disk") backend holding up to
+    `size` MB of results, or None if `kind` is empty or `size` is 0.
+    """
+    if not kind or not size:
+        return None
+    if kind == "memory":
+        return ResultCache(MemoryBackend(size * 1024 * 1024))
+    if kind == "disk":
+        return ResultCache(DiskBackend(directory, size * 1024 * 1024))
+    raise ValueError("Unknown result cache backend {kind}".format(kind=kind))
+
+
+result_cache = make_result_cache()
@@ -1,2 +1,27 @@
 # SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks 
-# SPDX-License-Identifier: AGPL-3.0
\ No newline at end of file
+# SPDX-License-Identifier: AGPL-3.0
+
+from rdflib.serializer import Serializer
+from rdflib.plugin import register
+
+
+register(
+    "text/turtle",
+    Serializer,
+    "serializers.turtle",
+    "TurtleSerializer",
+)
+
+register(
+    "application/json",
+    Serializer,
+    "serializers.jsonld",
+    "JSONLDSerializer",
+)
+
+register(
+    "application/x-ifcld-rdf",
+    Serializer,
+    "serializers.binary",
+    "BinarySerializer",
+)
@@ -0,0 +1,104 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+The compact binary RDF format (see parsers/binary.py), written a block of
+quads at a time: the terms those quads bring into the dictionary, and
+then the quads as term numbers.
+"""
+
+# Standard Library
+import zlib
+
+# External Dependencies
+from rdflib import URIRef, BNode, Literal
+from rdflib.serializer import Serializer
+
+# Internal Dependencies
+from parsers.binary import (MAGIC, VERSION, COMPRESSED, NAMESPACES, TERMS, QUADS, IRI, BNODE, LITERAL,
+                            LANGUAGE_LITERAL, HEADER, BLOCK, COUNT, uint32s, to_bytes)
+
+BLOCK_SIZE = 64 * 1024                      # quads per block
+
+
+class BinarySerializer(Serializer):
+    def serialize(self, stream, base=None, encoding=None, compress=True, block_size=BLOCK_SIZE, **args):
+        """
+        A context-aware graph is written with the graph each quad is in
+        (none for its default graph), any other as quads in the graph it
+        is named by (if by an IRI).
+        """
+        writer = _Writer(stream, compress)
+        writer.namespaces(self.store.namespaces())
+        if self.store.context_aware:
+            default = self.store.default_context.identifier
+            quads = ((s, p, o, None if context.identifier == default else context.identifier)
+                     for context in self.store.contexts() for s, p, o in context)
+        else:
+            identifier = self.store.identifier if isinstance(self.store.identifier, URIRef) else None
+            quads = ((s, p, o, identifier) for s, p, o in self.store)
+        block = []
+        for quad in quads:
+            block.append(quad)
+            if len(block) == block_size:
+                writer.quads(block)
+                block = []
+        if block:
+            writer.quads(block)
+
+
+class _Writer:
+    def __init__(self, stream, compress):
+        self.stream = stream
+        self.compress = compress
+        self.ids = {None: 0}
+        stream.write(HEADER.pack(MAGIC, VERSION, COMPRESSED if compress else 0))
+
+    def block(self, kind, payload):
+        if self.compress:
+            payload = zlib.compress(payload, 1)
+        self.stream.write(BLOCK.pack(kind, len(payload)))
+        self.stream.write(payload)
+
+    def namespaces(self, namespaces):
+        self.block(NAMESPACES, "".join("{} {}\n".format(prefix, namespace)
+                                       for prefix, namespace in namespaces).encode("utf-8"))
+
+    def quads(self, quads):
+        ids = self.ids
+        kinds, extras, lengths, text = bytearray(), uint32s(), uint32s(), []
+        numbers = uint32s()
+
+        def intern(term):
+            # a literal's datatype goes into the dictionary before it
+            term_id = ids.get(term)
+            if term_id is not None:
+                return term_id
+            if isinstance(term, Literal):
+                if term.language:
+                    kinds.append(LANGUAGE_LITERAL)
+                    extras.append(len(term.language))
+                    value = term.language + term
+                else:
+                    extra = intern(term.datatype)
+                    kinds.append(LITERAL)
+                    extras.append(extra)
+                    value = str(term)
+            else:
+                kinds.append(BNODE if isinstance(term, BNode) else IRI)
+                extras.append(0)
+                value = str(term)
+            lengths.append(len(value))
+            text.append(value)
+            term_id = ids[term] = len(ids)
+            return term_id
+
+        for s, p, o, c in quads:
+            numbers.append(intern(s))
+            numbers.append(intern(p))
+            numbers.append(intern(o))
+            numbers.append(intern(c))
+        if kinds:
+            self.block(TERMS, COUNT.pack(len(kinds)) + bytes(kinds) + to_bytes(extras) + to_bytes(lengths)
+                       + "".join(text).encode("utf-8", "surrogatepass"))
+        self.block(QUADS, to_bytes(numbers))
@@ -0,0 +1,24 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+IFC-LD JSON-LD (see parsers/step/jsonld.py) for conversions that are
+parsed into a graph: other input formats, and STEP enriched with profiles
+that aren't applied natively.
+"""
+
+# External Dependencies
+from rdflib.serializer import Serializer
+
+# Internal Dependencies
+from parsers.step.jsonld import JSONLDSink
+
+
+class JSONLDSerializer(Serializer):
+    def serialize(self, stream, base=None, encoding=None, **args):
+        sink = JSONLDSink(self.store.identifier)
+        for prefix, namespace in self.store.namespaces():
+            sink.bind(prefix, namespace)
+        # in one batch, so that every blank node with one referrer is nested
+        sink.addN((s, p, o, None) for s, p, o in self.store)
+        stream.write(sink.end().encode(encoding or "utf-8"))
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Turtle for IFC-LD graphs, written in one pass over the graph.
+
+rdflib's Turtle serializer sorts the subjects, and looks up every node's
+predicates and referrers in the graph as it writes. IFC-LD graphs have a
+known shape: a subject per STEP entity, and blank nodes (value nodes and
+list cells) with exactly one referrer each. So the graph is read once,
+into each subject's predicates and objects, and written in the order it
+was read: blank nodes with one referrer inline, as `[ ... ]` or, for
+lists, `( ... )`, where they are referred to. Other graphs come out right
+too, if less compactly.
+"""
+
+# Standard Library
+import re
+
+# External Dependencies
+from rdflib import BNode, Literal, RDF, XSD
+from rdflib.serializer import Serializer
+
+PREFIX = re.compile(r"([A-Za-z][A-Za-z0-9_\-]*)?$")
+LOCAL_NAME = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_\-]*$")
+DECIMAL = re.compile(r"[+-]?[0-9]*\.[0-9]+$")
+
+
+class TurtleSerializer(Serializer):
+    def serialize(self, stream, base=None, encoding=None, **args):
+        stream.write(_Writer(self.store).write().encode(encoding or "utf-8"))
+
+
+class _Writer:
+    def __init__(self, graph):
+        self.namespaces = {str(namespace): prefix for prefix, namespace in graph.namespaces()
+                           if PREFIX.match(prefix)}
+        self.used = {}                          # prefix: namespace, of those written
+        self.names = {}                         # URIRef: how it is written
+        self.literals = {}                      # Literal: how it is written
+        self.labels = {}                        # BNode: label
+        self.done = set()                       # blank nodes written
+        self.subjects = {}                      # subject: [predicate, object, predicate, object, ...]
+        self.references = {}                    # blank node: times it is an object
+        for s, p, o in graph:
+            po = self.subjects.get(s)
+            if po is None:
+                po = self.subjects[s] = []
+            po.append(p)
+            po.append(o)
+            if isinstance(o, BNode):
+                self.references[o] = self.references.get(o, 0) + 1
+
+    def write(self):
+        body = []
+        for subject in self.subjects:
+            if not (isinstance(subject, BNode) and self.references.get(subject) == 1):
+                self.statement(subject, body)
+        # blank nodes only referred to by each other
+        for subject in self.subjects:
+            if isinstance(subject, BNode) and subject not in self.done:
+                self.statement(subject, body)
+        header = ["@prefix {}: <{}> .\n".format(prefix, namespace) for prefix, namespace in sorted(self.used.items())]
+        return "".join(header) + "\n" + "".join(body)
+
+    def statement(self, subject, body):
+        if isinstance(subject, BNode):
+            self.done.add(subject)
+            body.append(self.label(subject))
+        else:
+            body.append(self.name(subject))
+        predicates = self.predicates(subject, " ;\n    ")
+        body.append(" " + predicates + " .\n\n" if predicates else " .\n\n")
+
+    def predicates(self, subject, separator):
+        po = self.subjects.get(subject, ())
+        if len(po) == 2:
+            return self.verb(po[0]) + " " + self.object(po[1])
+        grouped = {}
+        for i in range(0, len(po), 2):
+            grouped.setdefault(po[i], []).append(po[i + 1])
+        return separator.join(self.verb(p) + " " + ", ".join(self.object(o) for o in objects)
+                              for p, objects in grouped.items())
+
+    def verb(self, predicate):
+        return "a" if predicate == RDF.type else self.name(predicate)
+
+    def object(self, node):
+        if isinstance(node, Literal):
+            text = self.literals.get(node)
+            if text is None:
+                # a decimal like 1e-05 (as Python writes floats) would read back plain as a double
+                plain = node.datatype != XSD.decimal or DECIMAL.match(node) is not None
+                text = self.literals[node] = node._literal_n3(use_plain=plain, qname_callback=self.qname)
+            return text
+        if isinstance(node, BNode):
+            if self.references.get(node) != 1 or node in self.done:
+                return self.label(node)
+            items = self.collection(node)
+            if items is not None:
+                return "( " + " ".join(self.object(item) for item in items) + " )"
+            self.done.add(node)
+            predicates = self.predicates(node, " ; ")
+            return "[ " + predicates + " ]" if predicates else "[]"
+        return self.name(node)
+
+    def collection(self, node):
+        """
+        The items of the rdf:List starting at `node`, if it is one that
+        can be written as `( ... )`: every cell a blank node with one
+        referrer and nothing but an rdf:first and an rdf:rest.
+        """
+        items, cells = [], []
+        while node != RDF.nil:
+            if not isinstance(node, BNode) or self.references.get(node) != 1 or node in self.done:
+                return None
+            po = self.subjects.get(node, ())
+            if len(po) != 4 or {po[0], po[2]} != {RDF.first, RDF.rest}:
+                return None
+            first, rest = (po[1], po[3]) if po[0] == RDF.first else (po[3], po[1])
+            items.append(first)
+            cells.append(node)
+            node = rest
+        self.done.update(cells)
+        return items
+
+    def name(self, uri):
+        text = self.names.get(uri)
+        if text is None:
+            text = self.names[uri] = self.qname(uri) or "<{}>".format(uri)
+        return text
+
+    def qname(self, uri):
+        split = max(uri.rfind("#"), uri.rfind("/")) + 1
+        prefix = self.namespaces.get(uri[:split])
+        if prefix is None or not LOCAL_NAME.match(uri, split):
+            return None
+        self.used[prefix] = uri[:split]
+        return prefix + ":" + uri[split:]
+
+    def label(self, node):
+        label = self.labels.get(node)
+        if label is None:
+            label = self.labels[node] = "_:b{}".format(len(self.labels))
+        return label
@@ -1,20 +1,39 @@
 # SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks 
 # SPDX-License-Identifier: AGPL-3.0
 
+import os
 import uuid
+import logging
 
 
-from flask import Flask, request, abort, Response
-from rdflib import ConjunctiveGraph, Graph
-from rdflib.plugin import plugins
+from flask import Flask, request, abort, Response, jsonify, url_for
+from rdflib.plugin import plugins, get as get_plugin
 from rdflib.parser import Parser
 from rdflib.serializer import Serializer
 from mimeparse import best_match, parse_mime_type
 
 import parsers
-from profiles import enrich_graph, get_supported_profiles
+from parsers.step.streaming import LineStream
+from parsers.step.parallel import ParallelStream, is_parallel, start_executor
+from parsers.step.dispatch import get_dispatch_table
+from parsers.step.schema_store import SCHEMA_NAMES
+from parsers.step.references import select
+from parsers.step.errors import UnknownEntityError
+from parsers.step.enrichers import native_profiles
+from conversion import convert, is_streamable, parse_graph, serialize_graph, ConversionError
+from profiles import get_supported_profiles
+from jobs import get_job_manager, QueueFull, QUEUED, RUNNING, DONE, CANCELLED
+from result_cache import result_cache, cache_key
+from model_store import model_store, model_id, model_etag, STREAMED_FORMATS
+from uploads import spool, spool_file, shared_file, shared_path, FileInput
+
+# the service's loggers, and its modules' (the parser's conversion statistics among them),
+# all go to stderr, under gunicorn as under Flask's own server
+logging.basicConfig(level=os.environ.get("IFCLD_LOG_LEVEL", "INFO").upper(),
+                    format="[%(asctime)s] [%(process)d] [%(levelname)s] %(name)s: %(message)s")
 
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get("IFCLD_MAX_CONTENT_LENGTH", 256)) * 1024 * 1024 or None
 
 
 def supported_mimetypes(rdflib_type):
@@ -30,11 +49,67 @@ def supported_mimetypes(rdflib_type):
         except:
             continue
 
-def get_ifc_version_uri(graph):
-    from rdflib import DCTERMS
-    for value in graph.objects(predicate=DCTERMS.conformsTo):
-        if str(value).startswith("http://ifc-ld.org/schemas/"):
-            return value
+def get_acceptable_profiles(request):
+    if request.headers.get('accept-profile'):
+        return [profile.strip() for profile in request.headers['accept-profile'].split(",")]
+    return []
+
+def get_data(request):
+    """
+    The request's body: the file under the shared directory named by the
+    `path` query parameter, if there is one, or what was uploaded (large
+    bodies spooled to disk). Either may be memory-mapped; see uploads.py.
+    """
+    path = request.args.get('path')
+    if path is None:
+        return spool(request.stream)
+    return by_reference(shared_file, path)
+
+def get_job_data(request, directory):
+    """
+    The request's body for a job's worker to map itself: small bodies as
+    bytes, otherwise a FileInput of the file under the shared directory,
+    or of the one a large body is spooled to (in `directory`).
+    """
+    path = request.args.get('path')
+    if path is None:
+        return spool_file(request.stream, directory=directory)
+    target = by_reference(shared_path, path)
+    return FileInput(target, False) if os.path.getsize(target) else b""
+
+def by_reference(read, path):
+    """
+    What `read` makes of the file at `path` under the shared directory.
+    """
+    try:
+        return read(path)
+    except PermissionError as e:
+        abort(Response(str(e), 403))                                         # Forbidden
+    except OSError:
+        abort(Response("Unable to read {path}.".format(path=path), 422))     # Unprocessable Entity
+
+def get_selection(request, input_format):
+    """
+    The entities to convert (with those they refer to) rather than the
+    whole model: the GlobalIds or STEP ids (`#12`) of the `select` query
+    parameter, repeated or comma-separated.
+    """
+    seeds = [seed.strip() for value in request.args.getlist('select') for seed in value.split(",") if seed.strip()]
+    if seeds and input_format != "model/step":
+        abort(Response("Entities can only be selected from STEP input.", 400))  # Bad Request
+    return seeds
+
+def selected_data(request, data, input_format):
+    """
+    The request's `data`, cut down to the selected entities if there are any.
+    """
+    seeds = get_selection(request, input_format)
+    if not seeds:
+        return data
+    try:
+        return select(data, seeds)
+    except UnknownEntityError as e:
+        abort(Response(str(e), 422))                                         # Unprocessable Entity
 
 def get_content_location(request):
     """
@@ -44,6 +119,123 @@ def get_content_location(request):
         "http://ifc-ld.org/graphs/{guid}".format(guid=uuid.uuid4())
 
 
+def negotiated_response(content, output_format, content_profiles):
+    resp = Response(content, mimetype=output_format)
+    resp.headers['Content-Profile'] = ','.join(filter(None, content_profiles))
+    resp.headers['Vary'] = ",".join(set(request.headers.keys(lower=True))\
+            .intersection(set(["accept", "accept-profile", "content-location"])))
+    return resp
+
+
+def cached_response(result, output_format):
+    """
+    A cached result, or 304 Not Modified if the client already holds it.
+    (A conversion is safe to repeat, so If-None-Match is honoured for POST
+    as it would be for GET, rather than failing the precondition.)
+    """
+    if request.if_none_match.contains(result.etag):
+        resp = negotiated_response(None, output_format, result.content_profiles)
+        resp.status_code = 304               # Not Modified
+    else:
+        resp = negotiated_response(result.content, output_format, result.content_profiles)
+    resp.set_etag(result.etag)
+    return resp
+
+
+def is_persisted(request):
+    """
+    Whether the converted model is to be stored, for GET /instances/{id}:
+    the `persist` query parameter, unless it is "0" or "false".
+    """
+    return request.args.get('persist', '0').lower() not in ("0", "false")
+
+
+def model_response(model, graph, output_format, acceptable_profiles):
+    """
+    The stored `model` (loaded as `graph`), enriched with whichever of
+    `acceptable_profiles` are supported, or 304 Not Modified if the client
+    already holds that.
+    """
+    content_profiles = served_profiles(model, acceptable_profiles)
+    etag = model_etag(model, output_format, content_profiles)
+    if request.if_none_match.contains(etag):
+        resp = negotiated_response(None, output_format, sorted(content_profiles))
+        resp.status_code = 304               # Not Modified
+    elif graph is None and output_format in STREAMED_FORMATS \
+            and set(acceptable_profiles) <= set(model.content_profiles):
+        # nothing to apply: written straight from the stored quads
+        resp = negotiated_response(model_store.stream(model, output_format), output_format, model.content_profiles)
+    else:
+        if graph is None:
+            graph = model_store.load(model, output_format)
+        content, applied = serialize_graph(graph, output_format, acceptable_profiles)
+        # a supported profile may still fail to apply: tag what was served
+        content_profiles = set(str(profile) for profile in applied if profile).union(model.content_profiles)
+        etag = model_etag(model, output_format, content_profiles)
+        resp = negotiated_response(content, output_format, sorted(content_profiles))
+    resp.set_etag(etag)
+    return resp
+
+
+def served_profiles(model, acceptable_profiles):
+    """
+    The profiles `model` will be reported as conforming to: those it was
+    stored with, and those of `acceptable_profiles` the profile index
+    supports, which are applied as it is served.
+    """
+    content_profiles = set(model.content_profiles)
+    remaining = set(acceptable_profiles) - content_profiles
+    if remaining:
+        try:
+            supported = get_supported_profiles()
+        except Exception:
+            supported = {}
+        content_profiles.update(profile for profile in remaining if profile in supported)
+    return content_profiles
+
+
+def persisted_response(data, input_format, output_format, acceptable_profiles):
+    """
+    Convert and store the model (with the profiles applied natively; the
+    others are applied as it is served), unless it is stored already, and
+    serve it with its Location: 201 Created, or 200 if it was already
+    there.
+    """
+    if model_store is None:
+        return abort(Response("Models are not stored by this service.", 501))  # Not Implemented
+    native = native_profiles(acceptable_profiles) if input_format == "model/step" else []
+    content_location = request.headers.get('content-location')
+    instance_id = model_id(data, input_format, content_location, native)
+    model, graph = model_store.get(instance_id), None
+    created = model is None
+    if created:
+        base_uri = content_location or "http://ifc-ld.org/graphs/{id}".format(id=instance_id)
+        graph = parse_graph(data, input_format, output_format, base_uri, native)
+        model = model_store.put(instance_id, graph)
+    resp = model_response(model, graph, output_format, acceptable_profiles)
+    if created and resp.status_code == 200:
+        resp.status_code = 201                # Created
+    resp.headers['Location'] = url_for('get_instance', instance_id=instance_id)
+    return resp
+
+
+def caching_stream(stream, key, content_profiles):
+    """
+    Pass a streamed result through, caching it once it is complete (unless
+    it grows too large to be worth holding on to along the way).
+    """
+    chunks, size = [], 0
+    for chunk in stream:
+        yield chunk
+        if chunks is not None:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > result_cache.max_entry_size:
+                chunks = None
+    if chunks is not None:
+        result_cache.put(key, "".join(chunks).encode("utf-8"), content_profiles)
+
+
 """
 Cache all available input and output mimetypes from rdflib
 """
@@ -51,47 +243,171 @@ input_mimetypes = list(supported_mimetypes(Parser))
 output_mimetypes = list(supported_mimetypes(Serializer))
 
 
-@app.route("/instances", methods=["POST"])
-def graphs():
+def negotiated_formats():
     input_format = best_match(input_mimetypes, request.headers['content-type'])
     output_format = best_match(output_mimetypes, request.headers['accept'])
 
     if not input_format:
-        return abort(415)                   # Unsupported Media Type
-    
+        abort(415)                          # Unsupported Media Type
+
     if not output_format:
-        return abort(406)                   # Not Acceptable
-    
-    if not request.data:
+        abort(406)                          # Not Acceptable
+
+    return input_format, output_format
+
+
+def preload():
+    """
+    Load what every conversion needs but no conversion changes: the rdflib
+    parser and serializer plugins, and each schema's artifacts and dispatch
+    table. (STEP parser tables are built on import, by the parser pool.)
+    """
+    for mimetype in input_mimetypes:
+        get_plugin(mimetype, Parser)
+    for mimetype in output_mimetypes:
+        get_plugin(mimetype, Serializer)
+    for schema_name in SCHEMA_NAMES:
+        try:
+            get_dispatch_table(schema_name)
+        except Exception as e:
+            app.logger.warning("Unable to preload schema {}: {}".format(schema_name, e))
+
+
+@app.route("/instances", methods=["POST"])
+def graphs():
+    input_format, output_format = negotiated_formats()
+
+    data = get_data(request)
+    if not data:
         return Response("No Content", 204)  # No Content
 
-    g = ConjunctiveGraph(identifier = get_content_location(request))
+    data = selected_data(request, data, input_format)
+    acceptable_profiles = get_acceptable_profiles(request)
 
-    try: 
-        g.parse(data=request.data, format=input_format)
-        ifc_version = get_ifc_version_uri(g)
-    except:
-        return abort(422)                    # Unprocessable Entity 
-    
-    content_profiles = set([ifc_version])
-    if request.headers.get('accept-profile'):
-        acceptable_profiles = request.headers['accept-profile'].split(",")
-        content_profiles = content_profiles.union(enrich_graph(g, acceptable_profiles, ifc_version))
+    if is_persisted(request):
+        try:
+            return persisted_response(data, input_format, output_format, acceptable_profiles)
+        except ConversionError as e:
+            if e.status == 422:
+                return abort(422)            # Unprocessable Entity
+            return abort(Response(e.message, e.status))
+
+    base_uri = get_content_location(request)
+
+    # only an explicit base URI makes a result reproducible, and so cacheable
+    key = None
+    if result_cache is not None and request.headers.get('content-location'):
+        key = cache_key(data, input_format, output_format, acceptable_profiles, base_uri)
+        result = result_cache.get(key)
+        if result is not None:
+            return cached_response(result, output_format)
+
+    if is_streamable(input_format, output_format, acceptable_profiles):
+        try:
+            # line-based output needs no graph: convert and write entity by entity
+            if is_parallel(data, output_format, acceptable_profiles):
+                stream = ParallelStream(data, base_uri, output_format)
+            else:
+                stream = LineStream(data, base_uri, output_format, acceptable_profiles)
+        except:
+            return abort(422)                # Unprocessable Entity
+        # only the header has been parsed: a malformed entity will raise mid-response,
+        # and the server then drops the connection before the chunked body is complete
+        content_profiles = stream.content_profiles
+        if key is not None:
+            stream = caching_stream(stream, key, content_profiles)
+        return negotiated_response(stream, output_format, content_profiles)
+
+    try:
+        content, content_profiles = convert(data, input_format, output_format,
+                                            base_uri, acceptable_profiles)
+    except ConversionError as e:
+        if e.status == 422:
+            return abort(422)                # Unprocessable Entity
+        return abort(Response(e.message, e.status))
+    if key is not None:
+        return cached_response(result_cache.put(key, content, content_profiles), output_format)
+    return negotiated_response(content, output_format, content_profiles)
+
+
+@app.route("/instances/<instance_id>", methods=["GET"])
+def get_instance(instance_id):
+    output_format = best_match(output_mimetypes, request.headers.get('accept', 'text/turtle'))
+    if not output_format:
+        abort(406)                          # Not Acceptable
+
+    model = model_store.get(instance_id) if model_store is not None else None
+    if model is None:
+        abort(404)
+
+    try:
+        return model_response(model, None, output_format, get_acceptable_profiles(request))
+    except ConversionError as e:
+        return abort(Response(e.message, e.status))
+
+
+def job_status(job, code):
+    resp = jsonify(job.describe())
+    resp.status_code = code
+    if job.status in (QUEUED, RUNNING):
+        resp.headers['Retry-After'] = '1'
+    return resp
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    input_format, output_format = negotiated_formats()
+
+    seeds = get_selection(request, input_format)
+    manager = get_job_manager()
+    # the job's worker maps a large model itself (and selects from it) rather than being sent a copy
+    data = get_job_data(request, manager.store.directory)
+    if not data:
+        return Response("No Content", 204)  # No Content
 
     try:
-        content = g.serialize(format=output_format)
-        resp =  Response(content, mimetype=output_format)
-        resp.headers['Content-Profile'] = ','.join(content_profiles)
-        resp.headers['Vary'] = ",".join(set(request.headers.keys(lower=True))\
-                .intersection(set(["accept", "accept-profile", "content-location"])))
+        job = manager.submit(data, input_format, output_format, get_content_location(request),
+                             get_acceptable_profiles(request), seeds)
+    except QueueFull:
+        resp = Response("Too many conversions in progress.", 503)  # Service Unavailable
+        resp.headers['Retry-After'] = '30'
         return resp
-    except: 
-        return abort(Response("Serialization failure. This is likely a bug.", 500))
+
+    resp = job_status(job, 202)                                    # Accepted
+    resp.headers['Location'] = url_for('get_job', job_id=job.id)
+    return resp
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    manager = get_job_manager()
+    job = manager.get(job_id) or abort(404)
+    if job.status == DONE:
+        try:
+            result = manager.result(job.id)
+        except FileNotFoundError:
+            # expired, and swept by another process, since its record was read
+            return abort(410)                                      # Gone
+        resp = Response(result, mimetype=job.output_format)
+        resp.headers['Content-Profile'] = ','.join(job.content_profiles)
+        return resp
+    if job.status in (QUEUED, RUNNING):
+        return job_status(job, 202)
+    if job.status == CANCELLED:
+        return job_status(job, 410)                                # Gone
+    return job_status(job, job.http_status)
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    job = get_job_manager().cancel(job_id) or abort(404)
+    return job_status(job, 202 if job.status in (QUEUED, RUNNING) else 200)
 
 
 if __name__ == '__main__':
     #from werkzeug.middleware.profiler import ProfilerMiddleware
     #app.wsgi_app = ProfilerMiddleware(app.wsgi_app)
+    start_executor()
     app.run(debug=False, host='0.0.0.0')
     app.logger.info("Supported input formats: {}".format(input_mimetypes))
     app.logger.info("Supported output formats: {}".format(output_mimetypes))
\ No newline at end of file
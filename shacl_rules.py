@@ -0,0 +1,483 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+A compiler of SHACL rules (SHACL-AF `sh:TripleRule`s and `sh:SPARQLRule`s)
+into Python transforms.
+
+pyshacl re-reads the shapes graph, re-parses every SPARQL rule once per
+focus node, and validates the whole data graph after applying the rules,
+on every run. Compiled, a profile's targets, node expressions and paths
+become closures and its SPARQL rules prepared queries, built once; applying
+them walks the focus nodes found through the graph's type index and does
+nothing else. Results match pyshacl's (with `advanced` and `inplace`):
+rules apply once each, in `sh:order`, each adding its triples only after
+it has been evaluated for every focus node.
+
+Rules using features outside that (conditions, filter shapes, SHACL
+functions, SPARQL-based targets) don't compile; run those with pyshacl.
+
+footprint() works out, from a shapes graph alone, which part of a data
+graph its shapes can read: the focus nodes of its targets, and their
+neighbourhood along the predicates its paths and queries follow, as far
+as they follow them. Rules (compiled or not) can run on a scratch graph
+holding just that instead of the whole model. A rule can make focus
+nodes of others (typing them as a later rule's target class, say), or
+link nodes the scratch graph doesn't hold the neighbourhood of, so the
+scratch graph is extracted again from those, and the rules run again on
+it, until they reach nothing more.
+"""
+
+import re
+from itertools import product
+from decimal import Decimal
+
+from rdflib import ConjunctiveGraph, Graph, Namespace, URIRef, Literal, BNode, Variable, OWL, RDF, RDFS
+from rdflib.paths import Path, SequencePath, AlternativePath, InvPath
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+
+SH = Namespace("http://www.w3.org/ns/shacl#")
+
+# as pyshacl decides whether a query refers to its focus node
+BIND_THIS = re.compile(r"([\s{}()])[\$\?]this", flags=re.M)
+
+UNSUPPORTED = (SH.condition, SH.filterShape, SH.target, SH.targetType)
+UNSUPPORTED_TYPES = (SH.SHACLFunction, SH.SPARQLFunction, SH.JSRule, SH.JSFunction, SH.SPARQLTarget,
+                     SH.SPARQLTargetType, SH.JSTarget, SH.JSTargetType)
+MAX_PATH_DEPTH = 10
+
+# shape references, along which validation goes on from a shape's value nodes
+NESTING = (SH.node, SH.property, SH.condition, SH.filterShape, SH.qualifiedValueShape,
+           SH["and"], SH["or"], SH["not"], SH.xone)
+# constraints comparing a path's values with a predicate's
+COMPARISONS = (SH.equals, SH.disjoint, SH.lessThan, SH.lessThanOrEquals)
+QUERIES = (SH.construct, SH.select, SH.ask)
+THIS = Variable("this")
+
+
+class UnsupportedRules(Exception):
+    pass
+
+
+def _one(sg, node, predicate):
+    values = set(sg.objects(node, predicate))
+    if len(values) != 1:
+        raise UnsupportedRules("{} needs exactly one {}".format(node, predicate))
+    return next(iter(values))
+
+
+def _order(sg, node):
+    values = list(sg.objects(node, SH.order))
+    if len(values) > 1 or (values and not isinstance(values[0], Literal)):
+        raise UnsupportedRules("{} has an invalid sh:order".format(node))
+    return Decimal(values[0].value) if values else Decimal("0.0")
+
+
+def compile_path(sg, path, depth=0):
+    """
+    A SHACL property path as a function of (graph, focus node) to the set
+    of value nodes it reaches.
+    """
+    if isinstance(path, URIRef):
+        return lambda graph, focus: set(graph.objects(focus, path))
+    if isinstance(path, Literal) or depth >= MAX_PATH_DEPTH:
+        raise UnsupportedRules("Invalid property path {}".format(path))
+
+    first = next(sg.objects(path, RDF.first), None)
+    if first is not None:
+        head = compile_path(sg, first, depth + 1)
+        rest = next(sg.objects(path, RDF.rest), RDF.nil)
+        if rest == RDF.nil:
+            if depth == 0:
+                raise UnsupportedRules("A sequence path needs at least two items")
+            return head
+        tail = compile_path(sg, rest, depth + 1)
+        return lambda graph, focus: set().union(*(tail(graph, node) for node in head(graph, focus)))
+
+    inverse = next(sg.objects(path, SH.inversePath), None)
+    if inverse is not None:
+        return lambda graph, focus: set(graph.subjects(inverse, focus))
+
+    alternatives = next(sg.objects(path, SH.alternativePath), None)
+    if alternatives is not None:
+        paths = [compile_path(sg, item, depth + 1) for item in sg.items(alternatives)]
+        if len(paths) < 2:
+            raise UnsupportedRules("An alternative path needs at least two items")
+        return lambda graph, focus: set().union(*(alternative(graph, focus) for alternative in paths))
+
+    for predicate, include_focus in ((SH.zeroOrMorePath, True), (SH.oneOrMorePath, False)):
+        repeated = next(sg.objects(path, predicate), None)
+        if repeated is not None:
+            return _closure(compile_path(sg, repeated, depth + 1), include_focus)
+
+    repeated = next(sg.objects(path, SH.zeroOrOnePath), None)
+    if repeated is not None:
+        step = compile_path(sg, repeated, depth + 1)
+        return lambda graph, focus: step(graph, focus) | {focus}
+
+    raise UnsupportedRules("Unsupported property path {}".format(path))
+
+
+def _closure(step, include_focus):
+    def nodes(graph, focus):
+        found = {focus} if include_focus else set()
+        pending = set(step(graph, focus))
+        while pending:
+            node = pending.pop()
+            if node not in found:
+                found.add(node)
+                pending.update(step(graph, node))
+        return found
+    return nodes
+
+
+def compile_expression(sg, expression, depth=0):
+    """
+    A SHACL node expression as a function of (graph, focus node) to the
+    nodes it evaluates to.
+    """
+    if expression == SH.this:
+        return lambda graph, focus: (focus,)
+    if isinstance(expression, (URIRef, Literal)):
+        constant = (expression,)
+        return lambda graph, focus: constant
+    if not isinstance(expression, BNode) or depth > 8:
+        raise UnsupportedRules("Unsupported node expression {}".format(expression))
+
+    union = next(sg.objects(expression, SH.union), None)
+    if union is not None:
+        parts = [compile_expression(sg, part, depth + 1) for part in sg.items(union)]
+        return lambda graph, focus: set().union(*(part(graph, focus) for part in parts))
+
+    intersection = next(sg.objects(expression, SH.intersection), None)
+    if intersection is not None:
+        parts = [compile_expression(sg, part, depth + 1) for part in sg.items(intersection)]
+        return lambda graph, focus: set(parts[0](graph, focus)).intersection(
+            *(part(graph, focus) for part in parts[1:])) if parts else set()
+
+    paths = [compile_path(sg, path) for path in sg.objects(expression, SH.path)]
+    if paths:
+        return lambda graph, focus: [node for path in paths for node in path(graph, focus)]
+
+    raise UnsupportedRules("Unsupported node expression {}".format(expression))
+
+
+def compile_targets(sg, shape):
+    """
+    A function of a graph to the focus nodes of `shape` in it.
+    """
+    nodes = set(sg.objects(shape, SH.targetNode))
+    classes = set(sg.objects(shape, SH.targetClass))
+    class_types = set(sg.subjects(RDFS.subClassOf, RDFS.Class)) | {RDFS.Class}
+    if class_types.intersection(sg.objects(shape, RDF.type)):
+        classes.add(shape)          # an implicit class target
+    subjects_of = set(sg.objects(shape, SH.targetSubjectsOf))
+    objects_of = set(sg.objects(shape, SH.targetObjectsOf))
+
+    def focus_nodes(graph):
+        found = set(nodes)
+        for target_class in classes:
+            found.update(graph.subjects(RDF.type, target_class))
+            for subclass in graph.transitive_subjects(RDFS.subClassOf, target_class):
+                if subclass != target_class:
+                    found.update(graph.subjects(RDF.type, subclass))
+        for predicate in subjects_of:
+            found.update(s for s, _ in graph.subject_objects(predicate))
+        for predicate in objects_of:
+            found.update(o for _, o in graph.subject_objects(predicate))
+        return found
+    return focus_nodes
+
+
+def _prefixes(sg, rule):
+    """
+    The SPARQL prefixes a rule declares through sh:prefixes, as pyshacl
+    collects them.
+    """
+    prefixes = {"rdf": RDF, "rdfs": RDFS, "owl": OWL}
+    graph_declares = set(sg.objects(sg.identifier, SH.declare))
+    ontologies = set(sg.subjects(RDF.type, OWL.Ontology))
+    ontology_declares = set(declare for ontology in ontologies for declare in sg.objects(ontology, SH.declare))
+    for node in sg.objects(rule, SH.prefixes):
+        declares = set(sg.objects(node, SH.declare))
+        if declares and node in ontologies:
+            declares |= graph_declares
+        else:
+            declares |= graph_declares | ontology_declares
+        for declare in declares:
+            prefix = _one(sg, declare, SH.prefix)
+            prefixes[str(prefix)] = URIRef(str(_one(sg, declare, SH.namespace)))
+    return prefixes
+
+
+def compile_triple_rule(sg, rule):
+    s, p, o = (compile_expression(sg, _one(sg, rule, predicate))
+               for predicate in (SH.subject, SH.predicate, SH.object))
+
+    def apply(graph, focus_nodes):
+        added = [triple for focus in focus_nodes
+                 for triple in product(s(graph, focus), p(graph, focus), o(graph, focus))]
+        graph.addN((s, p, o, graph) for s, p, o in added)
+    return apply
+
+
+def compile_sparql_rule(sg, rule):
+    prefixes = _prefixes(sg, rule)
+    queries = []
+    for construct in sg.objects(rule, SH.construct):
+        if not isinstance(construct, Literal) or not isinstance(construct.value, str):
+            raise UnsupportedRules("sh:construct of {} must be a string".format(rule))
+        query = prepareQuery(construct.value, initNs=prefixes)
+        if query.algebra.name != "ConstructQuery":
+            raise UnsupportedRules("sh:construct of {} must be a CONSTRUCT query".format(rule))
+        queries.append((query, bool(BIND_THIS.search(construct.value))))
+    if not queries:
+        raise UnsupportedRules("{} has no sh:construct".format(rule))
+
+    def apply(graph, focus_nodes):
+        added = Graph()
+        for focus in focus_nodes:
+            for query, binds_this in queries:
+                for triple in graph.query(query, initBindings={"this": focus} if binds_this else {}).graph:
+                    added.add(triple)
+        graph.addN((s, p, o, graph) for s, p, o in added)
+    return apply
+
+
+class CompiledRules:
+    """
+    A shapes graph's rules, ready to apply to data graphs.
+    """
+    def __init__(self, shapes):
+        # [(focus nodes, [rule])], in the order they apply
+        self.shapes = shapes
+
+    def apply(self, graph):
+        graphs = list(graph.contexts()) if isinstance(graph, ConjunctiveGraph) else [graph]
+        for data_graph in graphs:
+            for focus_nodes, rules in self.shapes:
+                for rule in rules:
+                    rule(data_graph, focus_nodes(data_graph))
+
+
+def compile_rules(sg):
+    """
+    Compile the rules of shapes graph `sg`, or raise UnsupportedRules.
+    """
+    for predicate in UNSUPPORTED:
+        if next(sg.subjects(predicate, None), None) is not None:
+            raise UnsupportedRules("{} is not supported".format(predicate))
+    for type in UNSUPPORTED_TYPES:
+        if next(sg.subjects(RDF.type, type), None) is not None:
+            raise UnsupportedRules("{} is not supported".format(type))
+
+    triple_rules = set(sg.subjects(RDF.type, SH.TripleRule))
+    sparql_rules = set(sg.subjects(RDF.type, SH.SPARQLRule))
+    shape_rules = {}
+    for shape, rule in sg.subject_objects(SH.rule):
+        if rule in triple_rules and rule not in sparql_rules:
+            compiled = compile_triple_rule(sg, rule)
+        elif rule in sparql_rules and rule not in triple_rules:
+            compiled = compile_sparql_rule(sg, rule)
+        else:
+            raise UnsupportedRules("{} is neither a TripleRule nor a SPARQLRule".format(rule))
+        if not any(bool(value) for value in sg.objects(rule, SH.deactivated)):
+            shape_rules.setdefault(shape, []).append((_order(sg, rule), compiled))
+
+    shapes = []
+    for shape, rules in sorted(shape_rules.items(), key=lambda item: _order(sg, item[0])):
+        shapes.append((compile_targets(sg, shape), [compiled for _, compiled in sorted(rules, key=lambda r: r[0])]))
+    return CompiledRules(shapes)
+
+
+class Footprint:
+    """
+    The part of a data graph that shapes can read: the focus nodes of
+    their targets, and whatever is at most `depth` steps of `predicates`
+    (followed either way) from them, with the types of all of it.
+    """
+    def __init__(self, classes, nodes, subjects_of, objects_of, predicates, depth):
+        self.classes = classes
+        self.nodes = nodes
+        self.subjects_of = subjects_of
+        self.objects_of = objects_of
+        self.predicates = predicates
+        self.depth = depth
+
+    def reached(self, scratch, inferred):
+        """
+        The nodes rules run on `scratch` may read further from: its focus
+        nodes (some only typed as such by the rules), and the nodes the
+        `inferred` triples link.
+        """
+        found = self.focus_nodes(scratch)
+        for s, p, o in inferred:
+            found.add(s)
+            if p != RDF.type and not isinstance(o, Literal):
+                found.add(o)
+        return found
+
+    def focus_nodes(self, graph):
+        found = set(self.nodes)
+        for target_class in self.classes:
+            for subclass in graph.transitive_subjects(RDFS.subClassOf, target_class):
+                found.update(graph.subjects(RDF.type, subclass))
+        for predicate in self.subjects_of:
+            found.update(s for s, _ in graph.subject_objects(predicate))
+        for predicate in self.objects_of:
+            found.update(o for _, o in graph.subject_objects(predicate))
+        return found
+
+    def extract(self, graph, seeds=None):
+        """
+        A scratch graph of the part of `graph` the shapes can read from
+        `seeds` (by default, the focus nodes of their targets).
+        """
+        triples = set()
+        visited = frontier = set(seeds) if seeds is not None else self.focus_nodes(graph)
+        for _ in range(self.depth):
+            reached = set()
+            for node in frontier:
+                for predicate in self.predicates:
+                    for value in graph.objects(node, predicate):
+                        triples.add((node, predicate, value))
+                        reached.add(value)
+                    for subject in graph.subjects(predicate, node):
+                        triples.add((subject, predicate, node))
+                        reached.add(subject)
+            frontier = reached - visited
+            visited = visited | frontier
+        for node in visited:
+            triples.update((node, RDF.type, type) for type in graph.objects(node, RDF.type))
+        triples.update(graph.triples((None, RDFS.subClassOf, None)))
+        scratch = Graph()
+        scratch.addN((s, p, o, scratch) for s, p, o in triples)
+        return scratch
+
+
+def _path_footprint(sg, path, predicates, depth=0):
+    """
+    The length of a SHACL path, adding the predicates it follows to
+    `predicates`; None if it has no bound.
+    """
+    if isinstance(path, URIRef):
+        predicates.add(path)
+        return 1
+    if not isinstance(path, BNode) or depth >= MAX_PATH_DEPTH:
+        return None
+    if next(sg.objects(path, RDF.first), None) is not None:
+        lengths = [_path_footprint(sg, item, predicates, depth + 1) for item in sg.items(path)]
+        return None if None in lengths else sum(lengths)
+    for predicate in (SH.inversePath, SH.zeroOrOnePath):
+        inner = next(sg.objects(path, predicate), None)
+        if inner is not None:
+            return _path_footprint(sg, inner, predicates, depth + 1)
+    alternatives = next(sg.objects(path, SH.alternativePath), None)
+    if alternatives is not None:
+        lengths = [_path_footprint(sg, item, predicates, depth + 1) for item in sg.items(alternatives)]
+        return None if None in lengths or not lengths else max(lengths)
+    return None
+
+
+def _sparql_path_footprint(path, predicates):
+    if isinstance(path, URIRef):
+        predicates.add(path)
+        return 1
+    if isinstance(path, SequencePath):
+        lengths = [_sparql_path_footprint(arg, predicates) for arg in path.args]
+        return None if None in lengths else sum(lengths)
+    if isinstance(path, AlternativePath):
+        lengths = [_sparql_path_footprint(arg, predicates) for arg in path.args]
+        return None if None in lengths else max(lengths)
+    if isinstance(path, InvPath):
+        return _sparql_path_footprint(path.arg, predicates)
+    return None
+
+
+def _patterns(algebra):
+    """
+    Every triple pattern in a query's algebra, but its CONSTRUCT template.
+    """
+    if isinstance(algebra, CompValue):
+        for key, value in algebra.items():
+            if key == "triples":
+                yield from (tuple(triple) for triple in value)
+            elif key != "template":
+                yield from _patterns(value)
+    elif isinstance(algebra, (list, tuple)):
+        for item in algebra:
+            yield from _patterns(item)
+
+
+def _query_footprint(sg, node, text, predicates):
+    """
+    How many steps from $this a query reads, adding the predicates it
+    follows to `predicates`; None if that has no bound.
+    """
+    if not BIND_THIS.search(text) or "$PATH" in text:
+        return None
+    try:
+        algebra = prepareQuery(text, initNs=_prefixes(sg, node)).algebra
+    except Exception:
+        return None
+    edges = []
+    for s, p, o in _patterns(algebra):
+        if p == RDF.type:
+            continue                    # the types of whatever is reached are always included
+        length = _sparql_path_footprint(p, predicates) if isinstance(p, (URIRef, Path)) else None
+        if length is None:
+            return None
+        edges.append((s, o, length))
+
+    # the farthest any pattern reaches from $this, going by its nearest end
+    distance = {THIS: 0}
+    changed = True
+    while changed:
+        changed = False
+        for s, o, length in edges:
+            for a, b in ((s, o), (o, s)):
+                if a in distance and distance[a] + length < distance.get(b, float("inf")):
+                    distance[b] = distance[a] + length
+                    changed = True
+    if any(s not in distance for s, _, _ in edges):
+        return None
+    return max((min(distance[s], distance[o]) + length for s, o, length in edges), default=0)
+
+
+def footprint(sg):
+    """
+    The Footprint of the shapes in `sg`, or None if it can't be bounded.
+    """
+    if any(next(sg.subjects(RDF.type, type), None) is not None
+           for type in UNSUPPORTED_TYPES + (SH.ConstraintComponent,)):
+        return None
+    if next(sg.subjects(SH.target, None), None) is not None:
+        return None
+
+    classes, nodes, subjects_of, objects_of = set(), set(), set(), set()
+    class_types = set(sg.subjects(RDFS.subClassOf, RDFS.Class)) | {RDFS.Class}
+    for shape in set(sg.subjects(SH.rule, None)) | set(sg.subjects(SH.targetClass, None)) | \
+            set(sg.subjects(SH.targetNode, None)) | set(sg.subjects(SH.targetSubjectsOf, None)) | \
+            set(sg.subjects(SH.targetObjectsOf, None)):
+        classes.update(sg.objects(shape, SH.targetClass))
+        if class_types.intersection(sg.objects(shape, RDF.type)):
+            classes.add(shape)
+        nodes.update(sg.objects(shape, SH.targetNode))
+        subjects_of.update(sg.objects(shape, SH.targetSubjectsOf))
+        objects_of.update(sg.objects(shape, SH.targetObjectsOf))
+
+    predicates = set(subjects_of | objects_of)
+    lengths = [_path_footprint(sg, path, predicates) for path in sg.objects(None, SH.path)]
+    for predicate in COMPARISONS:
+        predicates.update(sg.objects(None, predicate))
+    for predicate in QUERIES:
+        for node, text in sg.subject_objects(predicate):
+            lengths.append(_query_footprint(sg, node, str(text), predicates))
+    if None in lengths:
+        return None
+
+    # nested shapes read on from their parents' value nodes
+    nested = any(next(sg.subjects(predicate, None), None) is not None for predicate in NESTING)
+    depth = sum(lengths) if nested else max(lengths, default=0)
+    return Footprint(classes, nodes, subjects_of, objects_of, predicates, depth)
@@ -0,0 +1,13 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+from rdflib.store import Store
+from rdflib.plugin import register
+
+
+register(
+    "compact",
+    Store,
+    "stores.compact",
+    "CompactStore",
+)
@@ -0,0 +1,293 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+A store for conversions: written once, as a model is converted, then read
+(mostly in full) by a serializer, and maybe by profile rules.
+
+Terms are interned to integer IDs, and each quad is a row of four IDs in
+array columns: 32 bytes, where rdflib's Memory store keeps every triple
+as full terms in three nested dict indexes, and its contexts in two more.
+Adding a quad only appends a row. Duplicates are dropped when the store
+is next read, and each column's index is built when a lookup first needs
+it, so a store that is only ever iterated (N-Triples, say) builds none.
+"""
+
+# Standard Library
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+# External Dependencies
+from rdflib.store import Store
+from rdflib.util import _coalesce
+
+SUBJECT, PREDICATE, OBJECT, CONTEXT = range(4)
+
+
+class _Index:
+    """
+    The rows of a column, in order of their IDs, as of when it was built;
+    rows added since are kept by ID in a dict, until there are enough of
+    them that it is rebuilt.
+    """
+    def __init__(self, column, rows):
+        self.column = column
+        self.order = array("q", sorted(range(rows), key=column.__getitem__))
+        self.rows = rows
+        self.recent = {}
+        self.recent_rows = rows
+
+    def stale(self, rows):
+        return rows - self.rows > max(1024, self.rows // 4)
+
+    def lookup(self, term_id, rows):
+        column, order, recent = self.column, self.order, self.recent
+        for row in range(self.recent_rows, rows):
+            recent.setdefault(column[row], []).append(row)
+        self.recent_rows = rows
+        lo = bisect_left(order, term_id, key=column.__getitem__)
+        hi = bisect_right(order, term_id, lo=lo, key=column.__getitem__)
+        return chain(order[lo:hi], tuple(recent.get(term_id, ())))
+
+
+class CompactStore(Store):
+    """
+    Dictionary-encoded, column-oriented store. Context- and graph-aware,
+    but not formula-aware (no quoted graphs), and it doesn't dispatch
+    TripleAddedEvents or TripleRemovedEvents.
+
+    Removing triples only marks their rows; the store is meant to be
+    thrown away with the conversion it was made for.
+    """
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+
+    def __init__(self, configuration=None, identifier=None):
+        super().__init__(configuration)
+        self.identifier = identifier
+        self._ids = {}                                          # term: ID
+        self._terms = []                                        # ID: term
+        self._columns = tuple(array("q") for _ in range(4))     # subject, predicate, object, context IDs
+        self._settled = 0                                       # rows checked for duplicates
+        self._removed = set()
+        self._indexes = {}                                      # column: _Index
+        self._graphs = {}                                       # context ID: Graph
+        self._counts = {}                                       # context ID: (settled) triples
+        self._namespace = {}
+        self._prefix = {}
+
+    def _intern(self, term):
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = self._ids[term] = len(self._terms)
+            self._terms.append(term)
+        return term_id
+
+    def add(self, triple, context, quoted=False):
+        if quoted:
+            raise NotImplementedError("CompactStore is not formula-aware")
+        intern = self._intern
+        subject, predicate, object_ = triple
+        context_id = intern(context.identifier)
+        if context_id not in self._graphs:
+            self._graphs[context_id] = context
+        s_col, p_col, o_col, c_col = self._columns
+        s_col.append(intern(subject))
+        p_col.append(intern(predicate))
+        o_col.append(intern(object_))
+        c_col.append(context_id)
+
+    def addN(self, quads):
+        intern = self._intern
+        s_col, p_col, o_col, c_col = self._columns
+        last_context = context_id = None
+        for subject, predicate, object_, context in quads:
+            if context is not last_context:
+                context_id = intern(context.identifier)
+                if context_id not in self._graphs:
+                    self._graphs[context_id] = context
+                last_context = context
+            s_col.append(intern(subject))
+            p_col.append(intern(predicate))
+            o_col.append(intern(object_))
+            c_col.append(context_id)
+
+    def remove(self, triple_pattern, context=None):
+        ids = self._lookup_ids(triple_pattern, context)
+        if ids is None:
+            return
+        c_col = self._columns[CONTEXT]
+        for row in list(self._rows(*ids)):
+            self._removed.add(row)
+            self._counts[c_col[row]] -= 1
+
+    def triples(self, triple_pattern, context=None):
+        ids = self._lookup_ids(triple_pattern, context)
+        if ids is None:
+            return
+        terms = self._terms
+        s_col, p_col, o_col, c_col = self._columns
+        if len(self._graphs) == 1:
+            graphs = self._graphs
+            for row in self._rows(*ids):
+                yield (terms[s_col[row]], terms[p_col[row]], terms[o_col[row]]), iter((graphs[c_col[row]],))
+            return
+        # a triple in several contexts is still only one triple
+        seen = set()
+        for row in self._rows(*ids):
+            key = (s_col[row], p_col[row], o_col[row])
+            if key not in seen:
+                seen.add(key)
+                yield (terms[key[0]], terms[key[1]], terms[key[2]]), self._contexts_of(*key)
+
+    def __len__(self, context=None):
+        self._settle()
+        if context is not None:
+            return self._counts.get(self._ids.get(context.identifier), 0)
+        if len(self._graphs) <= 1:
+            return sum(self._counts.values())
+        s_col, p_col, o_col, _ = self._columns
+        removed = self._removed
+        return len(set((s_col[row], p_col[row], o_col[row])
+                       for row in range(self._settled) if row not in removed))
+
+    def contexts(self, triple=None):
+        if triple is None or triple == (None, None, None):
+            return iter(list(self._graphs.values()))
+        ids = [self._ids.get(term) for term in triple]
+        if None in ids:
+            return iter(())
+        self._settle()
+        return self._contexts_of(*ids)
+
+    def add_graph(self, graph):
+        self._graphs.setdefault(self._intern(graph.identifier), graph)
+
+    def remove_graph(self, graph):
+        self.remove((None, None, None), graph)
+        self._graphs.pop(self._ids.get(graph.identifier), None)
+
+    def bind(self, prefix, namespace, override=True):
+        # as rdflib's Memory.bind
+        bound_namespace = self._namespace.get(prefix)
+        bound_prefix = _coalesce(self._prefix.get(namespace), self._prefix.get(bound_namespace))
+        if override:
+            if bound_prefix is not None:
+                del self._namespace[bound_prefix]
+            if bound_namespace is not None:
+                del self._prefix[bound_namespace]
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+        else:
+            self._prefix[_coalesce(bound_namespace, namespace)] = _coalesce(bound_prefix, default=prefix)
+            self._namespace[_coalesce(bound_prefix, prefix)] = _coalesce(bound_namespace, default=namespace)
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix, None)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace, None)
+
+    def namespaces(self):
+        for prefix, namespace in self._namespace.items():
+            yield prefix, namespace
+
+    def _lookup_ids(self, triple_pattern, context):
+        """
+        The IDs of a pattern's terms and context (None where unbound), or
+        None if any of them was never added (and so matches nothing).
+        """
+        ids = []
+        for term in (*triple_pattern, None if context is None else context.identifier):
+            if term is None:
+                ids.append(None)
+                continue
+            term_id = self._ids.get(term)
+            if term_id is None:
+                return None
+            ids.append(term_id)
+        return ids
+
+    def _settle(self):
+        """
+        Drop the rows added since the store was last read that repeat an
+        earlier one, and count the rest into their contexts.
+        """
+        rows = len(self._columns[SUBJECT])
+        settled = self._settled
+        if settled == rows:
+            return
+        columns = self._columns
+        s_col, p_col, o_col, c_col = columns
+        bits = len(self._terms).bit_length()
+        seen = set()
+        kept = settled
+        for row in range(settled, rows):
+            s, p, o, c = s_col[row], p_col[row], o_col[row], c_col[row]
+            key = ((s << bits | p) << bits | o) << bits | c
+            if key in seen or (settled and self._find(s, p, o, c, settled)):
+                continue
+            seen.add(key)
+            if kept != row:
+                for column in columns:
+                    column[kept] = column[row]
+            self._counts[c] = self._counts.get(c, 0) + 1
+            kept += 1
+        for column in columns:
+            del column[kept:]
+        self._settled = kept
+
+    def _find(self, s, p, o, c, rows):
+        _, p_col, o_col, c_col = self._columns
+        for row in self._index(SUBJECT, rows).lookup(s, rows):
+            if p_col[row] == p and o_col[row] == o and c_col[row] == c and row not in self._removed:
+                return True
+        return False
+
+    def _index(self, column, rows):
+        index = self._indexes.get(column)
+        if index is None or index.stale(rows):
+            index = self._indexes[column] = _Index(self._columns[column], rows)
+        return index
+
+    def _rows(self, s, p, o, c):
+        """
+        The rows matching a pattern of IDs, through the index of its most
+        selective bound term.
+        """
+        self._settle()
+        rows = self._settled
+        pattern = (s, p, o, c)
+        for column in (SUBJECT, OBJECT, PREDICATE):
+            if pattern[column] is not None:
+                candidates = self._index(column, rows).lookup(pattern[column], rows)
+                break
+        else:
+            column, candidates = None, range(rows)
+        if c is not None and len(self._graphs) == 1 and c in self._graphs:
+            pattern = (s, p, o, None)     # every row is in it
+        checks = [(self._columns[other], term_id) for other, term_id in enumerate(pattern)
+                  if term_id is not None and other != column]
+        if not checks and not self._removed:
+            return candidates
+        return self._filter(candidates, checks)
+
+    def _filter(self, candidates, checks):
+        removed = self._removed
+        for row in candidates:
+            if removed and row in removed:
+                continue
+            for column, term_id in checks:
+                if column[row] != term_id:
+                    break
+            else:
+                yield row
+
+    def _contexts_of(self, s, p, o):
+        graphs, c_col = self._graphs, self._columns[CONTEXT]
+        for row in self._rows(s, p, o, None):
+            graph = graphs.get(c_col[row])
+            if graph is not None:
+                yield graph
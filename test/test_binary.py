@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Round trips through the binary RDF format (application/x-ifcld-rdf): a
+graph serialized and parsed back must be isomorphic to it, with its named
+graphs kept apart (and blank nodes shared between them kept shared),
+compressed or not, and over several blocks.
+"""
+
+# Standard Library
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import quote
+
+# External Dependencies
+import pytest
+from rdflib import ConjunctiveGraph, Graph, URIRef, BNode, Literal, Namespace, XSD
+from rdflib.compare import isomorphic
+
+# Internal Dependencies
+import parsers
+import serializers
+from parsers.binary import read_quads
+from parsers.step.errors import MalformedInputError
+
+TEST_DIR = Path(__file__).resolve().parent
+FORMAT = "application/x-ifcld-rdf"
+BASE_URI = URIRef("http://example.org/model#")
+EX = Namespace("http://example.org/vocab#")
+NAMED = (URIRef("http://example.org/graphs/a"), URIRef("http://example.org/graphs/b"))
+
+# compressed or not, in one block or in blocks of two quads
+WRITES = [{}, {"compress": False}, {"block_size": 2}, {"compress": False, "block_size": 2}]
+
+
+def statements():
+    wall, storey, point = BNode(), BNode(), BNode()
+    return [
+        (EX.building, EX.name, Literal("Building")),
+        (EX.building, EX.label, Literal("Gebäude", lang="de")),
+        (EX.building, EX.label, Literal("building", lang="en-GB")),
+        (EX.building, EX.hasStorey, storey),
+        (storey, EX.elevation, Literal("2.50", datatype=XSD.decimal, normalize=False)),
+        (storey, EX.containsElement, wall),
+        (wall, EX.layers, Literal(3)),
+        (wall, EX.ratio, Literal(0.25)),
+        (wall, EX.flag, Literal(True)),
+        (wall, EX.note, Literal("")),
+        (wall, EX.note, Literal("𝄞 [a] \"quoted\"\nline")),
+        (wall, EX.custom, Literal("1;2;3", datatype=EX.list)),
+        (wall, EX.placement, point),
+        (point, EX.coordinates, Literal("0 0 0", datatype=EX.list)),
+    ]
+
+
+def round_trip(graph, make, **args):
+    data = graph.serialize(format=FORMAT, encoding="utf-8", **args)
+    parsed = make(identifier=graph.identifier)
+    parsed.parse(data=data, format=FORMAT)
+    return data, parsed
+
+
+def flattened(graph):
+    """
+    A plain graph of a ConjunctiveGraph's quads, the graph each is in
+    folded into its predicate, so that isomorphism covers the contexts.
+    """
+    flat = Graph()
+    for s, p, o, context in graph.quads((None, None, None)):
+        flat.add((s, URIRef("{p}/{graph}".format(p=p, graph=quote(context.identifier, safe=""))), o))
+    return flat
+
+
+@pytest.mark.parametrize("args", WRITES)
+def test_triples(args):
+    graph = Graph(identifier=BASE_URI)
+    graph.bind("ex", EX)
+    for triple in statements():
+        graph.add(triple)
+    _, parsed = round_trip(graph, Graph, **args)
+    assert len(parsed) == len(graph)
+    assert isomorphic(parsed, graph)
+    assert parsed.namespace_manager.store.namespace("ex") == URIRef(EX)
+    assert (EX.building, EX.label, Literal("Gebäude", lang="de")) in parsed
+    assert (None, EX.elevation, Literal("2.50", datatype=XSD.decimal, normalize=False)) in parsed
+
+
+@pytest.mark.parametrize("args", WRITES)
+def test_quads(args):
+    graph = ConjunctiveGraph(identifier=BASE_URI)
+    triples = statements()
+    graph.addN((s, p, o, graph.default_context) for s, p, o in triples)
+    for i, name in enumerate(NAMED):
+        graph.addN((s, p, o, graph.get_context(name)) for s, p, o in triples[i::2])
+    _, parsed = round_trip(graph, ConjunctiveGraph, **args)
+    assert set(c.identifier for c in parsed.contexts()) == {BASE_URI, *NAMED}
+    for identifier in (BASE_URI, *NAMED):
+        assert len(parsed.get_context(identifier)) == len(graph.get_context(identifier))
+    assert isomorphic(flattened(parsed), flattened(graph))
+
+
+def test_blocks():
+    graph = Graph(identifier=BASE_URI)
+    for triple in statements():
+        graph.add(triple)
+    data = graph.serialize(format=FORMAT, encoding="utf-8", block_size=2)
+    blocks = list(read_quads(BytesIO(data)))
+    assert len(blocks) == (len(graph) + 1) // 2
+    assert sum(len(block) for block in blocks) == len(graph)
+
+
+def test_converted_model():
+    graph = ConjunctiveGraph(identifier=BASE_URI)
+    graph.parse(data=(TEST_DIR / "wall-standard-case.ifc").read_bytes(), format="model/step")
+    _, parsed = round_trip(graph, ConjunctiveGraph, block_size=64)
+    assert len(parsed) == len(graph)
+    assert isomorphic(flattened(parsed), flattened(graph))
+
+
+def test_malformed():
+    graph = Graph(identifier=BASE_URI)
+    for triple in statements():
+        graph.add(triple)
+    data = graph.serialize(format=FORMAT, encoding="utf-8")
+    for malformed in (data[:len(data) // 2], b"IFCLDRDF\x09\x00", b"not binary rdf"):
+        with pytest.raises(MalformedInputError):
+            Graph().parse(data=malformed, format=FORMAT)
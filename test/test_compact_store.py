@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+The compact store against rdflib's: a converted model's triples, copied
+into a CompactStore and into SimpleMemory (or, with contexts, Memory),
+must be found alike by every pattern, counted alike and removed alike,
+duplicates and reads between additions included.
+"""
+
+# Standard Library
+from pathlib import Path
+from itertools import islice
+
+# External Dependencies
+import pytest
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
+
+# Internal Dependencies
+import parsers
+import stores
+from stores.compact import CompactStore
+
+TEST_DIR = Path(__file__).resolve().parent
+BASE_URI = URIRef("http://example.org/model#")
+OTHER = URIRef("http://example.org/other#")
+BATCH = 5000
+
+
+def converted(name):
+    graph = ConjunctiveGraph(identifier=BASE_URI)
+    graph.parse(data=(TEST_DIR / name).read_bytes(), format="model/step")
+    return list(graph.triples((None, None, None)))
+
+
+@pytest.fixture(scope="module")
+def triples():
+    return converted("wall-standard-case.ifc")
+
+
+def store_graphs():
+    return Graph(store="SimpleMemory", identifier=BASE_URI), Graph(store=CompactStore(), identifier=BASE_URI)
+
+
+def graphs(triples):
+    expected, actual = store_graphs()
+    for graph in (expected, actual):
+        graph.addN((s, p, o, graph) for s, p, o in triples)
+    return expected, actual
+
+
+def patterns(triples):
+    yield (None, None, None)
+    for s, p, o in triples:
+        yield from ((s, None, None), (None, p, None), (None, None, o), (s, p, None), (s, None, o), (None, p, o),
+                    (s, p, o))
+
+
+def test_triples(triples):
+    expected, actual = graphs(triples)
+    for pattern in patterns(triples):
+        assert set(actual.triples(pattern)) == set(expected.triples(pattern)), pattern
+    assert (BASE_URI, BASE_URI, Literal("missing")) not in actual
+    assert not list(actual.triples((URIRef("http://example.org/missing"), None, None)))
+
+
+def test_duplicates(triples):
+    expected, actual = graphs(triples)
+    for graph in (expected, actual):
+        graph.addN((s, p, o, graph) for s, p, o in triples[::2])
+        graph.add(triples[0])
+    assert len(actual) == len(expected) == len(set(triples))
+    assert sorted(actual) == sorted(expected)
+
+
+def test_remove(triples):
+    expected, actual = graphs(triples)
+    (s, p, o), (_, p2, _) = triples[0], triples[len(triples) // 2]
+    for pattern in ((s, None, None), (None, p2, None), (None, None, o)):
+        for graph in (expected, actual):
+            graph.remove(pattern)
+        assert len(actual) == len(expected)
+        assert set(actual) == set(expected)
+    for graph in (expected, actual):
+        graph.add((s, p, o))
+    assert (s, p, o) in actual
+    assert len(actual) == len(expected)
+    assert set(actual) == set(expected)
+
+
+def test_reads_between_additions():
+    triples = converted("01.ifc")
+    expected, actual = store_graphs()
+    for start in range(0, len(triples), BATCH):
+        batch = triples[start:start + BATCH] + triples[max(0, start - 100):start]   # some repeated
+        for graph in (expected, actual):
+            graph.addN((s, p, o, graph) for s, p, o in batch)
+        for s, p, o in islice(triples, 0, start + BATCH, 997):
+            for pattern in ((s, None, None), (None, None, o), (s, p, o)):
+                assert set(actual.triples(pattern)) == set(expected.triples(pattern)), pattern
+        assert len(actual) == len(expected)
+    assert set(actual) == set(expected)
+
+
+def conjunctive_graphs(triples):
+    """
+    A ConjunctiveGraph in each store, with the triples in the default
+    context and every third one in another context too.
+    """
+    expected = ConjunctiveGraph(store="Memory", identifier=BASE_URI)
+    actual = ConjunctiveGraph(store="compact", identifier=BASE_URI)
+    for graph in (expected, actual):
+        default, other = graph.get_context(BASE_URI), graph.get_context(OTHER)
+        graph.addN((s, p, o, default) for s, p, o in triples)
+        graph.addN((s, p, o, other) for s, p, o in triples[::3])
+    return expected, actual
+
+
+def quads(graph, pattern):
+    return set((s, p, o, g.identifier) for s, p, o, g in graph.quads(pattern))
+
+
+def test_quads_and_contexts(triples):
+    expected, actual = conjunctive_graphs(triples)
+    assert len(actual) == len(expected) == len(set(triples))
+    assert set(c.identifier for c in actual.contexts()) == set(c.identifier for c in expected.contexts())
+    for identifier in (BASE_URI, OTHER):
+        assert len(actual.get_context(identifier)) == len(expected.get_context(identifier))
+    for pattern in islice(patterns(triples), 0, None, 5):
+        assert quads(actual, pattern) == quads(expected, pattern), pattern
+    for triple in triples[:50]:
+        assert set(c.identifier for c in actual.contexts(triple)) == \
+            set(c.identifier for c in expected.contexts(triple))
+
+
+def test_remove_from_context(triples):
+    expected, actual = conjunctive_graphs(triples)
+    s, p, o = triples[0]
+    for graph in (expected, actual):
+        graph.get_context(OTHER).remove((s, None, None))
+        graph.remove((None, p, None))
+    assert len(actual) == len(expected)
+    for identifier in (BASE_URI, OTHER):
+        assert len(actual.get_context(identifier)) == len(expected.get_context(identifier))
+    assert quads(actual, (None, None, None)) == quads(expected, (None, None, None))
@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Parity of the C parser backend with SCL's PLY parser: every file in
+test/ must parse to the same headers and entities (references, type
+names and parameters, typed parameters included), one by one.
+
+Skipped unless the extension is built (python3 -m parsers.step.cparser build).
+"""
+
+# Standard Library
+from pathlib import Path
+from itertools import zip_longest
+
+# External Dependencies
+import pytest
+
+# Internal Dependencies
+from parsers.step import cparser
+from parsers.step.incremental import IncrementalParser
+from parsers.step.SCL.Part21 import TypedParameter, SimpleEntity, ComplexEntity
+
+TEST_DIR = Path(__file__).resolve().parent
+FILES = sorted(path for path in TEST_DIR.iterdir() if path.suffix in (".ifc", ".stp"))
+
+pytestmark = pytest.mark.skipif(cparser._cp21 is None, reason="the C parser extension is not built")
+
+BRACKETS = b"""ISO-10303-21;
+HEADER;
+FILE_DESCRIPTION(('ViewDefinition [CoordinationView]'),'2;1');
+FILE_NAME('brackets.ifc','2011-09-07T12:28:29',(''),(''),'','','');
+FILE_SCHEMA(('IFC2X3'));
+ENDSEC;
+DATA;
+#1=IFCPROPERTYSINGLEVALUE('Reference [a]',$,IFCLABEL('[]'),$);
+#2=IFCPROPERTYSINGLEVALUE('\\S\\[]',$,IFCLABEL('x]['),$);
+ENDSEC;
+END-ISO-10303-21;
+"""
+
+
+def normalize(value):
+    if isinstance(value, TypedParameter):
+        return ("typed", value.type_name, normalize(value.params))
+    if isinstance(value, SimpleEntity):
+        return ("simple", value.ref, value.type_name, normalize(value.params))
+    if isinstance(value, ComplexEntity):
+        return ("complex", value.ref, normalize(value.params))
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    if isinstance(value, float):
+        return ("float", repr(value))
+    if isinstance(value, bool) or value is None:
+        return ("const", value)
+    if isinstance(value, int):
+        return ("int", value)
+    return value
+
+
+def items(file):
+    """
+    The header, then a marker per section followed by its entities.
+    """
+    header = file.header
+    headers = [header.file_description, header.file_name, header.file_schema] + header.extra_headers
+    yield [(h.type_name, normalize(h.params)) for h in headers]
+    for section in file.sections:
+        yield "DATA"
+        for entity in section.entities:
+            yield normalize(entity)
+
+
+def parse_both(data):
+    ply, c = IncrementalParser(), cparser.CParser()
+    try:
+        yield from zip_longest(items(ply.parse(data)), items(c.parse(data)))
+    finally:
+        c.reset()
+
+
+@pytest.mark.parametrize("path", FILES, ids=[path.name for path in FILES])
+def test_entities_match(path):
+    for count, (expected, actual) in enumerate(parse_both(path.read_bytes())):
+        assert actual == expected, "item {count} of {name} differs".format(count=count, name=path.name)
+
+
+def test_brackets_in_strings():
+    parsed = list(parse_both(BRACKETS))
+    for expected, actual in parsed:
+        assert actual == expected
+    header, _, first, second = (actual for _, actual in parsed)
+    assert header[0] == ("FILE_DESCRIPTION", [["ViewDefinition [CoordinationView]"], "2;1"])
+    assert first[3][0] == "Reference [a]"
+    assert first[3][2] == ("typed", "IFCLABEL", ["[]"])
+    assert second[3][2] == ("typed", "IFCLABEL", ["x]["])
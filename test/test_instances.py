@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Stored models: converted with `persist`, and served again by GET
+/instances/{id} (from a model store in a temporary directory, on disk
+only), in each format as the conversion itself would be, with ETags that
+If-None-Match is answered 304 for.
+"""
+
+# Standard Library
+from pathlib import Path
+
+# External Dependencies
+import pytest
+from rdflib import ConjunctiveGraph, URIRef, RDF, DCTERMS
+from rdflib.compare import isomorphic
+
+# Internal Dependencies
+import service
+from model_store import make_model_store, STREAMED_FORMATS
+
+TEST_DIR = Path(__file__).resolve().parent
+BASE_URI = "http://example.org/model#"
+BOT = "https://w3id.org/bot#"
+# response format: the format to parse it back with
+FORMATS = {
+    "application/n-triples": "nt",
+    "application/n-quads": "nquads",
+    "application/json": "json-ld",
+    "text/turtle": "turtle",
+    "application/rdf+xml": "xml",
+    "application/x-ifcld-rdf": "application/x-ifcld-rdf",
+}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv("IFCLD_MODEL_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(service, "model_store", make_model_store("disk", directory=str(tmp_path), memory_size=0))
+    return service.app.test_client()
+
+
+def post(client, name, accept, persist=True, **headers):
+    headers = {"Content-Type": "model/step", "Accept": accept, "Content-Location": BASE_URI, **headers}
+    return client.post("/instances" + ("?persist=1" if persist else ""), data=(TEST_DIR / name).read_bytes(),
+                       headers=headers)
+
+
+def parsed(resp, accept):
+    graph = ConjunctiveGraph()
+    graph.parse(data=resp.get_data(), format=FORMATS[accept], publicID=BASE_URI)
+    return graph
+
+
+def test_persist(client, tmp_path):
+    created = post(client, "wall-standard-case.ifc", "text/turtle")
+    assert created.status_code == 201
+    location = created.headers["Location"]
+    assert location.startswith("/instances/")
+    assert any(tmp_path.iterdir())
+    again = post(client, "wall-standard-case.ifc", "text/turtle")
+    assert again.status_code == 200
+    assert again.headers["Location"] == location
+    assert again.headers["ETag"] == created.headers["ETag"]
+
+
+@pytest.mark.parametrize("accept", FORMATS)
+def test_get(client, accept):
+    location = post(client, "wall-standard-case.ifc", "text/turtle").headers["Location"]
+    stored = client.get(location, headers={"Accept": accept})
+    assert stored.status_code == 200
+    assert stored.mimetype == accept
+    assert stored.headers["Content-Profile"] == "http://ifc-ld.org/schemas/ifc4#"
+    converted = post(client, "wall-standard-case.ifc", accept, persist=False)
+    assert len(parsed(stored, accept)) == len(parsed(converted, accept))
+    assert isomorphic(parsed(stored, accept), parsed(converted, accept))
+
+    etag = stored.headers["ETag"]
+    assert not etag.startswith("W/")
+    not_modified = client.get(location, headers={"Accept": accept, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert not not_modified.get_data()
+
+
+def test_etags(client):
+    location = post(client, "wall-standard-case.ifc", "text/turtle").headers["Location"]
+    etags = set(client.get(location, headers={"Accept": accept}).headers["ETag"] for accept in FORMATS)
+    assert len(etags) == len(FORMATS)
+    modified = client.get(location, headers={"Accept": "text/turtle", "If-None-Match": '"elsewhere"'})
+    assert modified.status_code == 200
+
+
+def test_quads_keep_graph(client):
+    location = post(client, "wall-standard-case.ifc", "text/turtle").headers["Location"]
+    stored = parsed(client.get(location, headers={"Accept": "application/n-quads"}), "application/n-quads")
+    assert set(context.identifier for context in stored.contexts()) == {URIRef(BASE_URI)}
+
+
+@pytest.mark.parametrize("accept", STREAMED_FORMATS)
+def test_native_profile(client, accept):
+    created = post(client, "wall-standard-case.ifc", accept, **{"Accept-Profile": BOT})
+    assert created.status_code == 201
+    assert BOT in created.headers["Content-Profile"].split(",")
+    stored = client.get(created.headers["Location"], headers={"Accept": accept, "Accept-Profile": BOT})
+    assert stored.status_code == 200
+    assert BOT in stored.headers["Content-Profile"].split(",")
+    assert stored.headers["ETag"] == created.headers["ETag"]
+    graph = parsed(stored, accept)
+    assert (URIRef(BASE_URI), DCTERMS.conformsTo, URIRef(BOT)) in graph
+    assert any(type.startswith(BOT) for type in graph.objects(None, RDF.type))
+    assert len(graph) == len(parsed(created, accept))
+
+
+def test_unknown(client):
+    assert client.get("/instances/" + "0" * 64, headers={"Accept": "text/turtle"}).status_code == 404
+    assert client.get("/instances/unknown", headers={"Accept": "application/json"}).status_code == 404
@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: © 2023-2024 Devon D. Sparks
+# SPDX-License-Identifier: AGPL-3.0
+
+"""
+Request bodies, taken in without copying large models about.
+
+A body of up to IFCLD_SPOOL_SIZE MB is read into memory. A larger one is
+spooled to an (unlinked) temporary file as it is received, and that file
+memory-mapped, so it is paged in by the kernel rather than held on the
+heap. Either is a bytes-like buffer which the C STEP parser, the index of
+references (see parsers/step/references.py) and the hashes of the result
+cache and model store read in place, without decoding it.
+
+A body can also be given by reference: the `path` of a file under
+IFCLD_SHARED_DIR (a volume shared with the service's clients, say), which
+is mapped without being uploaded at all. It mustn't change while it is
+being converted.
+
+A conversion in another process (a job's, see jobs.py) is sent neither
+the body nor the mapping, but a FileInput naming the file it maps itself:
+the shared file, or one a large body is spooled to for it by spool_file().
+"""
+
+import os
+import mmap
+import shutil
+import tempfile
+from collections import namedtuple
+
+SPOOL_SIZE = int(os.environ.get("IFCLD_SPOOL_SIZE", 16))
+SPOOL_DIR = os.environ.get("IFCLD_SPOOL_DIR") or None
+SHARED_DIR = os.environ.get("IFCLD_SHARED_DIR") or None
+READ_SIZE = 1024 * 1024
+
+# a file for another process to map; a `temporary` one is removed once it is
+FileInput = namedtuple("FileInput", ["path", "temporary"])
+
+
+def map_file(f):
+    """
+    The open file `f` memory-mapped, read-only. The mapping outlives `f`
+    being closed (and, for a temporary file, removed).
+    """
+    if os.fstat(f.fileno()).st_size == 0:
+        return b""                          # an empty file can't be mapped
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _head(stream, max_size):
+    """
+    The chunks of up to a read past `max_size` bytes of `stream`, and
+    whether that is all there is.
+    """
+    chunks, size = [], 0
+    while size <= max_size:
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            return chunks, True
+        chunks.append(chunk)
+        size += len(chunk)
+    return chunks, False
+
+
+def spool(stream, max_size=SPOOL_SIZE * 1024 * 1024, directory=SPOOL_DIR):
+    """
+    What is read from `stream`: bytes, or, past `max_size` bytes, a
+    temporary file in `directory` it is spooled to, memory-mapped.
+    """
+    chunks, complete = _head(stream, max_size)
+    if complete:
+        return b"".join(chunks)
+    with tempfile.TemporaryFile(dir=directory) as f:
+        f.writelines(chunks)
+        del chunks
+        shutil.copyfileobj(stream, f, READ_SIZE)
+        f.flush()
+        return map_file(f)
+
+
+def spool_file(stream, max_size=SPOOL_SIZE * 1024 * 1024, directory=SPOOL_DIR):
+    """
+    What is read from `stream`: bytes, or, past `max_size` bytes, the
+    temporary FileInput of a file in `directory` it is spooled to.
+    """
+    chunks, complete = _head(stream, max_size)
+    if complete:
+        return b"".join(chunks)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".input")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.writelines(chunks)
+            del chunks
+            shutil.copyfileobj(stream, f, READ_SIZE)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return FileInput(path, True)
+
+
+def read_input(data):
+    """
+    `data`, or, for a FileInput, its file memory-mapped (and a temporary
+    one removed).
+    """
+    if not isinstance(data, FileInput):
+        return data
+    with open(data.path, "rb") as f:
+        mapped = map_file(f)
+    if data.temporary:
+        os.unlink(data.path)
+    return mapped
+
+
+def shared_path(path, shared_dir=SHARED_DIR):
+    """
+    The real path of the file at `path`, relative to `shared_dir`. Raises
+    PermissionError if there is no `shared_dir` or `path` leads out of it,
+    and OSError if the file can't be read.
+    """
+    if not shared_dir:
+        raise PermissionError("Files are not read by reference by this service.")
+    root = os.path.realpath(shared_dir)
+    target = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, target]) != root:
+        raise PermissionError("{path} is not in the shared directory.".format(path=path))
+    with open(target, "rb"):
+        return target
+
+
+def shared_file(path, shared_dir=SHARED_DIR):
+    """
+    The file at `path`, relative to `shared_dir`, memory-mapped. Raises
+    as shared_path() does.
+    """
+    with open(shared_path(path, shared_dir), "rb") as f:
+        return map_file(f)